@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+# coding: utf-8
+"""
+asyncio 기반 채팅 서버 (TCP)
+- server.py와 동일한 프로토콜 (닉네임 입력, '/종료', '/귓속말', 입장/퇴장 알림)
+- 연결당 스레드 대신 이벤트 루프 하나에서 모든 연결을 처리
+  → 클라이언트당 메모리는 스트림 버퍼 정도로 일정, 수만 연결까지 한 프로세스로 처리
+- 명령/브로드캐스트 처리는 server.py의 함수를 그대로 재사용
+- 송신은 클라이언트별 대기열 + writer 코루틴 (server.py의 스레드 writer와 같은 구조)
+- 대화 기록(append/recent)은 기록 전용 스레드 하나에서 실행 (flush 락과 mmap 읽기로 루프가 멈추지 않음)
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+import server
+from framing import RECV_BUFSIZE, make_framer
+from server import HOST, PORT, BACKLOG
+
+
+class AsyncClientInfo(server.ClientInfo):
+    """asyncio 스트림으로 연결된 클라이언트 정보. 송신 대기열은 writer 코루틴이 비움."""
+    def __init__(self, writer, addr, nickname, framer=None):
+        super().__init__(writer.get_extra_info('socket'), addr, nickname, framer)
+        self.writer = writer
+
+    def make_wakeup(self):
+        """writer 코루틴을 깨우는 이벤트 (이벤트 루프 스레드에서만 사용)."""
+        return asyncio.Event()
+
+    def abort_connection(self):
+        """전송 버퍼를 버리고 즉시 연결을 끊음. drain()에서 기다리던 writer도 깨어남."""
+        self.writer.transport.abort()
+
+    def start(self):
+        """송신 대기열을 비우는 writer 코루틴 시작."""
+        self.writer_task = asyncio.get_running_loop().create_task(self.writer_loop())
+
+    async def writer_loop(self):
+        """
+        대기열의 메시지를 스트림에 쓰고 drain으로 흐름 제어.
+        느린 클라이언트는 drain에서 이 코루틴만 기다리고, 그동안 대기열이 차면 넘침 정책 적용.
+        """
+        outbox = self.outbox
+        try:
+            while not outbox.finished():
+                await self.wakeup.wait()
+                self.wakeup.clear()
+                if outbox.aborted:
+                    break
+                # 쌓인 프레임을 한 번에 전송 버퍼로 넘김
+                batch = outbox.drain()
+                if batch:
+                    self.writer.writelines(batch)
+                    metrics.inc('messages_sent', len(batch))
+                    metrics.inc('bytes_sent', sum(map(len, batch)))
+                await self.writer.drain()
+        except Exception:
+            metrics.inc('send_failures')
+        finally:
+            self.writer.close()
+
+
+class HistoryOffload:
+    """
+    대화 기록 작업을 전용 스레드 하나에서 차례로 실행 (server.history_offload).
+    스레드가 하나라 기록과 조회의 순서는 넘긴 순서와 같음. 조회 결과는 이벤트 루프에서 콜백으로 받음.
+    """
+    def __init__(self, loop):
+        self.loop = loop
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='history')
+
+    def submit(self, func, *args):
+        """결과를 기다리지 않는 작업 (기록)."""
+        self.executor.submit(func, *args)
+
+    def call(self, func, args, callback):
+        """func(*args)를 기록 스레드에서 실행하고, 결과로 callback을 이벤트 루프에서 호출."""
+        future = self.executor.submit(func, *args)
+        future.add_done_callback(self._schedule(callback))
+
+    def _schedule(self, callback):
+        def done(future):
+            if future.exception() is not None:
+                return
+            try:
+                self.loop.call_soon_threadsafe(callback, future.result())
+            except RuntimeError:
+                # 이벤트 루프가 이미 닫힘 (종료 중)
+                pass
+        return done
+
+    def close(self):
+        """남은 작업(기록)을 마칠 때까지 기다림."""
+        self.executor.shutdown(wait=True)
+
+
+async def recv_messages(reader, framer):
+    """스트림에서 받은 데이터를 프레임 단위 메시지로 하나씩 꺼내는 비동기 제너레이터."""
+    while True:
+        data = await reader.read(RECV_BUFSIZE)
+        if not data:
+            return
+        metrics.inc('bytes_received', len(data))
+        for message in framer.feed(data):
+            yield message
+        # 읽을 데이터가 버퍼에 남아 있으면 read()는 양보하지 않으므로,
+        # 빠르게 보내는 클라이언트 하나가 writer 코루틴들을 굶기지 않도록 한 번 양보
+        await asyncio.sleep(0)
+
+
+async def handle_client_async(reader, writer):
+    """클라이언트별 코루틴."""
+    addr = writer.get_extra_info('peername')
+    metrics.inc('connections_accepted')
+    info = None
+    claimed = None  # 전역 등록부에서 받은 닉네임 (이 프로세스에 등록하기 전에 끝나면 반납)
+    framer = make_framer(server.FRAMING)
+    try:
+        writer.write(framer.encode('닉네임을 입력하세요: '))
+        await writer.drain()
+        messages = recv_messages(reader, framer)
+        # 닉네임을 보내지 않고 붙잡고 있는 연결도 정리되도록 제한 시간 설정
+        timeout = server.IDLE_TIMEOUT if server.IDLE_TIMEOUT > 0 else None
+        first = await asyncio.wait_for(anext(messages, None), timeout)
+        if first is None:
+            writer.close()
+            return
+        nickname = first.strip()
+        if not nickname:
+            writer.write(framer.encode('서버> 유효한 닉네임이 아닙니다. 연결을 종료합니다.'))
+            await writer.drain()
+            writer.close()
+            return
+
+        # 여러 프로세스로 나뉘어 있으면 전역 닉네임 등록부에서 먼저 중복 처리
+        if server.relay is not None:
+            nickname = claimed = await server.relay.claim(nickname)
+
+        # 닉네임 중복 처리: 중복이면 숫자 붙여 변형
+        start = metrics.timer()
+        nickname, info = server.register_client(
+            nickname, lambda nick: AsyncClientInfo(writer, addr, nick, framer))
+        info.start()
+
+        # 입장 알림
+        server.welcome(info)
+        metrics.observe_since('accept', start)
+
+        # 메시지 수신 루프 (read 한 번에 여러 메시지가 와도 하나씩 처리)
+        async for message in messages:
+            if not message:
+                continue
+            if not server.handle_message(info, message):
+                break
+    except Exception:
+        pass
+    finally:
+        # 연결 종료 처리 (등록했으면 remove_client가 등록부 반납과 연결 닫기까지 함)
+        if info is not None:
+            server.remove_client(info.nickname)
+        else:
+            if claimed is not None and server.relay is not None:
+                server.relay.release(claimed)
+            writer.close()
+
+
+async def reaper_loop():
+    """유휴 연결 정리 코루틴 (클라이언트 수와 관계없이 하나)."""
+    while True:
+        await asyncio.sleep(server.REAPER_TICK)
+        server.reap_idle()
+
+
+async def serve(sock=None):
+    """리스닝 소켓을 열고 (또는 이미 열린 sock을 받아) 영원히 접속을 받음."""
+    if sock is None:
+        srv = await asyncio.start_server(
+            handle_client_async, HOST, PORT, backlog=BACKLOG, reuse_address=True)
+    else:
+        srv = await asyncio.start_server(handle_client_async, sock=sock)
+    reaper = None
+    if server.IDLE_TIMEOUT > 0:
+        reaper = asyncio.get_running_loop().create_task(reaper_loop())
+    offload = server.history_offload = HistoryOffload(asyncio.get_running_loop())
+    print('서버 시작 (async): {}:{}'.format(HOST, PORT))
+    try:
+        async with srv:
+            await srv.serve_forever()
+    finally:
+        if reaper is not None:
+            reaper.cancel()
+        # 남은 기록을 마친 뒤 close_history()가 닫도록
+        server.history_offload = None
+        offload.close()
+
+
+def start_async_server():
+    """비동기 서버 실행 진입점."""
+    server.raise_nofile_limit()
+    server.open_history()
+    server.start_metrics_server()
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        print('\n서버 종료 중...')
+    finally:
+        server.close_all_clients()
+        server.close_history()
+        print('서버 종료 완료.')
+
+
+if __name__ == '__main__':
+    start_async_server()
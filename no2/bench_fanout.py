@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# coding: utf-8
+"""
+브로드캐스트 팬아웃 마이크로 벤치마크
+- 수신자 1천 명 / 1만 명일 때 브로드캐스트 한 번에 드는 CPU 시간과 할당 바이트 측정
+- 비교 대상
+  per-client : 수신자마다 message.encode() (이전 broadcast 방식)
+  encode-once: 한 번 인코딩한 memoryview를 모든 대기열이 공유 (현재 server.broadcast)
+- 실제 소켓 없이 송신 대기열에 넣는 비용만 측정 (writer는 시작하지 않음)
+
+실행: python bench_fanout.py [--rounds 20]
+"""
+
+import argparse
+import time
+import tracemalloc
+
+import server
+
+
+MESSAGE = '철수> 안녕하세요, 여러분! 오늘 회의는 3시에 시작합니다.'
+
+
+def per_client_broadcast(message):
+    """비교용: 수신자마다 따로 인코딩하는 이전 방식."""
+    with server.clients_lock:
+        targets = list(server.clients.values())
+    for info in targets:
+        info.send(message)
+
+
+def setup_clients(count):
+    """소켓 없는 가짜 클라이언트 count명을 등록."""
+    server.clients.clear()
+    for i in range(count):
+        nick = 'user{}'.format(i)
+        server.clients[nick] = server.ClientInfo(None, ('127.0.0.1', i), nick)
+
+
+def drain_all():
+    for info in server.clients.values():
+        info.outbox.drain()
+
+
+def measure(func, rounds):
+    """브로드캐스트 1회당 (CPU 초, 할당 바이트) 반환."""
+    # CPU 시간 (tracemalloc 없이 측정)
+    cpu = 0.0
+    for _ in range(rounds):
+        start = time.process_time()
+        func(MESSAGE)
+        cpu += time.process_time() - start
+        drain_all()
+
+    # 할당량: 대기열에 남아 있는(=공유되지 않은) 바이트까지 포함하도록 비우기 전에 측정
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    func(MESSAGE)
+    allocated = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    drain_all()
+    return cpu / rounds, allocated
+
+
+def main():
+    parser = argparse.ArgumentParser(description='브로드캐스트 팬아웃 벤치마크')
+    parser.add_argument('--rounds', type=int, default=20, help='측정 반복 횟수')
+    args = parser.parse_args()
+
+    print('{:>8} {:>12} {:>14} {:>16}'.format('수신자', '방식', 'CPU(ms)/회', '할당(bytes)/회'))
+    for count in (1000, 10000):
+        setup_clients(count)
+        for name, func in (('per-client', per_client_broadcast),
+                           ('encode-once', server.broadcast)):
+            cpu, allocated = measure(func, args.rounds)
+            print('{:>8} {:>12} {:>14.3f} {:>16,}'.format(count, name, cpu * 1000, allocated))
+    server.clients.clear()
+
+
+if __name__ == '__main__':
+    main()
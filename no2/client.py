@@ -6,28 +6,43 @@
 - 표준 입력으로 메시지 입력
 - '/종료'로 연결 종료
 - '/귓속말 닉네임 메시지' 형식으로 귓속말 사용 가능
+- 메시지 프레이밍은 서버와 같은 framing.py 사용 ('--framing'으로 서버와 맞춤)
+- 서버의 연결 확인('/ping')에는 자동으로 '/pong' 응답
 """
 
+import argparse
 import socket
 import threading
 import sys
 
+from framing import LINE, MODES, RECV_BUFSIZE, make_framer
+
 SERVER_HOST = '127.0.0.1'
 SERVER_PORT = 5000
 ENCODING = 'utf-8'
 ADDR = (SERVER_HOST, SERVER_PORT)
+# 서버의 연결 확인 메시지와 응답 (server.py와 같은 값)
+PING_MESSAGE = '/ping'
+PONG_MESSAGE = '/pong'
 
 
-def receive_loop(sock):
+def receive_loop(sock, framer):
     """서버로부터 오는 메시지를 계속 출력."""
     try:
         while True:
-            data = sock.recv(1024)
+            data = sock.recv(RECV_BUFSIZE)
             if not data:
                 print('서버와의 연결이 종료되었습니다.')
                 break
-            sys.stdout.write(data.decode(ENCODING))
-            sys.stdout.flush()
+            # recv 한 번에 들어온 메시지를 모아서 한 번에 출력
+            messages = framer.feed(data)
+            # 서버의 연결 확인('/ping')에는 화면에 표시하지 않고 바로 응답
+            if PING_MESSAGE in messages:
+                messages = [m for m in messages if m != PING_MESSAGE]
+                sock.sendall(framer.encode(PONG_MESSAGE))
+            if messages:
+                sys.stdout.write(''.join(message + '\n' for message in messages))
+                sys.stdout.flush()
     except Exception:
         pass
     finally:
@@ -40,6 +55,12 @@ def receive_loop(sock):
 
 
 def main():
+    parser = argparse.ArgumentParser(description='TCP 채팅 클라이언트')
+    parser.add_argument('--framing', choices=MODES, default=LINE,
+                        help='메시지 프레이밍 (서버와 같게): line / length')
+    args = parser.parse_args()
+    framer = make_framer(args.framing)
+
     sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
     try:
         sock.connect(ADDR)
@@ -48,7 +69,7 @@ def main():
         return
 
     # 서버에서 오는 메시지 수신 스레드 시작
-    thread = threading.Thread(target=receive_loop, args=(sock,), daemon=True)
+    thread = threading.Thread(target=receive_loop, args=(sock, make_framer(args.framing)), daemon=True)
     thread.start()
 
     try:
@@ -57,13 +78,13 @@ def main():
             line = sys.stdin.readline()
             if not line:
                 break
-            # 줄바꿈 포함 전달
-            sock.sendall(line.encode(ENCODING))
+            # 프레임 단위로 전달 (줄바꿈은 프레이머가 처리)
+            sock.sendall(framer.encode(line.rstrip('\n')))
             if line.strip() == '/종료':
                 break
     except KeyboardInterrupt:
         try:
-            sock.sendall('/종료\n'.encode(ENCODING))
+            sock.sendall(framer.encode('/종료'))
         except Exception:
             pass
     finally:
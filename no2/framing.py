@@ -0,0 +1,145 @@
+# coding: utf-8
+"""
+채팅 서버/클라이언트 공용 메시지 프레이밍
+- line  : 메시지 하나 = UTF-8 한 줄 ('\\n'으로 끝남). telnet 등으로도 접속 가능
+- length: 메시지 하나 = 4바이트 빅엔디안 길이 + UTF-8 본문 (메시지 안에 줄바꿈 허용)
+- recv로 받은 바이트를 버퍼에 모았다가 완성된 메시지만 잘라 디코딩하므로
+  한글처럼 여러 바이트인 문자가 recv 경계에서 잘려도 깨지지 않음
+- recv 한 번에 들어온 여러 메시지를 한꺼번에 파싱하고,
+  보낼 메시지 여러 개는 send_buffers()로 sendmsg 한 번에 보냄 (scatter/gather)
+- 브로드캐스트는 encode_shared()로 한 번만 인코딩하고 모든 수신자가 같은 버퍼를 공유
+"""
+
+import os
+import struct
+
+
+ENCODING = 'utf-8'
+LINE = 'line'
+LENGTH = 'length'
+MODES = (LINE, LENGTH)
+
+# recv 한 번에 읽을 크기. 채팅이 몰릴 때 시스템 콜 횟수를 줄이기 위해 크게 잡음
+RECV_BUFSIZE = 65536
+# 메시지 하나의 최대 크기. 끝없이 버퍼만 쌓는 연결을 막기 위한 제한
+MAX_MESSAGE_SIZE = 64 * 1024
+
+_HEADER = struct.Struct('!I')
+
+# sendmsg 한 번에 넘길 수 있는 버퍼 개수
+try:
+    IOV_MAX = os.sysconf('SC_IOV_MAX')
+except (AttributeError, ValueError, OSError):
+    IOV_MAX = 1024
+
+
+class FrameError(Exception):
+    """프레임 형식이 잘못되었거나 메시지가 너무 큼."""
+
+
+class LineFramer:
+    """줄바꿈 단위 프레이밍."""
+    mode = LINE
+
+    def __init__(self, max_size=MAX_MESSAGE_SIZE):
+        self.buffer = bytearray()
+        self.max_size = max_size
+
+    def feed(self, data):
+        """받은 바이트를 넣고 완성된 메시지(str) 리스트를 반환."""
+        buf = self.buffer
+        buf += data
+        end = buf.rfind(b'\n')
+        if end < 0:
+            if len(buf) > self.max_size:
+                raise FrameError('메시지가 너무 깁니다.')
+            return []
+        # '\n'(0x0A)은 UTF-8 멀티바이트 문자 안에 나타나지 않으므로 바이트 단위로 잘라도 안전
+        chunk = bytes(buf[:end])
+        del buf[:end + 1]
+        return [line.decode(ENCODING, 'replace').rstrip('\r') for line in chunk.split(b'\n')]
+
+    def encode(self, message):
+        """메시지 하나를 전송용 바이트로 변환."""
+        return (message + '\n').encode(ENCODING)
+
+
+class LengthFramer:
+    """길이 접두사(4바이트) 프레이밍."""
+    mode = LENGTH
+
+    def __init__(self, max_size=MAX_MESSAGE_SIZE):
+        self.buffer = bytearray()
+        self.max_size = max_size
+
+    def feed(self, data):
+        """받은 바이트를 넣고 완성된 메시지(str) 리스트를 반환."""
+        buf = self.buffer
+        buf += data
+        messages = []
+        pos = 0
+        size = len(buf)
+        while size - pos >= _HEADER.size:
+            (length,) = _HEADER.unpack_from(buf, pos)
+            if length > self.max_size:
+                raise FrameError('메시지가 너무 깁니다.')
+            start = pos + _HEADER.size
+            if size - start < length:
+                break
+            messages.append(bytes(buf[start:start + length]).decode(ENCODING, 'replace'))
+            pos = start + length
+        if pos:
+            del buf[:pos]
+        return messages
+
+    def encode(self, message):
+        """메시지 하나를 전송용 바이트로 변환."""
+        body = message.encode(ENCODING)
+        return _HEADER.pack(len(body)) + body
+
+
+def make_framer(mode=LINE):
+    """모드 이름으로 프레이머 생성."""
+    if mode == LINE:
+        return LineFramer()
+    if mode == LENGTH:
+        return LengthFramer()
+    raise ValueError('알 수 없는 프레이밍 모드: {}'.format(mode))
+
+
+_ENCODERS = {}
+
+
+def encode_shared(message, mode=LINE):
+    """
+    메시지를 한 번만 인코딩해 읽기 전용 memoryview로 반환.
+    여러 수신자의 송신 대기열이 같은 버퍼를 복사 없이 공유하기 위해 사용.
+    """
+    framer = _ENCODERS.get(mode)
+    if framer is None:
+        framer = _ENCODERS[mode] = make_framer(mode)
+    return memoryview(framer.encode(message))
+
+
+def send_buffers(sock, buffers):
+    """
+    여러 버퍼를 sendmsg(scatter/gather)로 이어 붙이지 않고 전송.
+    일부만 전송되면 남은 부분(memoryview 슬라이스, 복사 없음)부터 다시 보냄.
+    sendmsg가 없는 플랫폼에서는 합쳐서 sendall.
+    """
+    if not hasattr(sock, 'sendmsg'):
+        sock.sendall(b''.join(buffers))
+        return
+    buffers = list(buffers)
+    start = 0
+    while start < len(buffers):
+        sent = sock.sendmsg(buffers[start:start + IOV_MAX])
+        # 전송된 바이트만큼 버퍼 목록을 앞으로 진행
+        while sent:
+            size = len(buffers[start])
+            if sent >= size:
+                sent -= size
+                start += 1
+            else:
+                buffers[start] = memoryview(buffers[start])[sent:]
+                sent = 0
@@ -0,0 +1,73 @@
+# coding: utf-8
+"""
+지연 시간 히스토그램
+- 로그 스케일 버킷에 개수만 세므로 샘플이 수백만 개여도 메모리가 일정
+- 백분위수(p50/p95/p99)는 버킷 경계값으로 근사 (상대 오차 약 growth - 1)
+"""
+
+import math
+
+
+class Histogram:
+    """로그 스케일 버킷 히스토그램 (단위: 초)."""
+    def __init__(self, min_value=1e-6, max_value=100.0, growth=1.05):
+        self.min_value = min_value
+        self.growth = growth
+        self._log_growth = math.log(growth)
+        self.size = int(math.log(max_value / min_value) / self._log_growth) + 2
+        self.counts = [0] * self.size
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def _index(self, value):
+        if value <= self.min_value:
+            return 0
+        index = int(math.log(value / self.min_value) / self._log_growth) + 1
+        return min(index, self.size - 1)
+
+    def add(self, value):
+        """값 하나 기록."""
+        self.counts[self._index(value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other):
+        """같은 설정의 다른 히스토그램 합치기."""
+        for i, n in enumerate(other.counts):
+            self.counts[i] += n
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def upper_bound(self, index):
+        """버킷의 상한값."""
+        return self.min_value * self.growth ** index
+
+    def percentile(self, p):
+        """p(0~100) 백분위수 근사값. 샘플이 없으면 0."""
+        if not self.count:
+            return 0.0
+        rank = self.count * p / 100.0
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank and n:
+                return min(self.upper_bound(i), self.max)
+        return self.max
+
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def summary(self):
+        """보고용 요약 dict (초 단위)."""
+        return {
+            'count': self.count,
+            'mean': self.mean(),
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+            'p99': self.percentile(99),
+            'max': self.max,
+        }
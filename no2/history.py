@@ -0,0 +1,349 @@
+# coding: utf-8
+"""
+채팅 기록 저장소
+- 메모리: 방마다 최근 N개 메시지를 링 버퍼(deque maxlen)로 보관 → 입장 시 바로 재전송
+- 디스크: 추가 전용(append-only) 세그먼트 로그 (segment-000001.log, ...)
+  - 레코드 = 헤더(본문 길이 4B, CRC32 4B, 방 이름 길이 2B) + 방 이름 + 메시지 (UTF-8)
+  - 세그먼트가 segment_bytes를 넘으면 새 세그먼트로 교체 (rotation)
+  - 세그먼트가 max_segments개를 넘으면 닫힌 세그먼트들을 방마다 최근 retain_per_room개만
+    남긴 하나의 세그먼트로 다시 써서 합침 (compaction)
+    합친 파일을 다 쓴 뒤 '.merged'로 이름을 바꾸는 것이 완료 표시. 그 뒤에 죽어도 재시작할 때
+    이전 세그먼트를 지우고 교체를 마저 하므로 같은 레코드가 두 번 복구되지 않음
+  - 방마다 레코드 위치(세그먼트 번호, 오프셋) 색인을 메모리에 두어
+    '/history N'은 로그 전체를 훑지 않고 필요한 레코드만 mmap으로 읽음
+- 쓰기는 브로드캐스트 경로에서 대기열에 넣기만 하고, 백그라운드 스레드가
+  flush_interval마다 모아서 write 한 번 + fsync 한 번으로 기록 (메시지당 fsync 없음)
+- 서버가 재시작되면 세그먼트를 순서대로 읽어 색인과 링 버퍼를 복구
+"""
+
+import mmap
+import os
+import struct
+import threading
+import zlib
+from array import array
+from collections import deque
+
+
+ENCODING = 'utf-8'
+_HEADER = struct.Struct('!IIH')
+_SEGMENT_FORMAT = 'segment-{:06d}.log'
+# compaction 중인 파일 (다 쓰기 전. 재시작하면 버림)과 다 쓴 파일 (재시작하면 교체를 마저 함)
+_MERGING_SUFFIX = '.merging'
+_MERGED_SUFFIX = '.merged'
+# 색인 한 항목 = (세그먼트 번호 << 40) | 오프셋  → array('Q')에 8바이트로 저장
+_OFFSET_BITS = 40
+_OFFSET_MASK = (1 << _OFFSET_BITS) - 1
+
+
+def _pack_position(segment_id, offset):
+    return (segment_id << _OFFSET_BITS) | offset
+
+
+def _unpack_position(position):
+    return position >> _OFFSET_BITS, position & _OFFSET_MASK
+
+
+def encode_record(room, message):
+    """방 이름과 메시지를 레코드 바이트로 변환."""
+    room_bytes = room.encode(ENCODING)
+    payload = room_bytes + message.encode(ENCODING)
+    return _HEADER.pack(len(payload), zlib.crc32(payload), len(room_bytes)) + payload
+
+
+def iter_records(data):
+    """
+    세그먼트 바이트에서 (오프셋, 방, 메시지)를 차례로 꺼냄.
+    마지막 레코드가 잘렸거나(쓰는 중 종료) CRC가 맞지 않으면 거기서 멈춤.
+    """
+    offset = 0
+    size = len(data)
+    while size - offset >= _HEADER.size:
+        length, crc, room_len = _HEADER.unpack_from(data, offset)
+        start = offset + _HEADER.size
+        end = start + length
+        if end > size or room_len > length:
+            return
+        payload = bytes(data[start:end])
+        if zlib.crc32(payload) != crc:
+            return
+        yield offset, payload[:room_len].decode(ENCODING), payload[room_len:].decode(ENCODING)
+        offset = end
+
+
+class MessageHistory:
+    """방별 최근 메시지 링 버퍼 + 디스크 세그먼트 로그."""
+    def __init__(self, directory, ring_size=50, segment_bytes=4 * 1024 * 1024,
+                 max_segments=8, retain_per_room=1000, flush_interval=0.2, fsync=True):
+        self.directory = directory
+        self.ring_size = ring_size
+        self.segment_bytes = segment_bytes
+        self.max_segments = max_segments
+        self.retain_per_room = retain_per_room
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+
+        self.lock = threading.Lock()
+        self.rings = {}      # 방 -> deque(최근 메시지, maxlen=ring_size)
+        self.index = {}      # 방 -> array('Q') 디스크에 기록된 레코드 위치 (오래된 순)
+        self.pending = []    # 아직 디스크에 쓰지 않은 (방, 메시지)
+        self.unflushed = {}  # 방 -> pending 안의 개수
+        self.maps = {}       # 세그먼트 번호 -> mmap (읽기용)
+        self.segments = []   # 디스크의 세그먼트 번호 (오름차순)
+
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+        self._open_active()
+
+        self._stop = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop, daemon=True)
+        self._flusher.start()
+
+    # --- 기록 ---
+
+    def append(self, room, message):
+        """메시지 기록. 링 버퍼에 넣고 디스크 쓰기는 대기열에만 넣음 (블로킹 없음)."""
+        with self.lock:
+            ring = self.rings.get(room)
+            if ring is None:
+                ring = self.rings[room] = deque(maxlen=self.ring_size)
+            ring.append(message)
+            self.pending.append((room, message))
+            self.unflushed[room] = self.unflushed.get(room, 0) + 1
+
+    def recent(self, room, count):
+        """방의 최근 메시지 count개 (오래된 순). 링 버퍼에 없는 부분만 디스크에서 읽음."""
+        if count <= 0:
+            return []
+        with self.lock:
+            ring = list(self.rings.get(room, ()))
+            if count <= len(ring):
+                return ring[-count:]
+            positions = self.index.get(room, ())
+            # 전체 = 디스크 기록분 + 대기 중인 것. 링 버퍼는 그중 마지막 len(ring)개
+            flushed = len(positions)
+            total = flushed + self.unflushed.get(room, 0)
+            end = total - len(ring)
+            start = max(0, total - count)
+            # mmap은 flush/compaction이 다시 매핑하거나 닫을 수 있으므로 락 안에서 읽음
+            older = [self._read(position)[1] for position in positions[start:min(end, flushed)]]
+            if end > flushed:
+                # 아직 쓰지 않았지만 링 버퍼에서 밀려난 메시지는 대기열에서
+                waiting = [message for pending_room, message in self.pending if pending_room == room]
+                older.extend(waiting[max(start, flushed) - flushed:end - flushed])
+        return older + ring
+
+    def _read(self, position, maps=None):
+        """색인 위치의 레코드 하나를 mmap으로 읽어 (방, 메시지) 반환."""
+        segment_id, offset = _unpack_position(position)
+        data = self._mapping(segment_id, offset + _HEADER.size, maps)
+        length, _crc, room_len = _HEADER.unpack_from(data, offset)
+        start = offset + _HEADER.size
+        data = self._mapping(segment_id, start + length, maps)
+        payload = data[start:start + length]
+        return payload[:room_len].decode(ENCODING), payload[room_len:].decode(ENCODING)
+
+    def _mapping(self, segment_id, needed, maps=None):
+        """세그먼트의 mmap. 쓰는 중인 세그먼트가 커졌으면 다시 매핑."""
+        if maps is None:
+            maps = self.maps
+        mapped = maps.get(segment_id)
+        if mapped is None or len(mapped) < needed:
+            if mapped is not None:
+                mapped.close()
+            with open(self._path(segment_id), 'rb') as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            maps[segment_id] = mapped
+        return mapped
+
+    # --- 디스크 ---
+
+    def _path(self, segment_id):
+        return os.path.join(self.directory, _SEGMENT_FORMAT.format(segment_id))
+
+    def _segment_ids(self, suffix=''):
+        """디렉터리에 있는 세그먼트(suffix가 있으면 그 compaction 파일)의 번호 (오름차순)."""
+        suffix = '.log' + suffix
+        ids = []
+        for name in os.listdir(self.directory):
+            if name.startswith('segment-') and name.endswith(suffix):
+                number = name[len('segment-'):-len(suffix)]
+                if number.isdigit():
+                    ids.append(int(number))
+        return sorted(ids)
+
+    def _finish_merge(self, target_id):
+        """
+        다 쓴 합친 세그먼트로 교체: target_id 이하의 세그먼트를 지우고 '.merged'를 제자리로.
+        중간에 죽어도 재시작할 때 다시 호출하면 같은 결과.
+        """
+        for segment_id in self._segment_ids():
+            if segment_id < target_id:
+                os.remove(self._path(segment_id))
+        os.replace(self._path(target_id) + _MERGED_SUFFIX, self._path(target_id))
+
+    def _sync_directory(self):
+        """이름 바꾸기/삭제가 디스크에 남도록 디렉터리를 fsync (지원하지 않으면 무시)."""
+        if not self.fsync:
+            return
+        try:
+            fd = os.open(self.directory, os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+    def _load(self):
+        """기존 세그먼트를 순서대로 읽어 색인과 링 버퍼 복구."""
+        # 이전 실행이 compaction 도중에 끝났으면 정리: 다 쓰지 못한 파일은 버리고 다 쓴 파일은 교체
+        for segment_id in self._segment_ids(_MERGING_SUFFIX):
+            os.remove(self._path(segment_id) + _MERGING_SUFFIX)
+        for segment_id in self._segment_ids(_MERGED_SUFFIX):
+            self._finish_merge(segment_id)
+        for segment_id in self._segment_ids():
+            self.segments.append(segment_id)
+            with open(self._path(segment_id), 'rb') as f:
+                data = f.read()
+            valid_end = 0
+            for offset, room, message in iter_records(data):
+                self._index_record(room, segment_id, offset)
+                ring = self.rings.get(room)
+                if ring is None:
+                    ring = self.rings[room] = deque(maxlen=self.ring_size)
+                ring.append(message)
+                valid_end = offset + _HEADER.size + _HEADER.unpack_from(data, offset)[0]
+            if valid_end < len(data):
+                # 쓰다가 끊긴 꼬리는 잘라냄
+                with open(self._path(segment_id), 'r+b') as f:
+                    f.truncate(valid_end)
+
+    def _index_record(self, room, segment_id, offset):
+        positions = self.index.get(room)
+        if positions is None:
+            positions = self.index[room] = array('Q')
+        positions.append(_pack_position(segment_id, offset))
+
+    def _open_active(self):
+        """쓰기용 세그먼트 열기 (마지막 세그먼트가 있으면 이어서 씀)."""
+        if not self.segments:
+            self.segments.append(1)
+        self.active_id = self.segments[-1]
+        self.active = open(self._path(self.active_id), 'ab')
+        self.active_size = self.active.tell()
+
+    def _rotate(self):
+        self.active.close()
+        self.active_id += 1
+        self.segments.append(self.active_id)
+        self.active = open(self._path(self.active_id), 'ab')
+        self.active_size = 0
+
+    def flush(self):
+        """대기 중인 메시지를 한 번에 기록 (write 1회 + fsync 1회)."""
+        with self.lock:
+            batch = self.pending
+            if not batch:
+                return
+            self.pending = []
+            self.unflushed = {}
+            chunks = []
+            offset = self.active_size
+            for room, message in batch:
+                record = encode_record(room, message)
+                self._index_record(room, self.active_id, offset)
+                chunks.append(record)
+                offset += len(record)
+            self.active_size = offset
+            # 색인과 파일 내용이 항상 함께 보이도록 write까지는 락 안에서 (페이지 캐시까지만)
+            self.active.write(b''.join(chunks))
+            self.active.flush()
+            active = self.active
+        # 오래 걸리는 fsync는 락 밖에서. 채팅 경로의 append()를 막지 않음
+        if self.fsync:
+            os.fsync(active.fileno())
+        if self.active_size >= self.segment_bytes:
+            with self.lock:
+                self._rotate()
+        if len(self.segments) > self.max_segments:
+            self._compact()
+
+    def _compact(self):
+        """닫힌 세그먼트들을 방마다 최근 retain_per_room개만 남긴 세그먼트 하나로 합침."""
+        with self.lock:
+            sealed = [s for s in self.segments if s != self.active_id]
+            if len(sealed) < 2:
+                return
+            sealed_set = set(sealed)
+            keep = {}
+            for room, positions in self.index.items():
+                old = [p for p in positions if _unpack_position(p)[0] in sealed_set]
+                keep[room] = old[-self.retain_per_room:]
+        # 합친 세그먼트는 가장 새 닫힌 세그먼트 번호로 씀 (그 번호 이하를 모두 대신함).
+        # 닫힌 세그먼트는 더 이상 바뀌지 않으므로 별도 mmap으로 락 없이 읽음
+        target_id = sealed[-1]
+        merging_path = self._path(target_id) + _MERGING_SUFFIX
+        new_positions = {}
+        private_maps = {}
+        try:
+            with open(merging_path, 'wb') as out:
+                offset = 0
+                for room, positions in keep.items():
+                    for position in positions:
+                        record = encode_record(*self._read(position, private_maps))
+                        out.write(record)
+                        new_positions.setdefault(room, []).append(
+                            _pack_position(target_id, offset))
+                        offset += len(record)
+                out.flush()
+                os.fsync(out.fileno())
+        except BaseException:
+            try:
+                os.remove(merging_path)
+            except OSError:
+                pass
+            raise
+        finally:
+            for mapped in private_maps.values():
+                mapped.close()
+        # 완료 표시. 이후에는 재시작해도 이 파일이 닫힌 세그먼트들을 대신함
+        os.replace(merging_path, self._path(target_id) + _MERGED_SUFFIX)
+        self._sync_directory()
+        with self.lock:
+            for segment_id in sealed:
+                mapped = self.maps.pop(segment_id, None)
+                if mapped is not None:
+                    mapped.close()
+            self._finish_merge(target_id)
+            self._sync_directory()
+            self.segments = [target_id] + [s for s in self.segments if s not in sealed_set]
+            for room in list(self.index):
+                current = [p for p in self.index[room]
+                           if _unpack_position(p)[0] not in sealed_set]
+                merged = array('Q', new_positions.get(room, []))
+                merged.extend(current)
+                if merged:
+                    self.index[room] = merged
+                else:
+                    del self.index[room]
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except OSError:
+                # 디스크 오류가 나도 채팅은 계속 (기록만 실패)
+                pass
+
+    def close(self):
+        """남은 메시지를 기록하고 파일 닫기."""
+        self._stop.set()
+        self._flusher.join()
+        self.flush()
+        self.active.close()
+        for mapped in self.maps.values():
+            mapped.close()
+        self.maps.clear()
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+# coding: utf-8
+"""
+채팅 서버 부하 생성기 / 지연 시간 벤치마크 (화면 입력 없는 클라이언트)
+- client.py와 같은 프로토콜(framing.py)로 가상 사용자 수천 명을 접속시킴
+- 설정: 접속 속도, 사용자당 메시지 속도, 귓속말 비율, 느린 수신자 비율
+- 메시지 본문에 보낸 시각을 넣고, 받은 쪽에서 차이를 재서 팬아웃 지연을 측정
+- 보고: 접속 시간, 종단 간 지연 p50/p95/p99, 처리량, 서버 RSS
+- 서버 모드(thread / async / sharded)를 바꿔 가며 같은 조건으로 비교하는 용도
+
+실행 예:
+  python server.py --mode async &
+  python loadgen.py --users 2000 --join-rate 500 --msg-rate 0.2 --duration 30 \\
+      --server-pid $! --json result.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import time
+
+from framing import LINE, MODES, RECV_BUFSIZE, make_framer
+from histogram import Histogram
+from server import PING_MESSAGE, PONG_MESSAGE, raise_nofile_limit
+
+
+WELCOME_PREFIX = '서버> 환영합니다, '
+# 부하 메시지 형식: 'LG <보낸 시각(ns)>'
+STAMP_RE = re.compile(r'LG (\d+)')
+
+
+class Stats:
+    """가상 사용자 전체가 공유하는 측정값."""
+    def __init__(self):
+        self.connect = Histogram()
+        self.latency = Histogram()
+        self.whisper_latency = Histogram()
+        self.connected = 0
+        self.errors = 0
+        self.sent = 0
+        self.received = 0
+        self.bytes_received = 0
+
+
+def read_rss_kb(pid):
+    """pid와 그 자식 프로세스(샤드 워커)의 RSS 합계(KB). 읽을 수 없으면 None."""
+    total = 0
+    pending = [pid]
+    try:
+        while pending:
+            current = pending.pop()
+            with open('/proc/{}/status'.format(current)) as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        total += int(line.split()[1])
+                        break
+            children_path = '/proc/{}/task/{}/children'.format(current, current)
+            if os.path.exists(children_path):
+                with open(children_path) as f:
+                    pending.extend(int(child) for child in f.read().split())
+    except (OSError, ValueError):
+        return None
+    return total
+
+
+class SimulatedUser:
+    """가상 사용자 한 명."""
+    def __init__(self, index, args, stats, nicknames):
+        self.index = index
+        self.args = args
+        self.stats = stats
+        self.nicknames = nicknames  # 접속 완료된 닉네임 목록 (귓속말 대상)
+        self.slow = random.random() < args.slow_fraction
+        self.framer = make_framer(args.framing)
+        self.nickname = None
+
+    async def connect(self):
+        """접속하고 닉네임을 등록한 뒤 환영 메시지까지의 시간을 기록."""
+        start = time.perf_counter()
+        reader, writer = await asyncio.open_connection(self.args.host, self.args.port)
+        writer.write(self.framer.encode('lg{}'.format(self.index)))
+        while self.nickname is None:
+            data = await reader.read(RECV_BUFSIZE)
+            if not data:
+                raise ConnectionError('환영 메시지 전에 연결이 끊겼습니다.')
+            for message in self.framer.feed(data):
+                if message.startswith(WELCOME_PREFIX):
+                    self.nickname = message[len(WELCOME_PREFIX):].split(' 님.')[0]
+        self.stats.connect.add(time.perf_counter() - start)
+        self.stats.connected += 1
+        self.nicknames.append(self.nickname)
+        return reader, writer
+
+    async def receive(self, reader, writer):
+        """받은 메시지에서 보낸 시각을 찾아 지연 시간 기록. 느린 수신자는 읽는 사이에 쉼."""
+        stats = self.stats
+        while True:
+            data = await reader.read(RECV_BUFSIZE)
+            if not data:
+                return
+            now = time.perf_counter_ns()
+            stats.bytes_received += len(data)
+            for message in self.framer.feed(data):
+                if message == PING_MESSAGE:
+                    writer.write(self.framer.encode(PONG_MESSAGE))
+                    continue
+                match = STAMP_RE.search(message)
+                if not match:
+                    continue
+                stats.received += 1
+                elapsed = (now - int(match.group(1))) / 1e9
+                if '(귓속말)> ' in message:
+                    stats.whisper_latency.add(elapsed)
+                else:
+                    stats.latency.add(elapsed)
+            if self.slow:
+                await asyncio.sleep(self.args.slow_delay)
+
+    async def send_loop(self, writer, end_time):
+        """평균 msg_rate(개/초)의 포아송 간격으로 일반 메시지 또는 귓속말 전송."""
+        args = self.args
+        while True:
+            delay = random.expovariate(args.msg_rate) if args.msg_rate > 0 else end_time
+            if time.monotonic() + delay >= end_time:
+                await asyncio.sleep(max(0.0, end_time - time.monotonic()))
+                return
+            await asyncio.sleep(delay)
+            body = 'LG {}'.format(time.perf_counter_ns())
+            if len(self.nicknames) > 1 and random.random() < args.whisper_ratio:
+                target = random.choice(self.nicknames)
+                message = '/귓속말 {} {}'.format(target, body)
+            else:
+                message = body
+            writer.write(self.framer.encode(message))
+            self.stats.sent += 1
+
+    async def run(self, end_time):
+        try:
+            reader, writer = await self.connect()
+        except (OSError, ConnectionError):
+            self.stats.errors += 1
+            return
+        receiver = asyncio.get_running_loop().create_task(self.receive(reader, writer))
+        try:
+            await self.send_loop(writer, end_time)
+            writer.write(self.framer.encode('/종료'))
+            await writer.drain()
+        except OSError:
+            self.stats.errors += 1
+        finally:
+            receiver.cancel()
+            writer.close()
+
+
+async def run_load(args):
+    stats = Stats()
+    nicknames = []
+    ramp = args.users / args.join_rate if args.join_rate > 0 else 0.0
+    end_time = time.monotonic() + ramp + args.duration
+    rss_samples = []
+
+    async def sample_rss():
+        while True:
+            rss = read_rss_kb(args.server_pid)
+            if rss is not None:
+                rss_samples.append(rss)
+            await asyncio.sleep(1.0)
+
+    sampler = None
+    if args.server_pid:
+        sampler = asyncio.get_running_loop().create_task(sample_rss())
+
+    start = time.monotonic()
+    tasks = []
+    for index in range(args.users):
+        user = SimulatedUser(index, args, stats, nicknames)
+        tasks.append(asyncio.get_running_loop().create_task(user.run(end_time)))
+        if args.join_rate > 0:
+            await asyncio.sleep(1.0 / args.join_rate)
+    await asyncio.gather(*tasks)
+    elapsed = time.monotonic() - start
+    if sampler is not None:
+        sampler.cancel()
+    return stats, elapsed, rss_samples
+
+
+def format_latency(summary):
+    return 'p50 {:.2f}ms  p95 {:.2f}ms  p99 {:.2f}ms  max {:.2f}ms  (n={})'.format(
+        summary['p50'] * 1000, summary['p95'] * 1000, summary['p99'] * 1000,
+        summary['max'] * 1000, summary['count'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='채팅 서버 부하 생성기')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--framing', choices=MODES, default=LINE, help='서버와 같은 프레이밍')
+    parser.add_argument('--users', type=int, default=1000, help='가상 사용자 수')
+    parser.add_argument('--join-rate', type=float, default=200.0, help='초당 접속 수')
+    parser.add_argument('--msg-rate', type=float, default=0.5, help='사용자당 초당 메시지 수')
+    parser.add_argument('--whisper-ratio', type=float, default=0.1, help='귓속말 비율 (0~1)')
+    parser.add_argument('--slow-fraction', type=float, default=0.0,
+                        help='느린 수신자 비율 (0~1)')
+    parser.add_argument('--slow-delay', type=float, default=0.5,
+                        help='느린 수신자가 읽기 사이에 쉬는 시간(초)')
+    parser.add_argument('--duration', type=float, default=20.0,
+                        help='모든 사용자 접속 후 부하를 유지할 시간(초)')
+    parser.add_argument('--server-pid', type=int, default=0, help='RSS를 측정할 서버 pid')
+    parser.add_argument('--json', help='결과를 저장할 JSON 파일 경로')
+    args = parser.parse_args()
+
+    raise_nofile_limit()
+    stats, elapsed, rss_samples = asyncio.run(run_load(args))
+
+    result = {
+        'config': vars(args),
+        'elapsed_sec': elapsed,
+        'connected': stats.connected,
+        'errors': stats.errors,
+        'sent': stats.sent,
+        'received': stats.received,
+        'sent_per_sec': stats.sent / elapsed,
+        'received_per_sec': stats.received / elapsed,
+        'bytes_received': stats.bytes_received,
+        'connect': stats.connect.summary(),
+        'latency': stats.latency.summary(),
+        'whisper_latency': stats.whisper_latency.summary(),
+        'server_rss_kb_peak': max(rss_samples) if rss_samples else None,
+        'server_rss_kb_last': rss_samples[-1] if rss_samples else None,
+    }
+
+    print('접속 성공 {} / 실패 {}  (총 {:.1f}초)'.format(stats.connected, stats.errors, elapsed))
+    print('접속 시간    : ' + format_latency(result['connect']))
+    print('팬아웃 지연  : ' + format_latency(result['latency']))
+    print('귓속말 지연  : ' + format_latency(result['whisper_latency']))
+    print('처리량       : 전송 {:.0f}개/초, 수신 {:.0f}개/초'.format(
+        result['sent_per_sec'], result['received_per_sec']))
+    if rss_samples:
+        print('서버 RSS     : 최대 {:,} KB, 마지막 {:,} KB'.format(
+            result['server_rss_kb_peak'], result['server_rss_kb_last']))
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
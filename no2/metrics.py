@@ -0,0 +1,181 @@
+# coding: utf-8
+"""
+채팅 서버 계측
+- 카운터: 접속/종료, 받은/보낸 메시지와 바이트, 전송 실패, 귓속말 실패, 버린 메시지 등
+- 지연 시간 히스토그램 (histogram.py): 접속 처리, 메시지 처리, 브로드캐스트, 귓속말, 락 대기
+- 게이지: 접속자 수, 방 수, 송신 대기열 길이처럼 그때그때 읽는 값 (읽을 때만 계산)
+- 조회: 관리자 전용 '/stats' 채팅 명령, 선택적으로 127.0.0.1의 작은 HTTP 엔드포인트
+  (Prometheus 텍스트 형식, 'GET /metrics')
+- 기록 한 번은 락 한 번 + 정수 덧셈 정도라 운영 중에 켜 두어도 됨.
+  enabled = False면 모든 기록 함수가 바로 반환
+"""
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from histogram import Histogram
+
+
+PREFIX = 'chat_'
+
+# 계측 on/off (server.py --no-metrics)
+enabled = True
+
+_lock = threading.Lock()
+_counters = {}    # 이름 -> 정수
+_histograms = {}  # 이름 -> Histogram (단위: 초)
+_gauges = {}      # 이름 -> 값을 돌려주는 함수
+_help = {}        # 이름 -> 설명 (Prometheus HELP)
+
+
+def describe(name, text):
+    """지표 설명 등록 (Prometheus HELP 줄과 '/stats' 출력에 사용)."""
+    _help[name] = text
+
+
+def inc(name, amount=1):
+    """카운터 증가."""
+    if not enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + amount
+
+
+def timer():
+    """경과 시간 측정 시작. 계측이 꺼져 있으면 None (observe_since가 무시)."""
+    return time.perf_counter() if enabled else None
+
+
+def observe(name, seconds):
+    """히스토그램에 값 하나 기록."""
+    if not enabled:
+        return
+    with _lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = _histograms[name] = Histogram()
+        histogram.add(seconds)
+
+
+def observe_since(name, start):
+    """timer()로 시작한 시각부터의 경과 시간 기록."""
+    if start is not None:
+        observe(name, time.perf_counter() - start)
+
+
+def gauge(name, func, text=None):
+    """조회할 때 func()를 호출해 값을 읽는 게이지 등록."""
+    _gauges[name] = func
+    if text:
+        describe(name, text)
+
+
+class TimedLock:
+    """
+    대기 시간을 재는 락 (with 문 전용).
+    먼저 기다리지 않고 잡아 보고, 다른 스레드가 잡고 있을 때만 시간을 재므로
+    경합이 없으면 추가 비용은 acquire 한 번뿐.
+    """
+    def __init__(self, name):
+        self.name = name
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        if self._lock.acquire(False):
+            return self
+        start = time.perf_counter()
+        self._lock.acquire()
+        if enabled:
+            observe(self.name, time.perf_counter() - start)
+        return self
+
+    def __exit__(self, *exc):
+        self._lock.release()
+
+
+def snapshot():
+    """현재 값 모음: (카운터 dict, 게이지 dict, 히스토그램 요약 dict)."""
+    with _lock:
+        counters = dict(_counters)
+        histograms = {name: h.summary() for name, h in _histograms.items()}
+    gauges = {}
+    for name, func in _gauges.items():
+        try:
+            gauges[name] = func()
+        except Exception:
+            # 조회 중 상태가 바뀌는 등 값을 읽지 못하면 생략
+            pass
+    return counters, gauges, histograms
+
+
+def format_stats():
+    """'/stats' 응답용 사람이 읽는 요약."""
+    counters, gauges, histograms = snapshot()
+    lines = []
+    for name in sorted(gauges):
+        lines.append('{} = {}'.format(name, gauges[name]))
+    for name in sorted(counters):
+        lines.append('{} = {}'.format(name, counters[name]))
+    for name in sorted(histograms):
+        summary = histograms[name]
+        lines.append('{}: n={} p50 {:.3f}ms p99 {:.3f}ms max {:.3f}ms'.format(
+            name, summary['count'], summary['p50'] * 1000, summary['p99'] * 1000,
+            summary['max'] * 1000))
+    return '\n'.join(lines)
+
+
+def render_prometheus():
+    """Prometheus 텍스트 형식 (카운터는 _total, 히스토그램은 summary 타입)."""
+    counters, gauges, histograms = snapshot()
+    out = []
+
+    def header(name, metric, kind):
+        if name in _help:
+            out.append('# HELP {} {}'.format(metric, _help[name]))
+        out.append('# TYPE {} {}'.format(metric, kind))
+
+    for name in sorted(counters):
+        metric = PREFIX + name + '_total'
+        header(name, metric, 'counter')
+        out.append('{} {}'.format(metric, counters[name]))
+    for name in sorted(gauges):
+        metric = PREFIX + name
+        header(name, metric, 'gauge')
+        out.append('{} {}'.format(metric, gauges[name]))
+    for name in sorted(histograms):
+        metric = PREFIX + name + '_seconds'
+        summary = histograms[name]
+        header(name, metric, 'summary')
+        for quantile in ('p50', 'p95', 'p99'):
+            out.append('{}{{quantile="0.{}"}} {:.9f}'.format(
+                metric, quantile[1:], summary[quantile]))
+        out.append('{}_sum {:.9f}'.format(metric, summary['mean'] * summary['count']))
+        out.append('{}_count {}'.format(metric, summary['count']))
+    return '\n'.join(out) + '\n'
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    """'GET /metrics'에만 응답하는 핸들러."""
+    def do_GET(self):
+        if self.path != '/metrics':
+            self.send_error(404)
+            return
+        body = render_prometheus().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # 수집기가 주기적으로 호출하므로 요청마다 로그를 남기지 않음
+        pass
+
+
+def start_http_server(port, host='127.0.0.1'):
+    """백그라운드 스레드로 지표 HTTP 서버 시작. 외부 노출을 막기 위해 기본은 로컬 주소."""
+    httpd = ThreadingHTTPServer((host, port), MetricsHandler)
+    httpd.daemon_threads = True
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return httpd
@@ -0,0 +1,89 @@
+# coding: utf-8
+"""
+클라이언트별 송신 대기열 (Outbox)
+- 브로드캐스트는 각 클라이언트의 대기열에 넣기만 하고 바로 반환
+- 실제 소켓 전송은 클라이언트마다 하나씩 있는 writer(스레드 또는 코루틴)가 담당
+- 대기열이 가득 차면 정책에 따라 가장 오래된 메시지를 버리거나 느린 클라이언트를 끊음
+- collections.deque의 append/popleft는 GIL 아래에서 원자적이므로 별도 락이 필요 없음
+"""
+
+from collections import deque
+
+
+# 넘침 정책
+DROP_OLDEST = 'drop_oldest'   # 가장 오래된 메시지를 버리고 새 메시지를 넣음
+DISCONNECT = 'disconnect'     # 느린 클라이언트의 연결을 끊음
+POLICIES = (DROP_OLDEST, DISCONNECT)
+
+
+class Outbox:
+    """크기 제한이 있는 송신 대기열."""
+    def __init__(self, maxsize, policy=DROP_OLDEST, notify=None, on_abort=None):
+        if policy not in POLICIES:
+            raise ValueError('알 수 없는 넘침 정책: {}'.format(policy))
+        self.items = deque()
+        self.maxsize = maxsize
+        self.policy = policy
+        self.notify = notify or (lambda: None)
+        # 끊을 때 전송 중에 막혀 있는 writer까지 깨우기 위한 콜백 (소켓 shutdown 등)
+        self.on_abort = on_abort or (lambda: None)
+        self.closed = False    # 더 이상 메시지를 받지 않음 (남은 것은 전송 후 종료)
+        self.aborted = False   # 남은 메시지도 버리고 즉시 종료
+        self.dropped = 0       # 넘침으로 버린 메시지 수
+        # writer를 이미 깨웠는지 여부. 깨운 뒤 drain 전까지는 다시 notify하지 않아
+        # 브로드캐스트 한 번에 수신자마다 이벤트를 set하는 비용을 줄임
+        self.signaled = False
+
+    def __len__(self):
+        return len(self.items)
+
+    def put(self, data):
+        """메시지를 넣음. 넣지 못했으면(닫힘/끊김) False 반환."""
+        if self.closed:
+            return False
+        if len(self.items) >= self.maxsize:
+            if self.policy == DISCONNECT:
+                self.abort()
+                return False
+            try:
+                self.items.popleft()
+            except IndexError:
+                # writer가 그 사이에 비웠음
+                pass
+            self.dropped += 1
+        self.items.append(data)
+        if not self.signaled:
+            self.signaled = True
+            self.notify()
+        return True
+
+    def drain(self):
+        """지금 쌓여 있는 메시지를 모두 꺼내 리스트로 반환."""
+        # 꺼내기 전에 플래그를 내려야, 그 사이 들어온 메시지가 notify 없이 남지 않음
+        self.signaled = False
+        batch = []
+        items = self.items
+        while True:
+            try:
+                batch.append(items.popleft())
+            except IndexError:
+                return batch
+
+    def close(self):
+        """새 메시지는 거부하고, 남은 메시지는 writer가 보낸 뒤 연결을 닫도록 함."""
+        self.closed = True
+        self.notify()
+
+    def abort(self):
+        """남은 메시지를 버리고 writer가 즉시 연결을 끊도록 함."""
+        if self.aborted:
+            return
+        self.closed = True
+        self.aborted = True
+        self.items.clear()
+        self.notify()
+        self.on_abort()
+
+    def finished(self):
+        """writer가 종료해도 되는 상태인지."""
+        return self.aborted or (self.closed and not self.items)
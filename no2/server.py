@@ -3,174 +3,737 @@
 """
 멀티스레드 채팅 서버 (TCP)
 - 여러 클라이언트 동시 접속 처리
-- 접속시 전체 알림: '~~님이 입장하셨습니다.'
+- 접속시 기본 방(로비) 알림: '~~님이 입장하셨습니다.'
 - '/종료' 명령으로 연결 종료
 - 귓속말: '/귓속말 target message'
+- 채팅방: '/join 방이름', '/leave [방이름]', '/rooms'
+  (방→멤버, 멤버→방 색인으로 일반 메시지는 현재 방 멤버에게만 전송)
+- 유휴 연결 정리: 조용한 클라이언트에게 '/ping'을 보내고, 응답('/pong' 등)이 없으면
+  끊은 뒤 일반 퇴장 경로로 처리. 마감 시각은 타이머 휠 하나로 관리 (timer_wheel.py)
+- 대화 기록: 방마다 최근 메시지를 메모리 링 버퍼 + 디스크 세그먼트 로그에 저장 (history.py)
+  방에 들어오면 최근 대화를 보내 주고, '/history [N]'으로 더 이전 대화 조회
+- 클라이언트마다 송신 대기열(outbox.py)과 전용 writer를 두어
+  느린 클라이언트 하나가 전체 브로드캐스트를 막지 않음
+- 메시지 프레이밍은 framing.py (줄 단위 / 길이 접두사) - 클라이언트와 공용
+- 계측: 카운터와 지연 시간 히스토그램 (metrics.py). 관리자 전용 '/stats' 명령,
+  '--metrics-port'로 127.0.0.1에 Prometheus 형식 엔드포인트, '--no-metrics'로 끔
+- 실행 모드 선택: 'python server.py --mode thread|async|sharded'
+  (thread: 연결당 스레드, async: asyncio 이벤트 루프 하나로 처리 - async_server.py,
+   sharded: async 워커 프로세스 여러 개 + 로컬 메시지 버스 - sharded_server.py)
 """
 
+import argparse
+import hmac
+import ipaddress
+import os
 import socket
+import sys
 import threading
+import time
+
+import metrics
+from framing import LINE, MODES, RECV_BUFSIZE, encode_shared, make_framer, send_buffers
+from history import MessageHistory
+from outbox import Outbox, DROP_OLDEST, POLICIES
+from timer_wheel import TimerWheel
 
 
 HOST = '0.0.0.0'
 PORT = 5000
 ENCODING = 'utf-8'
 ADDR = (HOST, PORT)
+# listen 대기열 크기. 동시 접속이 몰릴 때 SYN이 버려지지 않도록 커널 최대값 사용
+BACKLOG = socket.SOMAXCONN
+# 클라이언트별 송신 대기열 최대 길이와 넘쳤을 때의 정책 (drop_oldest / disconnect)
+OUTBOX_MAXSIZE = 1024
+OVERFLOW_POLICY = DROP_OLDEST
+# 메시지 프레이밍 방식 (line: 줄 단위 / length: 4바이트 길이 접두사)
+FRAMING = LINE
+# 접속하면 자동으로 들어가는 기본 방. 이 방의 메시지는 기존처럼 '[방]' 표시 없이 전송
+DEFAULT_ROOM = '로비'
+ROOM_NAME_MAXLEN = 30
+# 대화 기록 저장 폴더 (빈 문자열이면 기록 기능 끔)와 입장 시 보내 줄 최근 메시지 수
+HISTORY_DIR = 'chat_history'
+HISTORY_SIZE = 50
+# '/history N'으로 한 번에 조회할 수 있는 최대 개수
+HISTORY_MAX = 1000
+# 이 시간(초) 동안 아무것도 받지 못하면 '/ping' 전송, IDLE_TIMEOUT까지 응답이 없으면 끊음.
+# IDLE_TIMEOUT이 0이면 유휴 연결 정리 기능을 끔
+PING_INTERVAL = 30.0
+IDLE_TIMEOUT = 90.0
+REAPER_TICK = 1.0
+PING_MESSAGE = '/ping'
+PONG_MESSAGE = '/pong'
+# 지표 HTTP 엔드포인트 포트 (0이면 끔, 127.0.0.1에만 열림)
+METRICS_PORT = 0
+# '/stats 토큰'에 쓰는 관리자 토큰. 비어 있으면 같은 컴퓨터(루프백)에서 접속한 사용자만 허용
+ADMIN_TOKEN = os.environ.get('CHAT_ADMIN_TOKEN', '')
 
 
 class ClientInfo:
     """연결된 클라이언트 정보를 담는 간단한 클래스."""
-    def __init__(self, conn, addr, nickname):
+    def __init__(self, conn, addr, nickname, framer=None):
         self.conn = conn
         self.addr = addr
         self.nickname = nickname
+        self.room = DEFAULT_ROOM  # 일반 메시지를 보낼 현재 방
+        self.last_active = time.monotonic()  # 마지막으로 메시지를 받은 시각
+        self.framer = framer or make_framer(FRAMING)
+        self.wakeup = self.make_wakeup()
+        self.outbox = Outbox(OUTBOX_MAXSIZE, OVERFLOW_POLICY,
+                             notify=self.wakeup.set, on_abort=self.abort_connection)
 
+    def make_wakeup(self):
+        """writer를 깨우는 이벤트 생성 (스레드 모드: threading.Event)."""
+        return threading.Event()
 
-clients_lock = threading.Lock()
-clients = {}  # nickname -> ClientInfo
+    def send(self, message):
+        """송신 대기열에 메시지를 넣음. 블로킹 없음. 넣지 못했으면 False."""
+        return self.outbox.put(self.framer.encode(message))
 
+    def send_frame(self, frame):
+        """이미 인코딩된 프레임(여러 클라이언트가 공유하는 버퍼)을 대기열에 넣음."""
+        return self.outbox.put(frame)
 
-def broadcast(message, exclude_nick=None):
-    """모든 클라이언트에게 메시지 전송. exclude_nick이 있으면 해당 사용자 제외."""
-    with clients_lock:
-        for nick, info in list(clients.items()):
-            if nick == exclude_nick:
-                continue
+    def start(self):
+        """송신 대기열을 비우는 writer 스레드 시작."""
+        threading.Thread(target=self.writer_loop, daemon=True).start()
+
+    def writer_loop(self):
+        """대기열에 쌓인 메시지를 소켓으로 전송. 느린 클라이언트는 이 스레드만 막힘."""
+        outbox = self.outbox
+        try:
+            while not outbox.finished():
+                self.wakeup.wait()
+                self.wakeup.clear()
+                if outbox.aborted:
+                    break
+                # 쌓인 프레임을 복사 없이 sendmsg 한 번으로 전송 (scatter/gather)
+                batch = outbox.drain()
+                if batch:
+                    send_buffers(self.conn, batch)
+                    metrics.inc('messages_sent', len(batch))
+                    metrics.inc('bytes_sent', sum(map(len, batch)))
+        except Exception:
+            metrics.inc('send_failures')
+        finally:
+            # 수신 스레드의 recv()도 깨어나도록 shutdown 후 닫기
+            self.abort_connection()
             try:
-                info.conn.sendall(message.encode(ENCODING))
+                self.conn.close()
             except Exception:
-                # 전송 실패 시 해당 클라이언트 제거
-                remove_client(nick)
+                pass
 
+    def abort_connection(self):
+        """sendall/recv에서 막혀 있는 writer와 수신 스레드를 깨우도록 소켓 shutdown."""
+        try:
+            self.conn.shutdown(socket.SHUT_RDWR)
+        except Exception:
+            pass
 
-def send_private(sender_nick, target_nick, message_body):
-    """특정 사용자에게만 메시지를 보냄. 실패하면 발신자에게 에러 메시지 전송."""
+    def close(self):
+        """남은 메시지를 보낸 뒤 연결을 닫도록 writer에 알림."""
+        self.outbox.close()
+
+
+# 브로드캐스트마다 잡는 락이라 경합할 때의 대기 시간을 계측
+clients_lock = metrics.TimedLock('clients_lock_wait')
+clients = {}  # nickname -> ClientInfo
+rooms = {}  # 방 이름 -> 멤버 nickname 집합
+member_rooms = {}  # nickname -> 참여 중인 방 이름 집합 (rooms의 역색인)
+
+# 다른 프로세스(샤드)로 브로드캐스트/귓속말/닉네임을 중계하는 객체.
+# 단일 프로세스 모드에서는 None (sharded_server.BusClient 참고)
+relay = None
+# 대화 기록 저장소 (open_history()로 생성, 기록 기능을 끄면 None)
+history = None
+# 대화 기록 작업(flush와 락을 나눠 쓰는 append, mmap을 읽는 recent)을 넘겨 실행할 곳.
+# None이면 호출한 스레드에서 바로 실행. 비동기 모드는 이벤트 루프가 막히지 않도록
+# 전용 스레드로 넘김 (async_server.HistoryOffload)
+history_offload = None
+
+# 유휴 연결 검사용 타이머 휠 (ClientInfo -> 다음 검사 시각)
+idle_lock = threading.Lock()
+idle_wheel = TimerWheel(tick=REAPER_TICK)
+
+
+def outbox_depths():
+    """접속 중인 클라이언트들의 송신 대기열 길이 목록."""
+    with clients_lock:
+        targets = list(clients.values())
+    return [len(info.outbox) for info in targets]
+
+
+metrics.gauge('clients', lambda: len(clients), '이 프로세스에 접속 중인 사용자 수')
+metrics.gauge('rooms', lambda: len(rooms), '사용 중인 방 수')
+metrics.gauge('outbox_depth', lambda: sum(outbox_depths()), '송신 대기열에 쌓인 메시지 합계')
+metrics.gauge('outbox_depth_max', lambda: max(outbox_depths(), default=0),
+              '가장 많이 쌓인 클라이언트의 송신 대기열 길이')
+metrics.describe('connections_accepted', '받은 TCP 연결 수')
+metrics.describe('connections_closed', '퇴장 처리된 사용자 수')
+metrics.describe('messages_received', '받은 메시지(명령 포함) 수')
+metrics.describe('bytes_received', '받은 바이트 수')
+metrics.describe('messages_sent', '소켓으로 보낸 프레임 수')
+metrics.describe('bytes_sent', '소켓으로 보낸 바이트 수')
+metrics.describe('send_failures', '전송 오류로 끊긴 연결 수')
+metrics.describe('outbox_dropped', '송신 대기열이 넘쳐 버린 메시지 수 (퇴장 시 집계)')
+metrics.describe('broadcast_targets', '브로드캐스트로 대기열에 넣은 메시지 수')
+metrics.describe('whisper_misses', '대상을 찾지 못한 귓속말 수')
+metrics.describe('idle_reaped', '응답이 없어 끊은 연결 수')
+metrics.describe('accept', '닉네임 등록부터 환영 메시지까지 걸린 시간')
+metrics.describe('receive', '받은 메시지 하나를 처리하는 데 걸린 시간')
+metrics.describe('broadcast', '브로드캐스트 한 번을 대기열에 넣는 데 걸린 시간')
+metrics.describe('whisper', '귓속말 한 번을 처리하는 데 걸린 시간')
+metrics.describe('clients_lock_wait', '경합 시 clients_lock을 기다린 시간')
+
+
+def raise_nofile_limit():
+    """열 수 있는 파일(소켓) 개수 제한을 하드 리밋까지 올림. 수천 명 접속 대비."""
+    try:
+        import resource
+    except ImportError:
+        # 윈도우 등 resource 모듈이 없는 환경
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        try:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+        except (ValueError, OSError):
+            pass
+
+
+def room_message(room, text):
+    """방 알림/메시지 앞에 방 이름 표시 (기본 방은 기존 형식 그대로)."""
+    if room == DEFAULT_ROOM:
+        return text
+    return '[{}] {}'.format(room, text)
+
+
+def deliver_local(message, exclude_nick=None, room=None, record=False):
+    """
+    이 프로세스에 접속한 클라이언트에게 메시지 전송. exclude_nick이 있으면 해당 사용자 제외.
+    room이 있으면 그 방 멤버에게만 보냄 (방 크기만큼만 순회).
+    record면 방의 대화 기록에도 남김 (디스크 쓰기는 백그라운드에서 모아서 처리).
+    락은 대상 목록을 복사하는 동안만 잡고, 전송은 각 대기열에 넣기만 함.
+    메시지는 한 번만 인코딩하고 모든 수신자가 같은 버퍼를 공유.
+    """
+    start = metrics.timer()
+    if record and room is not None and history is not None:
+        if history_offload is None:
+            history.append(room, message)
+        else:
+            history_offload.submit(history.append, room, message)
+    frame = encode_shared(message, FRAMING)
+    with clients_lock:
+        if room is None:
+            targets = list(clients.values())
+        else:
+            targets = [clients[nick] for nick in rooms.get(room, ())]
+    for info in targets:
+        if info.nickname == exclude_nick:
+            continue
+        # 대기열이 넘쳐 끊긴 클라이언트는 writer가 연결을 닫고,
+        # 수신 쪽이 정상 퇴장 경로(remove_client)로 정리함
+        info.send_frame(frame)
+    metrics.inc('broadcast_targets', len(targets))
+    metrics.observe_since('broadcast', start)
+
+
+def broadcast(message, exclude_nick=None, room=None, record=False):
+    """
+    모든 클라이언트(room이 있으면 그 방 멤버)에게 메시지 전송.
+    다른 샤드가 있으면 버스로도 중계 (방 멤버 색인은 샤드마다 자기 접속자만 관리).
+    """
+    deliver_local(message, exclude_nick, room, record)
+    if relay is not None:
+        relay.publish(message, exclude_nick, room, record)
+
+
+def deliver_private(sender_nick, target_nick, message_body):
+    """이 프로세스에 접속한 사용자에게 귓속말 전달. 대상이 없으면 False."""
     with clients_lock:
         target = clients.get(target_nick)
+    if not target:
+        return False
+    # 귓속말 형식: 발신자(귓속말)> 메시지
+    target.send('{}(귓속말)> {}'.format(sender_nick, message_body))
+    return True
+
+
+def notify_unknown_target(sender_nick, target_nick):
+    """귓속말 대상을 찾지 못했음을 발신자에게 알림."""
+    metrics.inc('whisper_misses')
+    with clients_lock:
         sender = clients.get(sender_nick)
-        if not target:
-            if sender:
-                try:
-                    sender.conn.sendall(
-                        ('서버> 해당 닉네임을 찾을 수 없습니다: {}\n'.format(target_nick)).encode(
-                            ENCODING))
-                except Exception:
-                    remove_client(sender_nick)
-            return
-        # 귓속말 형식: 발신자(귓속말)> 메시지
-        try:
-            target.conn.sendall(
-                ('{}(귓속말)> {}\n'.format(sender_nick, message_body)).encode(ENCODING))
-        except Exception:
-            remove_client(target_nick)
+    if sender:
+        sender.send('서버> 해당 닉네임을 찾을 수 없습니다: {}'.format(target_nick))
+
+
+def send_private(sender_nick, target_nick, message_body):
+    """특정 사용자에게만 메시지를 보냄. 실패하면 발신자에게 에러 메시지 전송."""
+    start = metrics.timer()
+    if deliver_private(sender_nick, target_nick, message_body):
+        pass
+    elif relay is not None:
+        # 다른 샤드에 있을 수 있음. 못 찾으면 버스가 notify_unknown_target을 호출
+        relay.send_private(sender_nick, target_nick, message_body)
+    else:
+        notify_unknown_target(sender_nick, target_nick)
+    metrics.observe_since('whisper', start)
 
 
 def remove_client(nickname):
     """클라이언트 리스트에서 제거하고 소켓 닫기."""
     with clients_lock:
         info = clients.pop(nickname, None)
+        joined = member_rooms.pop(nickname, set())
+        for room in joined:
+            _discard_member(room, nickname)
     if info:
-        try:
-            info.conn.close()
-        except Exception:
-            pass
-        # 나감 알림을 전체에 전송
-        broadcast('{}님이 나가셨습니다.\n'.format(nickname))
+        with idle_lock:
+            idle_wheel.cancel(info)
+        info.close()
+        metrics.inc('connections_closed')
+        if info.outbox.dropped:
+            metrics.inc('outbox_dropped', info.outbox.dropped)
+        if relay is not None:
+            relay.release(nickname)
+        # 나감 알림을 참여 중이던 방마다 전송
+        for room in joined:
+            broadcast(room_message(room, '{}님이 나가셨습니다.'.format(nickname)), room=room)
+
+
+def register_client(nickname, make_info):
+    """
+    닉네임을 등록하고 실제로 사용된 닉네임과 ClientInfo를 반환.
+    닉네임 중복이면 숫자를 붙여 변형. make_info(nickname)으로 ClientInfo 생성.
+    """
+    with clients_lock:
+        base_nick = nickname
+        counter = 1
+        while nickname in clients:
+            nickname = '{}_{}'.format(base_nick, counter)
+            counter += 1
+        info = make_info(nickname)
+        clients[nickname] = info
+        # 기본 방에 자동 참여
+        rooms.setdefault(DEFAULT_ROOM, set()).add(nickname)
+        member_rooms[nickname] = {DEFAULT_ROOM}
+    track_idle(info)
+    return nickname, info
+
+
+def track_idle(info):
+    """유휴 검사 대상으로 등록. 이후 활동 갱신은 info.last_active 대입만으로 충분."""
+    if IDLE_TIMEOUT > 0:
+        with idle_lock:
+            idle_wheel.schedule(info, info.last_active + min(PING_INTERVAL, IDLE_TIMEOUT))
+
+
+def reap_idle(now=None):
+    """
+    마감 시각이 지난 클라이언트만 확인해서
+    - 그 사이 활동이 있었으면 마지막 활동 기준으로 다시 예약
+    - PING_INTERVAL 이상 조용하면 '/ping'을 보내고 IDLE_TIMEOUT에 다시 확인
+    - IDLE_TIMEOUT 이상 조용하면 연결을 끊음 → 수신 루프가 끝나며 remove_client로 퇴장 알림
+    """
+    if now is None:
+        now = time.monotonic()
+    with idle_lock:
+        expired = idle_wheel.advance(now)
+    for info in expired:
+        idle = now - info.last_active
+        if idle >= IDLE_TIMEOUT:
+            metrics.inc('idle_reaped')
+            info.outbox.abort()
+            continue
+        if idle >= PING_INTERVAL:
+            info.send(PING_MESSAGE)
+            deadline = info.last_active + IDLE_TIMEOUT
+        else:
+            deadline = info.last_active + min(PING_INTERVAL, IDLE_TIMEOUT)
+        with idle_lock:
+            # 그 사이 퇴장했으면 다시 등록하지 않음
+            if info.nickname in clients:
+                idle_wheel.schedule(info, deadline)
+
+
+def reaper_loop():
+    """스레드 모드의 유휴 연결 정리 스레드 (클라이언트 수와 관계없이 하나)."""
+    while True:
+        time.sleep(REAPER_TICK)
+        reap_idle()
+
+
+def welcome(info):
+    """등록 직후 입장 알림과 환영 메시지, 기본 방의 최근 대화 전송 (스레드/비동기 모드 공용)."""
+    nickname = info.nickname
+    broadcast('{}님이 입장하셨습니다.'.format(nickname), room=DEFAULT_ROOM)
+    info.send('서버> 환영합니다, {} 님. /종료 로 나가실 수 있습니다.'.format(nickname))
+    send_history(info, DEFAULT_ROOM, HISTORY_SIZE)
+
+
+def send_history(info, room, count):
+    """방의 최근 대화 count개를 요청한 사용자에게 전송."""
+    if history is None:
+        return
+    if history_offload is None:
+        send_recent(info, room, history.recent(room, count))
+    else:
+        # 읽는 동안 이벤트 루프를 막지 않고, 다 읽으면 루프에서 전송
+        history_offload.call(history.recent, (room, count),
+                             lambda messages: send_recent(info, room, messages))
+
+
+def send_recent(info, room, messages):
+    """조회한 최근 대화를 사용자에게 전송."""
+    if not messages:
+        return
+    info.send('서버> {} 방의 최근 대화 {}개'.format(room, len(messages)))
+    for message in messages:
+        info.send(message)
+
+
+def _discard_member(room, nickname):
+    """방 멤버에서 제거하고 빈 방은 삭제. clients_lock을 잡은 상태에서 호출."""
+    members = rooms.get(room)
+    if members is not None:
+        members.discard(nickname)
+        if not members:
+            del rooms[room]
+
+
+def join_room(info, room):
+    """방에 참여하고 현재 방으로 설정. 새로 참여했으면 방 멤버에게 알림."""
+    nickname = info.nickname
+    with clients_lock:
+        members = rooms.setdefault(room, set())
+        joined = nickname not in members
+        members.add(nickname)
+        member_rooms.setdefault(nickname, set()).add(room)
+        info.room = room
+    if joined:
+        broadcast(room_message(room, '{}님이 방에 들어왔습니다.'.format(nickname)), room=room)
+        send_history(info, room, HISTORY_SIZE)
+    info.send('서버> 현재 방: {}'.format(room))
+
+
+def leave_room(info, room):
+    """방에서 나감. 현재 방이었다면 참여 중인 다른 방으로 바꿈. 참여 중이 아니면 False."""
+    nickname = info.nickname
+    with clients_lock:
+        joined = member_rooms.get(nickname, set())
+        if room not in joined:
+            return False
+        joined.discard(room)
+        _discard_member(room, nickname)
+        if info.room == room:
+            info.room = DEFAULT_ROOM if DEFAULT_ROOM in joined else next(iter(joined), None)
+    broadcast(room_message(room, '{}님이 방에서 나갔습니다.'.format(nickname)), room=room)
+    info.send('서버> {} 방에서 나왔습니다. 현재 방: {}'.format(room, info.room or '없음'))
+    return True
+
+
+def list_rooms(info):
+    """방 목록과 인원 수를 요청한 사용자에게 전송 (현재 방은 * 표시)."""
+    with clients_lock:
+        summary = sorted((room, len(members)) for room, members in rooms.items())
+    lines = ['{}{} ({}명)'.format('*' if room == info.room else ' ', room, count)
+             for room, count in summary]
+    info.send('서버> 방 목록\n' + '\n'.join(lines))
+
+
+def is_admin(info, token):
+    """관리자 확인: 토큰이 설정돼 있으면 토큰 비교, 아니면 루프백 주소에서 접속한 경우만."""
+    if ADMIN_TOKEN:
+        return hmac.compare_digest(token.encode(ENCODING), ADMIN_TOKEN.encode(ENCODING))
+    try:
+        return ipaddress.ip_address(info.addr[0]).is_loopback
+    except (TypeError, ValueError, IndexError):
+        return False
+
+
+def handle_message(info, message):
+    """
+    수신한 한 줄 메시지 처리 (스레드/비동기 모드 공용).
+    연결을 계속 유지하면 True, 종료해야 하면 False 반환.
+    """
+    start = metrics.timer()
+    metrics.inc('messages_received')
+    try:
+        return dispatch_message(info, message)
+    finally:
+        metrics.observe_since('receive', start)
+
+
+def dispatch_message(info, message):
+    """명령/일반 메시지 분기 (handle_message에서 계측과 함께 호출)."""
+    nickname = info.nickname
+    info.last_active = time.monotonic()
+
+    # 핑 응답: 활동 시각만 갱신
+    if message == PONG_MESSAGE:
+        return True
+
+    # 종료 명령 처리
+    if message == '/종료':
+        info.send('서버> 연결을 종료합니다.')
+        return False
+
+    # 귓속말 처리: '/귓속말 target message...'
+    if message.startswith('/귓속말 '):
+        parts = message.split(' ', 2)
+        if len(parts) >= 3:
+            target_nick = parts[1].strip()
+            body = parts[2].strip()
+            if target_nick and body:
+                send_private(nickname, target_nick, body)
+                return True
+        # 잘못된 형식
+        info.send('서버> 귓속말 사용법: /귓속말 받는사람닉네임 메시지')
+        return True
+
+    # 방 명령: '/join 방이름', '/leave [방이름]', '/rooms'
+    if message == '/rooms':
+        list_rooms(info)
+        return True
+    if message == '/join' or message.startswith('/join '):
+        room = message[len('/join'):].strip()
+        if not room or ' ' in room or len(room) > ROOM_NAME_MAXLEN:
+            info.send('서버> 방 참여 사용법: /join 방이름 (공백 없이 {}자 이내)'.format(
+                ROOM_NAME_MAXLEN))
+        else:
+            join_room(info, room)
+        return True
+    if message == '/history' or message.startswith('/history '):
+        arg = message[len('/history'):].strip()
+        if info.room is None or (arg and not arg.isdigit()):
+            info.send('서버> 기록 조회 사용법: /history [개수] (참여 중인 방에서)')
+        elif history is None:
+            info.send('서버> 대화 기록 기능이 꺼져 있습니다.')
+        else:
+            send_history(info, info.room, min(int(arg or HISTORY_SIZE), HISTORY_MAX))
+        return True
+    if message == '/stats' or message.startswith('/stats '):
+        if not is_admin(info, message[len('/stats'):].strip()):
+            info.send('서버> 관리자만 사용할 수 있는 명령입니다.')
+        elif not metrics.enabled:
+            info.send('서버> 통계 기능이 꺼져 있습니다.')
+        else:
+            info.send('서버> 통계 (이 프로세스 기준)\n' + metrics.format_stats())
+        return True
+    if message == '/leave' or message.startswith('/leave '):
+        room = message[len('/leave'):].strip() or info.room
+        if not room or not leave_room(info, room):
+            info.send('서버> 참여 중인 방이 아닙니다: {}'.format(room or '없음'))
+        return True
+
+    # 일반 메시지: 현재 방 멤버에게 전송
+    if info.room is None:
+        info.send('서버> 참여 중인 방이 없습니다. /join 방이름 으로 참여하세요.')
+        return True
+    full_msg = room_message(info.room, '{}> {}'.format(nickname, message))
+    broadcast(full_msg, room=info.room, record=True)
+    return True
+
+
+def recv_messages(conn, framer):
+    """소켓에서 받은 데이터를 프레임 단위 메시지로 하나씩 꺼내는 제너레이터. 연결이 끊기면 종료."""
+    while True:
+        data = conn.recv(RECV_BUFSIZE)
+        if not data:
+            return
+        metrics.inc('bytes_received', len(data))
+        yield from framer.feed(data)
 
 
 def handle_client(conn, addr):
     """클라이언트별 스레드 함수."""
+    nickname = None
+    framer = make_framer(FRAMING)
     try:
-        conn.sendall('닉네임을 입력하세요: '.encode(ENCODING))
-        nick_bytes = conn.recv(1024)
-        if not nick_bytes:
+        conn.sendall(framer.encode('닉네임을 입력하세요: '))
+        messages = recv_messages(conn, framer)
+        # 닉네임을 보내지 않고 붙잡고 있는 연결도 정리되도록 제한 시간 설정
+        if IDLE_TIMEOUT > 0:
+            conn.settimeout(IDLE_TIMEOUT)
+        first = next(messages, None)
+        conn.settimeout(None)
+        if first is None:
             conn.close()
             return
-        nickname = nick_bytes.decode(ENCODING).strip()
+        nickname = first.strip()
         if not nickname:
-            conn.sendall('서버> 유효한 닉네임이 아닙니다. 연결을 종료합니다.\n'.encode(ENCODING))
+            conn.sendall(framer.encode('서버> 유효한 닉네임이 아닙니다. 연결을 종료합니다.'))
             conn.close()
             return
 
         # 닉네임 중복 처리: 중복이면 숫자 붙여 변형
-        with clients_lock:
-            base_nick = nickname
-            counter = 1
-            while nickname in clients:
-                nickname = '{}_{}'.format(base_nick, counter)
-                counter += 1
-            clients[nickname] = ClientInfo(conn, addr, nickname)
+        start = metrics.timer()
+        nickname, info = register_client(
+            nickname, lambda nick: ClientInfo(conn, addr, nick, framer))
+        info.start()
 
         # 입장 알림
-        broadcast('{}님이 입장하셨습니다.\n'.format(nickname))
-        conn.sendall('서버> 환영합니다, {} 님. /종료 로 나가실 수 있습니다.\n'.format(nickname).encode(ENCODING))
+        welcome(info)
+        metrics.observe_since('accept', start)
 
-        # 메시지 수신 루프
-        while True:
-            data = conn.recv(1024)
-            if not data:
-                break
-            message = data.decode(ENCODING).rstrip('\n')
+        # 메시지 수신 루프 (recv 한 번에 여러 메시지가 와도 하나씩 처리)
+        for message in messages:
             if not message:
                 continue
-
-            # 종료 명령 처리
-            if message == '/종료':
-                try:
-                    conn.sendall('서버> 연결을 종료합니다.\n'.encode(ENCODING))
-                except Exception:
-                    pass
+            if not handle_message(info, message):
                 break
-
-            # 귓속말 처리: '/귓속말 target message...'
-            if message.startswith('/귓속말 '):
-                parts = message.split(' ', 2)
-                if len(parts) >= 3:
-                    target_nick = parts[1].strip()
-                    body = parts[2].strip()
-                    if target_nick and body:
-                        send_private(nickname, target_nick, body)
-                        continue
-                # 잘못된 형식
-                conn.sendall('서버> 귓속말 사용법: /귓속말 받는사람닉네임 메시지\n'.encode(ENCODING))
-                continue
-
-            # 일반 메시지: 전체 브로드캐스트
-            full_msg = '{}> {}\n'.format(nickname, message)
-            broadcast(full_msg)
     except Exception:
         pass
     finally:
         # 연결 종료 처리
-        remove_client(nickname)
+        if nickname:
+            remove_client(nickname)
+        else:
+            conn.close()
+
+
+def close_all_clients():
+    """모든 클라이언트 연결을 닫고 목록 비우기 (서버 종료 시)."""
+    with clients_lock:
+        targets = list(clients.values())
+        clients.clear()
+        rooms.clear()
+        member_rooms.clear()
+    for info in targets:
+        info.outbox.abort()
+
+
+def open_history(subdir=None):
+    """대화 기록 저장소 열기. subdir는 샤드 워커마다 폴더를 나눌 때 사용."""
+    global history
+    if not HISTORY_DIR:
+        return
+    directory = os.path.join(HISTORY_DIR, subdir) if subdir else HISTORY_DIR
+    history = MessageHistory(directory, ring_size=HISTORY_SIZE)
+
+
+def close_history():
+    """남은 대화 기록을 디스크에 쓰고 닫기."""
+    global history
+    if history is not None:
+        history.close()
+        history = None
+
+
+def start_metrics_server(port_offset=0):
+    """지표 HTTP 엔드포인트 시작 (샤드 워커는 METRICS_PORT + 워커 번호)."""
+    if not (metrics.enabled and METRICS_PORT):
+        return
+    port = METRICS_PORT + port_offset
+    metrics.start_http_server(port)
+    print('지표 엔드포인트: http://127.0.0.1:{}/metrics'.format(port))
 
 
 def start_server():
     """서버 소켓 생성 및 접속 수락 루프."""
+    raise_nofile_limit()
     server_sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
     server_sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
     server_sock.bind(ADDR)
-    server_sock.listen(5)
+    server_sock.listen(BACKLOG)
+    open_history()
+    start_metrics_server()
+    if IDLE_TIMEOUT > 0:
+        threading.Thread(target=reaper_loop, daemon=True).start()
     print('서버 시작: {}:{}'.format(HOST, PORT))
     try:
         while True:
             conn, addr = server_sock.accept()
+            metrics.inc('connections_accepted')
             thread = threading.Thread(target=handle_client, args=(conn, addr), daemon=True)
             thread.start()
     except KeyboardInterrupt:
         print('\n서버 종료 중...')
     finally:
         # 모든 클라이언트 닫기
-        with clients_lock:
-            for info in list(clients.values()):
-                try:
-                    info.conn.close()
-                except Exception:
-                    pass
-            clients.clear()
+        close_all_clients()
         server_sock.close()
+        close_history()
         print('서버 종료 완료.')
 
 
+def configure(outbox_size=None, overflow_policy=None, framing=None,
+              history_dir=None, history_size=None, ping_interval=None, idle_timeout=None,
+              metrics_enabled=None, metrics_port=None, admin_token=None):
+    """실행 옵션을 모듈 설정값에 반영."""
+    global OUTBOX_MAXSIZE, OVERFLOW_POLICY, FRAMING, HISTORY_DIR, HISTORY_SIZE
+    global PING_INTERVAL, IDLE_TIMEOUT, METRICS_PORT, ADMIN_TOKEN
+    if outbox_size is not None:
+        OUTBOX_MAXSIZE = outbox_size
+    if overflow_policy is not None:
+        OVERFLOW_POLICY = overflow_policy
+    if framing is not None:
+        FRAMING = framing
+    if history_dir is not None:
+        HISTORY_DIR = history_dir
+    if history_size is not None:
+        HISTORY_SIZE = history_size
+    if ping_interval is not None:
+        PING_INTERVAL = ping_interval
+    if idle_timeout is not None:
+        IDLE_TIMEOUT = idle_timeout
+    if metrics_enabled is not None:
+        metrics.enabled = metrics_enabled
+    if metrics_port is not None:
+        METRICS_PORT = metrics_port
+    if admin_token is not None:
+        ADMIN_TOKEN = admin_token
+
+
+def main():
+    parser = argparse.ArgumentParser(description='TCP 채팅 서버')
+    parser.add_argument('--mode', choices=('thread', 'async', 'sharded'), default='thread',
+                        help='thread: 연결당 스레드 (기본), async: asyncio 이벤트 루프, '
+                             'sharded: async 워커 프로세스 여러 개')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='sharded 모드의 워커 프로세스 수 (기본: CPU 코어 수)')
+    parser.add_argument('--outbox-size', type=int, default=OUTBOX_MAXSIZE,
+                        help='클라이언트별 송신 대기열 최대 길이')
+    parser.add_argument('--overflow', choices=POLICIES, default=OVERFLOW_POLICY,
+                        help='대기열이 넘쳤을 때: 오래된 메시지 버리기 / 연결 끊기')
+    parser.add_argument('--framing', choices=MODES, default=FRAMING,
+                        help='메시지 프레이밍: line (줄 단위) / length (길이 접두사)')
+    parser.add_argument('--history-dir', default=HISTORY_DIR,
+                        help='대화 기록 저장 폴더 (빈 문자열이면 기록 끔)')
+    parser.add_argument('--history-size', type=int, default=HISTORY_SIZE,
+                        help='방마다 메모리에 두고 입장 시 보내 줄 최근 메시지 수')
+    parser.add_argument('--ping-interval', type=float, default=PING_INTERVAL,
+                        help='이 시간(초) 동안 조용한 클라이언트에게 /ping 전송')
+    parser.add_argument('--idle-timeout', type=float, default=IDLE_TIMEOUT,
+                        help='이 시간(초) 동안 응답이 없으면 연결 끊기 (0이면 끔)')
+    parser.add_argument('--no-metrics', action='store_true',
+                        help='계측(카운터/히스토그램) 끄기')
+    parser.add_argument('--metrics-port', type=int, default=METRICS_PORT,
+                        help='127.0.0.1의 이 포트에서 /metrics 제공 (0이면 끔, '
+                             'sharded 모드는 포트 + 워커 번호)')
+    parser.add_argument('--admin-token', default=None,
+                        help="'/stats 토큰'용 관리자 토큰 (기본: 환경 변수 CHAT_ADMIN_TOKEN, "
+                             '없으면 루프백 접속자만 허용)')
+    args = parser.parse_args()
+    configure(outbox_size=args.outbox_size, overflow_policy=args.overflow,
+              framing=args.framing, history_dir=args.history_dir,
+              history_size=args.history_size, ping_interval=args.ping_interval,
+              idle_timeout=args.idle_timeout, metrics_enabled=not args.no_metrics,
+              metrics_port=args.metrics_port, admin_token=args.admin_token)
+
+    if args.mode == 'async':
+        import async_server
+        async_server.start_async_server()
+    elif args.mode == 'sharded':
+        import sharded_server
+        sharded_server.start_sharded_server(args.workers)
+    else:
+        start_server()
+
+
 if __name__ == '__main__':
-    start_server()
+    # async_server.py 등이 'import server'로 같은 상태(clients, 설정값)를 쓰도록 별칭 등록
+    sys.modules.setdefault('server', sys.modules['__main__'])
+    main()
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+# coding: utf-8
+"""
+멀티 프로세스(샤드) 채팅 서버 (리눅스 전용, fork 사용)
+- 워커 프로세스 N개를 fork. 각 워커는 async_server와 같은 이벤트 루프 서버
+- 접속 분산: SO_REUSEPORT로 워커마다 같은 포트에 리스닝 소켓을 열고 커널이 분배.
+  SO_REUSEPORT가 없으면 fork 전에 만든 리스닝 소켓 하나를 모든 워커가 공유
+- 부모 프로세스는 로컬 메시지 버스(허브). 워커와 Unix 도메인 소켓 쌍으로 연결
+  - 브로드캐스트(일반 메시지, 입장/퇴장 알림)를 다른 워커들에게 중계
+    (방 메시지는 방 이름과 함께 중계하고, 각 워커가 자기 접속자 중 방 멤버에게만 전달.
+     '/rooms'의 인원 수는 그 워커에 접속한 사람 기준)
+  - 귓속말을 대상 닉네임이 접속한 워커로 전달
+  - 전역 닉네임 등록부: 워커가 달라도 중복 닉네임에는 숫자를 붙임
+- 대화 기록은 워커마다 모든 방 메시지를 받으므로 워커별 폴더(worker-N)에 각자 저장
+- 계측도 워커별: '/stats'는 접속한 워커 기준, 지표 엔드포인트는 포트 + 워커 번호
+- 버스 메시지는 JSON 한 개 = 길이 접두사 프레임 하나 (framing.LengthFramer)
+- 외부 브로커 없이 한 대의 리눅스 서버에서 CPU 코어 수만큼 접속을 나눠 처리
+
+실행: python server.py --mode sharded --workers 4
+"""
+
+import asyncio
+import itertools
+import json
+import os
+import signal
+import socket
+
+import async_server
+import server
+from framing import RECV_BUFSIZE, LengthFramer
+from server import HOST, PORT, ADDR, BACKLOG
+
+
+def encode_bus(framer, msg):
+    """버스 메시지(dict)를 프레임 바이트로 변환."""
+    return framer.encode(json.dumps(msg, ensure_ascii=False))
+
+
+async def read_bus(reader, framer):
+    """버스 연결에서 메시지(dict)를 하나씩 꺼내는 비동기 제너레이터."""
+    while True:
+        data = await reader.read(RECV_BUFSIZE)
+        if not data:
+            return
+        for raw in framer.feed(data):
+            yield json.loads(raw)
+
+
+class BusClient:
+    """워커 쪽 버스 연결. server.relay로 등록되어 server.py 함수들이 호출함."""
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.framer = LengthFramer()
+        self.pending = {}  # 요청 id -> Future (닉네임 등록 응답 대기)
+        self.request_ids = itertools.count(1)
+
+    def _send(self, msg):
+        self.writer.write(encode_bus(self.framer, msg))
+
+    def publish(self, message, exclude_nick=None, room=None, record=False):
+        """다른 워커들에게 브로드캐스트 중계 요청. room이 있으면 각 워커의 그 방 멤버에게만."""
+        self._send({'op': 'broadcast', 'text': message, 'exclude': exclude_nick,
+                    'room': room, 'record': record})
+
+    def send_private(self, sender_nick, target_nick, message_body):
+        """다른 워커에 있는 사용자에게 귓속말 전달 요청."""
+        self._send({'op': 'whisper', 'from': sender_nick, 'to': target_nick,
+                    'text': message_body})
+
+    def release(self, nickname):
+        """전역 등록부에서 닉네임 반납."""
+        self._send({'op': 'release', 'nick': nickname})
+
+    async def claim(self, nickname):
+        """전역 등록부에 닉네임 등록. 중복이면 숫자가 붙은 닉네임을 돌려받음."""
+        request_id = next(self.request_ids)
+        future = asyncio.get_running_loop().create_future()
+        self.pending[request_id] = future
+        self._send({'op': 'claim', 'id': request_id, 'nick': nickname})
+        return await future
+
+    async def run(self):
+        """허브가 보낸 메시지 처리. 허브 연결이 끊기면 반환."""
+        async for msg in read_bus(self.reader, LengthFramer()):
+            op = msg['op']
+            if op == 'broadcast':
+                server.deliver_local(msg['text'], msg['exclude'], msg.get('room'),
+                                     msg.get('record', False))
+            elif op == 'whisper':
+                if not server.deliver_private(msg['from'], msg['to'], msg['text']):
+                    # 허브에 등록된 직후 나간 경우
+                    server.notify_unknown_target(msg['from'], msg['to'])
+            elif op == 'unknown_target':
+                server.notify_unknown_target(msg['from'], msg['to'])
+            elif op == 'claimed':
+                future = self.pending.pop(msg['id'], None)
+                if future is not None and not future.done():
+                    future.set_result(msg['nick'])
+                else:
+                    # 기다리던 연결이 그 사이 끝났음 (취소) → 받은 닉네임을 바로 반납
+                    self.release(msg['nick'])
+
+
+class BusHub:
+    """부모 프로세스의 메시지 버스. 워커 간 중계와 전역 닉네임 등록부 담당."""
+    def __init__(self):
+        self.framer = LengthFramer()
+        self.workers = {}  # 워커 번호 -> StreamWriter
+        self.owners = {}   # nickname -> 워커 번호
+
+    def send(self, worker_id, msg):
+        writer = self.workers.get(worker_id)
+        if writer is not None:
+            writer.write(encode_bus(self.framer, msg))
+
+    def claim(self, worker_id, nickname):
+        """server.register_client와 같은 규칙으로 전역에서 중복 처리."""
+        base_nick = nickname
+        counter = 1
+        while nickname in self.owners:
+            nickname = '{}_{}'.format(base_nick, counter)
+            counter += 1
+        self.owners[nickname] = worker_id
+        return nickname
+
+    def dispatch(self, worker_id, msg):
+        op = msg['op']
+        if op == 'broadcast':
+            # 한 번만 인코딩해서 보낸 워커를 뺀 나머지에게 그대로 전달
+            data = encode_bus(self.framer, msg)
+            for other_id, writer in self.workers.items():
+                if other_id != worker_id:
+                    writer.write(data)
+        elif op == 'whisper':
+            owner = self.owners.get(msg['to'])
+            if owner is None or owner == worker_id:
+                self.send(worker_id, {'op': 'unknown_target', 'from': msg['from'],
+                                      'to': msg['to']})
+            else:
+                self.send(owner, msg)
+        elif op == 'claim':
+            nickname = self.claim(worker_id, msg['nick'])
+            self.send(worker_id, {'op': 'claimed', 'id': msg['id'], 'nick': nickname})
+        elif op == 'release':
+            if self.owners.get(msg['nick']) == worker_id:
+                del self.owners[msg['nick']]
+
+    async def serve_worker(self, worker_id, sock):
+        reader, writer = await asyncio.open_unix_connection(sock=sock)
+        self.workers[worker_id] = writer
+        try:
+            async for msg in read_bus(reader, LengthFramer()):
+                self.dispatch(worker_id, msg)
+        finally:
+            # 워커가 죽으면 그 워커의 닉네임을 등록부에서 정리
+            del self.workers[worker_id]
+            for nickname in [n for n, w in self.owners.items() if w == worker_id]:
+                del self.owners[nickname]
+            writer.close()
+
+    async def run(self, worker_socks):
+        """모든 워커의 버스 연결을 처리. 워커가 모두 종료되면 반환."""
+        await asyncio.gather(*(self.serve_worker(worker_id, sock)
+                               for worker_id, sock in enumerate(worker_socks)))
+
+
+def make_listen_socket(reuse_port):
+    """리스닝 소켓 생성. reuse_port면 여러 프로세스가 같은 포트에 bind 가능."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reuse_port:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind(ADDR)
+    sock.listen(BACKLOG)
+    sock.setblocking(False)
+    return sock
+
+
+def run_worker(worker_id, bus_sock, listen_sock):
+    """워커 프로세스 본체: 버스에 연결하고 비동기 채팅 서버 실행."""
+    async def main():
+        # 부모가 SIGTERM으로 종료를 알리면 아래 finally에서 기록을 마저 쓰고 종료
+        asyncio.get_running_loop().add_signal_handler(
+            signal.SIGTERM, asyncio.current_task().cancel)
+        reader, writer = await asyncio.open_unix_connection(sock=bus_sock)
+        bus = BusClient(reader, writer)
+        server.relay = bus
+        serve_task = asyncio.get_running_loop().create_task(async_server.serve(listen_sock))
+        # 허브(부모)가 종료되어 버스가 끊기면 워커도 종료
+        await bus.run()
+        serve_task.cancel()
+
+    # 기록 저장소의 flush 스레드는 fork 후 워커 안에서 만들어야 함
+    server.open_history('worker-{}'.format(worker_id))
+    server.start_metrics_server(worker_id)
+    try:
+        asyncio.run(main())
+    except asyncio.CancelledError:
+        pass
+    finally:
+        server.close_all_clients()
+        server.close_history()
+
+
+def start_sharded_server(workers=None):
+    """워커를 fork하고 부모 프로세스는 메시지 버스 허브로 동작."""
+    workers = workers or os.cpu_count() or 1
+    server.raise_nofile_limit()
+    reuse_port = hasattr(socket, 'SO_REUSEPORT')
+    # SO_REUSEPORT가 없으면 fork 전에 만든 소켓 하나를 모든 워커가 공유 (pre-fork accept)
+    shared_sock = None if reuse_port else make_listen_socket(False)
+
+    pids = []
+    hub_socks = []
+    for worker_id in range(workers):
+        hub_sock, worker_sock = socket.socketpair(socket.AF_UNIX, socket.SOCK_STREAM)
+        pid = os.fork()
+        if pid == 0:
+            # 워커: Ctrl+C는 부모가 처리하고, 워커는 버스가 끊기면 스스로 종료
+            signal.signal(signal.SIGINT, signal.SIG_IGN)
+            hub_sock.close()
+            for sock in hub_socks:
+                sock.close()
+            try:
+                run_worker(worker_id, worker_sock, shared_sock or make_listen_socket(True))
+            finally:
+                os._exit(0)
+        worker_sock.close()
+        hub_socks.append(hub_sock)
+        pids.append(pid)
+    if shared_sock is not None:
+        shared_sock.close()
+
+    print('서버 시작 (sharded, 워커 {}개): {}:{}'.format(workers, HOST, PORT))
+    try:
+        asyncio.run(BusHub().run(hub_socks))
+    except KeyboardInterrupt:
+        print('\n서버 종료 중...')
+    finally:
+        for pid in pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        for pid in pids:
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
+        print('서버 종료 완료.')
+
+
+if __name__ == '__main__':
+    start_sharded_server()
@@ -0,0 +1,100 @@
+# coding: utf-8
+"""
+framing.py 테스트: python -m pytest no2
+"""
+
+import socket
+
+import pytest
+
+from framing import (LENGTH, LINE, FrameError, LengthFramer, LineFramer, encode_shared,
+                     make_framer, send_buffers)
+
+
+@pytest.mark.parametrize('mode', (LINE, LENGTH))
+def test_round_trip_split_every_byte(mode):
+    """한글(3바이트 문자)이 recv 경계에서 잘려도 메시지가 깨지지 않음."""
+    framer = make_framer(mode)
+    messages = ['안녕하세요', 'hello', '', '이모지 😀']
+    data = b''.join(framer.encode(message) for message in messages)
+    received = []
+    for i in range(len(data)):
+        received.extend(framer.feed(data[i:i + 1]))
+    assert received == messages
+    assert not framer.buffer
+
+
+@pytest.mark.parametrize('mode', (LINE, LENGTH))
+def test_many_messages_in_one_recv(mode):
+    framer = make_framer(mode)
+    data = b''.join(framer.encode('메시지 {}'.format(i)) for i in range(100))
+    # 마지막 메시지의 앞부분만 온 경우: 완성된 것만 돌려주고 나머지는 버퍼에 남김
+    assert framer.feed(data[:-2]) == ['메시지 {}'.format(i) for i in range(99)]
+    assert framer.feed(data[-2:]) == ['메시지 99']
+
+
+def test_line_strips_carriage_return():
+    assert LineFramer().feed(b'telnet\r\nnext\r\n') == ['telnet', 'next']
+
+
+def test_length_allows_newlines():
+    framer = LengthFramer()
+    assert framer.feed(framer.encode('첫 줄\n둘째 줄')) == ['첫 줄\n둘째 줄']
+
+
+def test_line_too_long():
+    framer = LineFramer(max_size=16)
+    with pytest.raises(FrameError):
+        framer.feed(b'x' * 17)
+
+
+def test_length_too_long():
+    framer = LengthFramer(max_size=16)
+    with pytest.raises(FrameError):
+        framer.feed(LengthFramer().encode('x' * 17)[:4])
+
+
+def test_unknown_mode():
+    with pytest.raises(ValueError):
+        make_framer('json')
+
+
+def test_encode_shared_is_read_only_view():
+    view = encode_shared('브로드캐스트', LENGTH)
+    assert isinstance(view, memoryview)
+    assert bytes(view) == LengthFramer().encode('브로드캐스트')
+    with pytest.raises(TypeError):
+        view[0] = 0
+
+
+class PartialSocket:
+    """sendmsg가 한 번에 최대 limit 바이트만 보내는 소켓 (일부 전송 재현)."""
+    def __init__(self, limit):
+        self.limit = limit
+        self.sent = bytearray()
+        self.calls = 0
+
+    def sendmsg(self, buffers):
+        self.calls += 1
+        data = b''.join(bytes(buffer) for buffer in buffers)[:self.limit]
+        self.sent += data
+        return len(data)
+
+
+def test_send_buffers_resumes_partial_send():
+    buffers = [b'abc', memoryview(b'defgh'), b'', b'ij']
+    sock = PartialSocket(limit=4)
+    send_buffers(sock, buffers)
+    assert bytes(sock.sent) == b'abcdefghij'
+    assert sock.calls == 3
+
+
+def test_send_buffers_over_socket():
+    left, right = socket.socketpair()
+    try:
+        framer = make_framer(LINE)
+        send_buffers(left, [encode_shared('하나'), encode_shared('둘')])
+        assert framer.feed(right.recv(1024)) == ['하나', '둘']
+    finally:
+        left.close()
+        right.close()
@@ -0,0 +1,129 @@
+# coding: utf-8
+"""
+history.py 테스트: python -m pytest no2
+"""
+
+import os
+
+import pytest
+
+from history import MessageHistory, encode_record, iter_records
+
+
+def open_history(directory, **options):
+    # 백그라운드 flush는 테스트가 직접 부르므로 길게
+    options.setdefault('flush_interval', 60)
+    options.setdefault('fsync', False)
+    return MessageHistory(str(directory), **options)
+
+
+def test_iter_records_stops_at_torn_tail():
+    data = encode_record('방', '하나') + encode_record('방', '둘')
+    records = list(iter_records(data + encode_record('방', '셋')[:-1]))
+    assert [message for _offset, _room, message in records] == ['하나', '둘']
+    corrupted = bytearray(data)
+    corrupted[-1] ^= 0xff
+    assert [message for _offset, _room, message in iter_records(corrupted)] == ['하나']
+
+
+def test_recent_from_ring_and_disk(tmp_path):
+    history = open_history(tmp_path, ring_size=3)
+    try:
+        for i in range(10):
+            history.append('lobby', 'm{}'.format(i))
+            if i == 5:
+                history.flush()
+        history.append('other', '다른 방')
+        # m6~m9는 아직 대기 중, 링 버퍼에는 m7~m9
+        assert history.recent('lobby', 2) == ['m8', 'm9']
+        assert history.recent('lobby', 6) == ['m4', 'm5', 'm6', 'm7', 'm8', 'm9']
+        history.flush()
+        assert history.recent('lobby', 100) == ['m{}'.format(i) for i in range(10)]
+        assert history.recent('other', 5) == ['다른 방']
+        assert history.recent('없는 방', 5) == []
+    finally:
+        history.close()
+
+
+def test_recover_after_restart(tmp_path):
+    history = open_history(tmp_path, ring_size=5)
+    for i in range(20):
+        history.append('lobby', 'm{}'.format(i))
+    history.close()
+
+    # 쓰다가 끊긴 꼬리는 버리고 복구
+    segment = os.path.join(str(tmp_path), 'segment-000001.log')
+    with open(segment, 'ab') as f:
+        f.write(encode_record('lobby', '잘린 메시지')[:-3])
+
+    history = open_history(tmp_path, ring_size=5)
+    try:
+        assert history.recent('lobby', 3) == ['m17', 'm18', 'm19']
+        assert history.recent('lobby', 100) == ['m{}'.format(i) for i in range(20)]
+        history.append('lobby', 'm20')
+        history.flush()
+    finally:
+        history.close()
+
+    history = open_history(tmp_path, ring_size=5)
+    try:
+        assert history.recent('lobby', 2) == ['m19', 'm20']
+    finally:
+        history.close()
+
+
+def test_rotation_and_compaction_keep_recent(tmp_path):
+    history = open_history(tmp_path, ring_size=2, segment_bytes=200, max_segments=3,
+                           retain_per_room=5)
+    try:
+        for i in range(60):
+            history.append('a', 'a{:02d}'.format(i))
+            history.append('b', 'b{:02d}'.format(i))
+            history.flush()
+        assert len(history.segments) <= 3
+        recent = history.recent('a', 100)
+        # 합쳐진 세그먼트에는 방마다 최근 5개만 남고, 그 뒤 세그먼트의 기록은 모두 남음
+        assert recent == sorted(recent)
+        assert recent[-1] == 'a59'
+        assert len(recent) < 60
+    finally:
+        history.close()
+
+    history = open_history(tmp_path, ring_size=2)
+    try:
+        assert history.recent('a', 100) == recent
+    finally:
+        history.close()
+
+
+class SimulatedCrash(Exception):
+    """compaction 도중 프로세스가 죽은 상황 재현."""
+
+
+def test_crash_during_compaction_does_not_duplicate(tmp_path, monkeypatch):
+    history = open_history(tmp_path, ring_size=2, segment_bytes=200, max_segments=3,
+                           retain_per_room=1000)
+
+    def crash(target_id):
+        raise SimulatedCrash()
+
+    # 합친 파일을 다 쓰고('.merged') 이전 세그먼트를 지우기 전에 죽음
+    monkeypatch.setattr(history, '_finish_merge', crash)
+    sent = []
+    with pytest.raises(SimulatedCrash):
+        for i in range(100):
+            sent.append('m{:02d}'.format(i))
+            history.append('a', sent[-1])
+            history.flush()
+    history._stop.set()
+    history.active.close()
+    # 다 쓰지 못한 compaction 파일도 남아 있는 경우
+    with open(os.path.join(str(tmp_path), 'segment-000099.log.merging'), 'wb') as f:
+        f.write(encode_record('a', '버려야 할 레코드'))
+
+    history = open_history(tmp_path, ring_size=2)
+    try:
+        assert history.recent('a', 1000) == sent
+        assert not [name for name in os.listdir(str(tmp_path)) if not name.endswith('.log')]
+    finally:
+        history.close()
@@ -0,0 +1,58 @@
+# coding: utf-8
+"""
+outbox.py 테스트: python -m pytest no2
+"""
+
+import pytest
+
+from outbox import DISCONNECT, DROP_OLDEST, Outbox
+
+
+def test_drop_oldest_keeps_newest():
+    outbox = Outbox(3, DROP_OLDEST)
+    for i in range(5):
+        assert outbox.put(i)
+    assert outbox.dropped == 2
+    assert outbox.drain() == [2, 3, 4]
+    assert len(outbox) == 0
+
+
+def test_disconnect_aborts_slow_client():
+    aborted = []
+    outbox = Outbox(2, DISCONNECT, on_abort=lambda: aborted.append(True))
+    assert outbox.put('a')
+    assert outbox.put('b')
+    assert not outbox.put('c')
+    assert aborted == [True]
+    assert outbox.aborted and outbox.finished()
+    assert outbox.drain() == []
+    # 이미 끊긴 뒤에는 on_abort를 다시 부르지 않음
+    outbox.abort()
+    assert aborted == [True]
+
+
+def test_notify_once_until_drain():
+    """브로드캐스트가 몰려도 writer는 drain 전까지 한 번만 깨움."""
+    wakeups = []
+    outbox = Outbox(10, notify=lambda: wakeups.append(True))
+    outbox.put('a')
+    outbox.put('b')
+    assert len(wakeups) == 1
+    assert outbox.drain() == ['a', 'b']
+    outbox.put('c')
+    assert len(wakeups) == 2
+
+
+def test_close_sends_remaining_messages():
+    outbox = Outbox(10)
+    outbox.put('마지막')
+    outbox.close()
+    assert not outbox.put('닫힌 뒤')
+    assert not outbox.finished()
+    assert outbox.drain() == ['마지막']
+    assert outbox.finished()
+
+
+def test_unknown_policy():
+    with pytest.raises(ValueError):
+        Outbox(10, 'block')
@@ -0,0 +1,53 @@
+# coding: utf-8
+"""
+timer_wheel.py 테스트: python -m pytest no2
+"""
+
+from timer_wheel import TimerWheel
+
+
+def test_expires_after_deadline():
+    wheel = TimerWheel(tick=1.0, slots=8, now=0)
+    wheel.schedule('a', 2.5)
+    assert wheel.advance(2.0) == []
+    assert wheel.advance(3.0) == ['a']
+    assert 'a' not in wheel
+    assert len(wheel) == 0
+
+
+def test_reschedule_and_cancel():
+    wheel = TimerWheel(tick=1.0, slots=8, now=0)
+    wheel.schedule('a', 1.5)
+    wheel.schedule('b', 1.5)
+    # 하트비트를 받으면 마감 시각을 뒤로 미룸
+    wheel.schedule('a', 4.5)
+    wheel.cancel('b')
+    wheel.cancel('없는 키')
+    assert wheel.advance(2.0) == []
+    assert wheel.advance(5.0) == ['a']
+
+
+def test_deadline_beyond_one_lap():
+    """슬롯 수보다 먼 마감 시각은 한 바퀴 돈 뒤에 만료."""
+    wheel = TimerWheel(tick=1.0, slots=4, now=0)
+    wheel.schedule('far', 10.5)
+    for now in range(1, 11):
+        assert wheel.advance(now) == []
+    assert wheel.advance(11) == ['far']
+
+
+def test_advance_after_long_pause():
+    """여러 바퀴만큼 밀려도 지난 키는 모두 한 번에 만료."""
+    wheel = TimerWheel(tick=1.0, slots=4, now=0)
+    for i in range(10):
+        wheel.schedule(i, i + 0.5)
+    wheel.schedule('later', 100.5)
+    assert sorted(wheel.advance(50)) == list(range(10))
+    assert list(wheel.where) == ['later']
+
+
+def test_past_deadline_expires_on_next_tick():
+    wheel = TimerWheel(tick=1.0, slots=8, now=10)
+    wheel.schedule('late', 3.0)
+    assert wheel.advance(10.5) == []
+    assert wheel.advance(11.0) == ['late']
@@ -0,0 +1,67 @@
+# coding: utf-8
+"""
+해시 타이머 휠 (hashed timer wheel)
+- 마감 시각을 tick 단위로 나눈 슬롯에 넣고, 시간이 지나면 지나간 슬롯만 확인
+- 등록/취소/재등록은 dict 연산 한 번씩이라 O(1). 클라이언트 10만 명이어도
+  타이머나 스레드를 클라이언트마다 만들 필요가 없음
+- 슬롯 수보다 먼 마감 시각은 같은 슬롯에 들어가고, 휠이 한 바퀴 돌 때마다 다시 확인
+"""
+
+import time
+
+
+class TimerWheel:
+    """키마다 마감 시각 하나를 관리하는 타이머 휠. 스레드 안전하지 않음 (호출 쪽에서 락)."""
+    def __init__(self, tick=1.0, slots=512, now=None):
+        self.tick = tick
+        self.slots = [{} for _ in range(slots)]  # 슬롯 -> {키: 마감 시각}
+        self.where = {}  # 키 -> 슬롯 번호
+        self.current = int((time.monotonic() if now is None else now) / tick)
+
+    def __len__(self):
+        return len(self.where)
+
+    def __contains__(self, key):
+        return key in self.where
+
+    def schedule(self, key, deadline):
+        """키의 마감 시각을 (재)등록."""
+        self.cancel(key)
+        # 마감 시각 이후 첫 tick 경계에서 확인되도록 배치 (이미 지난 tick이면 다음 tick)
+        tick_no = max(int(deadline / self.tick) + 1, self.current + 1)
+        index = tick_no % len(self.slots)
+        self.slots[index][key] = deadline
+        self.where[key] = index
+
+    def cancel(self, key):
+        """키의 타이머 제거. 없으면 무시."""
+        index = self.where.pop(key, None)
+        if index is not None:
+            del self.slots[index][key]
+
+    def advance(self, now=None):
+        """현재 시각까지 지나간 슬롯을 확인해 만료된 키 리스트를 반환 (만료된 키는 제거됨)."""
+        if now is None:
+            now = time.monotonic()
+        target = int(now / self.tick)
+        if target <= self.current:
+            return []
+        size = len(self.slots)
+        if target - self.current >= size:
+            # 한 바퀴 넘게 밀렸으면 모든 슬롯을 한 번씩만 확인
+            indexes = range(size)
+        else:
+            indexes = [t % size for t in range(self.current + 1, target + 1)]
+        self.current = target
+
+        expired = []
+        for index in indexes:
+            slot = self.slots[index]
+            if not slot:
+                continue
+            for key, deadline in list(slot.items()):
+                if deadline <= now:
+                    del slot[key]
+                    del self.where[key]
+                    expired.append(key)
+        return expired
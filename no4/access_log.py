@@ -0,0 +1,157 @@
+# coding: utf-8
+"""
+접근 로그 (비차단, 버퍼링)
+- 요청 스레드는 기록 하나(튜플)를 대기열(deque)에 넣기만 함 → 출력/파일 쓰기로 막히지 않음
+  (deque.append/popleft는 GIL 아래에서 원자적이라 락 없음)
+- 백그라운드 스레드가 flush_interval마다 모아서 한 번에 씀
+  - 파일: JSON 한 줄씩 (시각, 클라이언트 IP, 메서드, 경로, 상태 코드, 바이트, 처리 시간,
+    위치 조회를 켰으면 위치)
+    max_bytes를 넘으면 access.log → access.log.1 → ... 로 교체 (backups개 보관)
+    교체에 실패하면 stderr에 알리고 지금 파일에 계속 씀
+  - 화면: 과제 형식('접속 시간: ..., 접속 클라이언트 IP: ...')을 모아서 한 번에 출력
+- 대기열이 가득 차면 요청 스레드를 막지 않고 버린 뒤 개수만 세어 로그에 남김
+- 시각 문자열은 초가 바뀔 때만 새로 만듦 (요청마다 strftime 하지 않음)
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+
+_cached_second = (None, '')  # (초, 시각 문자열) - 한 번에 바꿔 스레드 간에 어긋나지 않게
+
+
+def _location_text(location):
+    """(국가, 지역, 도시) → 'KR/Seoul/Seoul'. 모르면 None."""
+    if not location:
+        return None
+    return '/'.join(part for part in location if part) or None
+
+
+def timestamp():
+    """현재 시각 문자열 ('%Y-%m-%d %H:%M:%S'). 같은 초 안에서는 캐시된 값."""
+    global _cached_second
+    second = int(time.time())
+    cached, text = _cached_second
+    if cached != second:
+        text = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(second))
+        _cached_second = (second, text)
+    return text
+
+
+class AccessLog:
+    """요청 스레드 → 대기열 → 백그라운드 writer 구조의 접근 로그."""
+    def __init__(self, path='access.log', console=True, max_bytes=10 * 1024 * 1024,
+                 backups=5, capacity=65536, flush_interval=0.5):
+        self.path = path
+        self.console = console
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.capacity = capacity
+        self.flush_interval = flush_interval
+        self.records = deque()
+        self.dropped = 0  # 대기열이 가득 차서 버린 기록 수 (아직 로그에 남기지 않은 것)
+        self.rotate_at = max_bytes  # 파일이 이 크기를 넘으면 교체
+        self.file = None
+        if path:
+            self.file = open(path, 'a', encoding='utf-8')
+        self._stop = threading.Event()
+        self._writer = threading.Thread(target=self._write_loop, daemon=True)
+        self._writer.start()
+
+    def log(self, client_ip, method, path, status, size, latency, location=None):
+        """기록 하나 추가 (요청 스레드에서 호출). 블로킹 없음. 문자열 만들기는 writer가 함."""
+        if len(self.records) >= self.capacity:
+            self.dropped += 1
+            return
+        self.records.append((timestamp(), client_ip, method, path, status, size, latency,
+                             location))
+
+    def flush(self):
+        """쌓인 기록을 한 번에 씀."""
+        records = self.records
+        batch = []
+        while records:
+            batch.append(records.popleft())
+        dropped, self.dropped = self.dropped, 0
+        if not batch and not dropped:
+            return
+        if self.file is not None:
+            lines = []
+            for ts, ip, method, path, status, size, latency, location in batch:
+                record = {'time': ts, 'ip': ip, 'method': method, 'path': path,
+                          'status': status, 'bytes': size,
+                          'latency_ms': round(latency * 1000, 3)}
+                if location is not None:
+                    record['location'] = _location_text(location)
+                lines.append(json.dumps(record, ensure_ascii=False) + '\n')
+            if dropped:
+                lines.append(json.dumps({'time': timestamp(), 'dropped': dropped}) + '\n')
+            self.file.write(''.join(lines))
+            self.file.flush()
+            if self.file.tell() >= self.rotate_at:
+                self._rotate()
+        if self.console:
+            lines = []
+            for ts, ip, method, path, status, _size, _latency, location in batch:
+                where = _location_text(location)
+                lines.append('접속 시간: {}, 접속 클라이언트 IP: {}{}, {} {} {}\n'.format(
+                    ts, ip, ' ({})'.format(where) if where else '', method, path, status))
+            if dropped:
+                lines.append('(접근 로그 {}건 생략)\n'.format(dropped))
+            sys.stdout.write(''.join(lines))
+            sys.stdout.flush()
+
+    def _rotate(self):
+        """
+        access.log → access.log.1, access.log.1 → access.log.2 ... (가장 오래된 것은 삭제).
+        이름을 바꾸는 동안 지금 파일은 열어 두고, 새 파일을 연 뒤에 바꿔 끼움.
+        실패하면 stderr에 알리고 지금 파일에 계속 쓰며, max_bytes만큼 더 쓴 뒤 다시 시도.
+        """
+        try:
+            for index in range(self.backups - 1, 0, -1):
+                source = '{}.{}'.format(self.path, index)
+                if os.path.exists(source):
+                    os.replace(source, '{}.{}'.format(self.path, index + 1))
+            if self.backups > 0:
+                os.replace(self.path, self.path + '.1')
+            else:
+                os.remove(self.path)
+            try:
+                new_file = open(self.path, 'a', encoding='utf-8')
+            except OSError:
+                if self.backups > 0:
+                    # 계속 쓰는 파일이 원래 이름으로 보이도록 되돌림 (할 수 있는 만큼)
+                    try:
+                        os.replace(self.path + '.1', self.path)
+                    except OSError:
+                        pass
+                raise
+        except OSError as exc:
+            self.rotate_at = self.file.tell() + self.max_bytes
+            sys.stderr.write('접근 로그 교체 실패: {} ({}에 계속 기록)\n'.format(exc, self.path))
+            sys.stderr.flush()
+            return
+        old_file, self.file = self.file, new_file
+        old_file.close()
+        self.rotate_at = self.max_bytes
+
+    def _write_loop(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except (OSError, ValueError):
+                # 디스크/출력 오류가 나도 요청 처리는 계속 (로그만 실패)
+                pass
+
+    def close(self):
+        """남은 기록을 쓰고 파일 닫기."""
+        self._stop.set()
+        self._writer.join()
+        self.flush()
+        if self.file is not None:
+            self.file.close()
+            self.file = None
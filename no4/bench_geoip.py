@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# coding: utf-8
+"""
+IP 위치 조회 벤치마크 (geoip.py)
+- 임의의 IPv4 범위 N개(+ IPv6 범위 N/10개)로 표를 만든 뒤
+  - 적재 시간과 범위 100만 개당 메모리 (범위 표 배열 크기, 프로세스 최대 RSS)
+  - 캐시 없이(_lookup) / LRU 캐시 적중 시(lookup) 초당 조회 수와 1회 평균 시간
+- CSV 파일을 지정하면 그 파일을 적재해서 측정
+
+실행: python bench_geoip.py [--ranges 1000000] [--lookups 200000] [--csv 파일]
+"""
+
+import argparse
+import ipaddress
+import random
+import resource
+import time
+
+from geoip import GeoIP
+
+
+COUNTRIES = ('KR', 'US', 'JP', 'DE', 'FR', 'GB', 'CN', 'BR', 'IN', 'AU')
+
+
+def build_random(count, seed=1):
+    """겹치지 않는 임의 IPv4 범위 count개와 IPv6 범위 count//10개로 조회기 생성."""
+    rng = random.Random(seed)
+    geo = GeoIP()
+    step = (1 << 32) // count
+    for i in range(count):
+        start = i * step
+        end = start + rng.randrange(1, step)
+        geo.add_range(start, end, rng.choice(COUNTRIES), 'region{}'.format(i % 50))
+    step6 = (1 << 128) // max(1, count // 10)
+    for i in range(count // 10):
+        start = max(i * step6, 1 << 33)  # IPv4와 겹치지 않게
+        geo.add_range(start, start + (1 << 80), rng.choice(COUNTRIES))
+    geo.finish()
+    return geo
+
+
+def random_ips(count, seed=2):
+    """조회용 주소 문자열 (IPv4 90%, IPv6 10%)."""
+    rng = random.Random(seed)
+    ips = []
+    for _ in range(count):
+        if rng.random() < 0.9:
+            ips.append(str(ipaddress.IPv4Address(rng.getrandbits(32))))
+        else:
+            ips.append(str(ipaddress.IPv6Address(rng.getrandbits(128))))
+    return ips
+
+
+def rate(func, ips):
+    """(초당 조회 수, 1회 평균 µs)."""
+    start = time.perf_counter()
+    for ip in ips:
+        func(ip)
+    elapsed = time.perf_counter() - start
+    return len(ips) / elapsed, elapsed / len(ips) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description='IP 위치 조회 벤치마크')
+    parser.add_argument('--ranges', type=int, default=1000000, help='임의로 만들 IPv4 범위 수')
+    parser.add_argument('--lookups', type=int, default=200000, help='조회 횟수')
+    parser.add_argument('--csv', help='임의 범위 대신 적재할 CSV 파일')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    geo = GeoIP.from_csv(args.csv) if args.csv else build_random(args.ranges)
+    load_time = time.perf_counter() - start
+    # 리눅스의 ru_maxrss 단위는 KB
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    ranges = len(geo)
+    print('범위 {:,}개 적재: {:.2f}초'.format(ranges, load_time))
+    print('메모리: 범위 표 {:.1f} MB (100만 개당 {:.1f} MB), 프로세스 최대 RSS {:.1f} MB'.format(
+        geo.nbytes() / 1e6, geo.nbytes() / ranges * 1e6 / 1e6, max_rss))
+
+    ips = random_ips(args.lookups)
+    per_sec, micros = rate(geo._lookup, ips)
+    print('캐시 없음   : {:>12,.0f}회/초  ({:.2f} µs/회)'.format(per_sec, micros))
+
+    # 재방문: 주소 1천 개를 반복 조회 (첫 조회 후에는 캐시 적중)
+    repeat = (ips[:1000] * (args.lookups // 1000 + 1))[:args.lookups]
+    per_sec, micros = rate(geo.lookup, repeat)
+    info = geo.lookup.cache_info()
+    print('LRU 캐시    : {:>12,.0f}회/초  ({:.2f} µs/회, 적중 {:,} / 실패 {:,})'.format(
+        per_sec, micros, info.hits, info.misses))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+# coding: utf-8
+"""
+HTTP 서버 벤치마크 (외부 도구 없이 localhost에서 실행)
+- server.py를 실행 모드별로 하위 프로세스로 띄우고, 같은 조건의 부하를 걸어 비교
+  (--url로 이미 실행 중인 서버를 지정하면 그 서버만 측정)
+- 시나리오
+  small      : 캐시된 작은 페이지 (index.html)
+  large      : 큰 파일 (sendfile 경로, 기본 8 MiB: 캐시 한도 max_entry_bytes보다 커야 함)
+  revalidate : If-None-Match로 다시 확인 → 304
+  notfound   : 없는 경로 → 404
+- 연결 방식: keep-alive (연결 재사용) / close (요청마다 새 연결)
+- 보고: 초당 요청 수, 지연 p50/p90/p99/max, 오류 수, 서버 CPU 시간과 RSS
+- '--json'으로 결과를 저장해 커밋 간 비교 (커밋 해시와 설정 포함)
+
+실행 예:
+  python bench_http.py --modes pool,threading --duration 5 --concurrency 32 --json result.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.parse import urlsplit
+
+from static_cache import StaticCache
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SCENARIOS = ('small', 'large', 'revalidate', 'notfound')
+CONNECTIONS = ('keep-alive', 'close')
+MODES = ('pool', 'threading', 'single')
+# 서버 캐시에 올라가는 파일의 최대 크기 (이 크기 이하면 large도 메모리에서 전송됨)
+CACHE_MAX_ENTRY_BYTES = StaticCache().max_entry_bytes
+
+
+class Result:
+    """시나리오 한 번의 측정값."""
+    def __init__(self):
+        self.latencies = []
+        self.errors = 0
+        self.bytes = 0
+        self.statuses = {}
+
+    def summary(self, elapsed):
+        latencies = sorted(self.latencies)
+
+        def percentile(p):
+            if not latencies:
+                return 0.0
+            return latencies[min(len(latencies) - 1, int(len(latencies) * p / 100))]
+
+        return {
+            'requests': len(latencies),
+            'errors': self.errors,
+            'rps': len(latencies) / elapsed if elapsed else 0.0,
+            'bytes_per_sec': self.bytes / elapsed if elapsed else 0.0,
+            'statuses': {str(k): v for k, v in sorted(self.statuses.items())},
+            'latency_ms': {
+                'p50': percentile(50) * 1000,
+                'p90': percentile(90) * 1000,
+                'p99': percentile(99) * 1000,
+                'max': (latencies[-1] if latencies else 0.0) * 1000,
+            },
+        }
+
+
+async def read_response(reader, head_only=False):
+    """응답 하나를 읽어 (상태 코드, 본문 바이트 수, 서버가 연결을 닫는지) 반환."""
+    head = await reader.readuntil(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    status = int(lines[0].split()[1])
+    headers = {}
+    for line in lines[1:]:
+        name, sep, value = line.partition(':')
+        if sep:
+            headers[name.strip().lower()] = value.strip()
+    closing = headers.get('connection', '').lower() == 'close' or lines[0].startswith('HTTP/1.0')
+    length = int(headers.get('content-length', 0))
+    if head_only or status == 304 or length == 0:
+        return status, 0, closing
+    # 큰 본문은 나눠서 읽고 버림 (클라이언트 메모리 일정)
+    remaining = length
+    while remaining:
+        chunk = await reader.read(min(remaining, 1 << 20))
+        if not chunk:
+            raise ConnectionError('본문을 다 받기 전에 연결이 끊겼습니다.')
+        remaining -= len(chunk)
+    return status, length, closing
+
+
+def build_request(host, path, keep_alive, extra_headers=()):
+    lines = ['GET {} HTTP/1.1'.format(path), 'Host: {}'.format(host),
+             'Connection: {}'.format('keep-alive' if keep_alive else 'close')]
+    lines.extend(extra_headers)
+    return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+
+
+async def client_loop(host, port, request, keep_alive, end_time, result):
+    """한 클라이언트: end_time까지 같은 요청 반복."""
+    reader = writer = None
+    while time.monotonic() < end_time:
+        start = time.perf_counter()
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(host, port)
+            writer.write(request)
+            status, size, closing = await read_response(reader)
+        except (OSError, ConnectionError, asyncio.IncompleteReadError, ValueError, IndexError):
+            result.errors += 1
+            if writer is not None:
+                writer.close()
+            reader = writer = None
+            await asyncio.sleep(0.01)
+            continue
+        result.latencies.append(time.perf_counter() - start)
+        result.bytes += size
+        result.statuses[status] = result.statuses.get(status, 0) + 1
+        if closing or not keep_alive:
+            writer.close()
+            reader = writer = None
+    if writer is not None:
+        writer.close()
+
+
+async def fetch_etag(host, port, path):
+    """revalidate 시나리오용 ETag 얻기."""
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(build_request(host, path, False))
+    head = await reader.readuntil(b'\r\n\r\n')
+    writer.close()
+    for line in head.decode('latin-1').split('\r\n'):
+        name, _, value = line.partition(':')
+        if name.strip().lower() == 'etag':
+            return value.strip()
+    return None
+
+
+async def run_scenario(host, port, scenario, connection, concurrency, duration, large_path):
+    keep_alive = connection == 'keep-alive'
+    extra = ()
+    if scenario == 'small':
+        path = '/index.html'
+    elif scenario == 'large':
+        path = large_path
+    elif scenario == 'revalidate':
+        path = '/index.html'
+        etag = await fetch_etag(host, port, path)
+        extra = ('If-None-Match: {}'.format(etag),) if etag else ()
+    else:
+        path = '/no-such-file-{}.html'.format(os.getpid())
+    request = build_request(host, path, keep_alive, extra)
+    result = Result()
+    start = time.monotonic()
+    end_time = start + duration
+    await asyncio.gather(*(client_loop(host, port, request, keep_alive, end_time, result)
+                           for _ in range(concurrency)))
+    return result.summary(time.monotonic() - start)
+
+
+def read_process(pid):
+    """(CPU 초 = utime + stime, RSS KB). /proc가 없으면 (None, None)."""
+    try:
+        with open('/proc/{}/stat'.format(pid)) as f:
+            fields = f.read().rsplit(')', 1)[1].split()
+        ticks = os.sysconf('SC_CLK_TCK')
+        cpu = (int(fields[11]) + int(fields[12])) / ticks
+        with open('/proc/{}/status'.format(pid)) as f:
+            rss = next(int(line.split()[1]) for line in f if line.startswith('VmRSS:'))
+        return cpu, rss
+    except (OSError, ValueError, IndexError, StopIteration):
+        return None, None
+
+
+def wait_for_port(host, port, timeout=10.0):
+    """서버가 접속을 받을 때까지 대기."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection((host, port), timeout=0.5).close()
+            return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError('서버가 {}:{}에서 응답하지 않습니다.'.format(host, port))
+
+
+def make_doc_root(large_bytes):
+    """index.html과 큰 파일을 넣은 임시 문서 루트."""
+    root = tempfile.mkdtemp(prefix='bench_http_')
+    shutil.copy(os.path.join(HERE, 'static', 'index.html'), os.path.join(root, 'index.html'))
+    with open(os.path.join(root, 'large.bin'), 'wb') as f:
+        f.write(os.urandom(large_bytes))
+    return root
+
+
+def bench_target(host, port, pid, args):
+    """한 서버에 대해 모든 시나리오 x 연결 방식 측정."""
+    results = {}
+    for scenario in args.scenarios:
+        for connection in args.connections:
+            cpu_before, _ = read_process(pid) if pid else (None, None)
+            summary = asyncio.run(run_scenario(host, port, scenario, connection,
+                                               args.concurrency, args.duration, '/large.bin'))
+            cpu_after, rss = read_process(pid) if pid else (None, None)
+            summary['server_cpu_sec'] = (cpu_after - cpu_before
+                                         if cpu_before is not None and cpu_after is not None
+                                         else None)
+            summary['server_rss_kb'] = rss
+            key = '{}/{}'.format(scenario, connection)
+            results[key] = summary
+            latency = summary['latency_ms']
+            print('  {:<22} {:>9,.0f} req/s  p50 {:>7.2f}ms  p99 {:>8.2f}ms  오류 {:>5}  '
+                  'CPU {}  RSS {}'.format(
+                      key, summary['rps'], latency['p50'], latency['p99'], summary['errors'],
+                      '-' if summary['server_cpu_sec'] is None
+                      else '{:.2f}s'.format(summary['server_cpu_sec']),
+                      '-' if rss is None else '{:,}KB'.format(rss)))
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=HERE,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='HTTP 서버 벤치마크')
+    parser.add_argument('--modes', default='pool,threading',
+                        help='측정할 server.py 모드 (쉼표로 구분: {})'.format(','.join(MODES)))
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS),
+                        help='시나리오 (쉼표로 구분: {})'.format(','.join(SCENARIOS)))
+    parser.add_argument('--connections', default=','.join(CONNECTIONS),
+                        help='연결 방식 (keep-alive,close)')
+    parser.add_argument('--concurrency', type=int, default=32, help='동시 클라이언트 수')
+    parser.add_argument('--duration', type=float, default=5.0, help='시나리오당 측정 시간(초)')
+    parser.add_argument('--large-bytes', type=int, default=8 * 1024 * 1024,
+                        help='큰 파일 크기 (캐시 한도 {:,}바이트보다 커야 sendfile 경로를 측정)'.format(
+                            CACHE_MAX_ENTRY_BYTES))
+    parser.add_argument('--port', type=int, default=18080, help='띄울 서버의 포트')
+    parser.add_argument('--url', help='이미 실행 중인 서버 (예: http://127.0.0.1:8080). '
+                                      '이 경우 문서 루트에 index.html과 large.bin이 있어야 함')
+    parser.add_argument('--server-pid', type=int, default=0, help='--url 서버의 pid (CPU/RSS 측정)')
+    parser.add_argument('--json', help='결과를 저장할 JSON 파일 경로')
+    args = parser.parse_args()
+    if args.large_bytes <= CACHE_MAX_ENTRY_BYTES:
+        parser.error('--large-bytes는 캐시 한도({:,}바이트)보다 커야 합니다.'.format(CACHE_MAX_ENTRY_BYTES))
+    args.scenarios = [s for s in args.scenarios.split(',') if s]
+    args.connections = [c for c in args.connections.split(',') if c]
+
+    report = {
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'config': {k: v for k, v in vars(args).items() if k != 'json'},
+        'results': {},
+    }
+
+    if args.url:
+        target = urlsplit(args.url)
+        print('대상: {}'.format(args.url))
+        report['results']['external'] = bench_target(
+            target.hostname, target.port or 80, args.server_pid, args)
+    else:
+        root = make_doc_root(args.large_bytes)
+        try:
+            for mode in [m for m in args.modes.split(',') if m]:
+                print('모드: {}'.format(mode))
+                server = subprocess.Popen(
+                    [sys.executable, os.path.join(HERE, 'server.py'), '--mode', mode,
+                     '--port', str(args.port), '--root', root, '--access-log', '', '--quiet'],
+                    cwd=HERE, stdout=subprocess.DEVNULL)
+                try:
+                    wait_for_port('127.0.0.1', args.port)
+                    report['results'][mode] = bench_target('127.0.0.1', args.port,
+                                                           server.pid, args)
+                finally:
+                    server.terminate()
+                    server.wait()
+        finally:
+            shutil.rmtree(root, ignore_errors=True)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
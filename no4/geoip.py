@@ -0,0 +1,186 @@
+# coding: utf-8
+"""
+오프라인 IP 위치 조회 (외부 API 호출 없음)
+- 'IP 범위 → 위치' CSV를 읽어 시작 주소 기준으로 정렬된 배열에 보관
+  CSV 형식: 시작,끝,국가[,지역[,도시]]  (주소는 '1.2.3.0' / '2001:db8::' 또는 정수)
+  '#'으로 시작하는 줄과 첫 줄의 머리글은 무시
+- 조회는 이진 탐색 (bisect) 한 번: 범위 수가 수백만이어도 비교 20여 번
+- 메모리: IPv4는 범위당 시작/끝/위치번호 array('I') 3개 = 12바이트,
+  IPv6는 시작/끝 16바이트씩 + 위치번호 = 36바이트. 위치 문자열은 중복 없이 한 번만 보관
+- 자주 오는 방문자는 LRU 캐시에서 바로 응답
+- '::ffff:1.2.3.4' 같은 IPv4 매핑 주소는 IPv4 표에서 찾음
+"""
+
+import bisect
+import csv
+import functools
+import socket
+from array import array
+
+
+def parse_address(text):
+    """
+    주소 문자열(또는 정수)을 (버전, 정수)로 변환. 잘못된 주소면 ValueError.
+    ipaddress 모듈보다 빠른 inet_pton 사용.
+    """
+    text = text.strip()
+    if text.isdigit():
+        value = int(text)
+        return (4 if value < 1 << 32 else 6), value
+    try:
+        if ':' in text:
+            value = int.from_bytes(socket.inet_pton(socket.AF_INET6, text), 'big')
+            # IPv4 매핑 주소 (::ffff:a.b.c.d)
+            if value >> 32 == 0xFFFF:
+                return 4, value & 0xFFFFFFFF
+            return 6, value
+        return 4, int.from_bytes(socket.inet_pton(socket.AF_INET, text), 'big')
+    except OSError:
+        raise ValueError('잘못된 IP 주소: {}'.format(text)) from None
+
+
+class _Keys16:
+    """16바이트 빅엔디언 값을 이어 붙인 bytearray를 bisect용 시퀀스로 보여 줌."""
+    __slots__ = ('data',)
+
+    def __init__(self, data):
+        self.data = data
+
+    def __len__(self):
+        return len(self.data) // 16
+
+    def __getitem__(self, index):
+        # 같은 길이의 빅엔디언 바이트는 사전순 비교 = 수 비교
+        return bytes(self.data[index * 16:index * 16 + 16])
+
+
+class _Table:
+    """한 주소 체계(IPv4 또는 IPv6)의 정렬된 범위 표."""
+    def __init__(self, version):
+        self.version = version
+        self.locations = array('I')  # 범위마다 위치 번호
+        if version == 4:
+            self.starts = array('I')
+            self.ends = array('I')
+        else:
+            self.starts = bytearray()
+            self.ends = bytearray()
+
+    def __len__(self):
+        return len(self.locations)
+
+    def append(self, start, end, location_id):
+        if self.version == 4:
+            self.starts.append(start)
+            self.ends.append(end)
+        else:
+            self.starts += start.to_bytes(16, 'big')
+            self.ends += end.to_bytes(16, 'big')
+        self.locations.append(location_id)
+
+    def _key(self, value):
+        return value if self.version == 4 else value.to_bytes(16, 'big')
+
+    def _keys(self, data):
+        return data if self.version == 4 else _Keys16(data)
+
+    def sort(self):
+        """시작 주소 순으로 정렬 (CSV가 이미 정렬돼 있으면 확인만 하고 넘어감)."""
+        count = len(self)
+        starts = self._keys(self.starts)
+        if all(starts[i] <= starts[i + 1] for i in range(count - 1)):
+            return
+        ends = self._keys(self.ends)
+        order = sorted(range(count), key=starts.__getitem__)
+        if self.version == 4:
+            new_starts = array('I', [starts[i] for i in order])
+            new_ends = array('I', [ends[i] for i in order])
+        else:
+            new_starts = bytearray(b''.join([starts[i] for i in order]))
+            new_ends = bytearray(b''.join([ends[i] for i in order]))
+        self.locations = array('I', [self.locations[i] for i in order])
+        self.starts, self.ends = new_starts, new_ends
+
+    def find(self, value):
+        """value를 포함하는 범위의 위치 번호. 없으면 None."""
+        key = self._key(value)
+        index = bisect.bisect_right(self._keys(self.starts), key) - 1
+        if index >= 0 and key <= self._keys(self.ends)[index]:
+            return self.locations[index]
+        return None
+
+    def nbytes(self):
+        """범위 표가 차지하는 메모리 (배열 본체 기준)."""
+        if self.version == 4:
+            size = (len(self.starts) + len(self.ends)) * self.starts.itemsize
+        else:
+            size = len(self.starts) + len(self.ends)
+        return size + len(self.locations) * self.locations.itemsize
+
+
+class GeoIP:
+    """IP → (국가, 지역, 도시) 조회기."""
+    def __init__(self, cache_size=65536):
+        self.tables = {4: _Table(4), 6: _Table(6)}
+        self.locations = []        # 위치 번호 -> (국가, 지역, 도시)
+        self._location_ids = {}    # (국가, 지역, 도시) -> 위치 번호 (적재 중에만 사용)
+        # 같은 방문자의 반복 조회는 캐시에서 (인스턴스마다 별도 캐시)
+        self.lookup = functools.lru_cache(maxsize=cache_size)(self._lookup)
+
+    @classmethod
+    def from_csv(cls, path, cache_size=65536):
+        """CSV 파일에서 범위 표 생성."""
+        geo = cls(cache_size)
+        with open(path, newline='', encoding='utf-8') as f:
+            for row in csv.reader(f):
+                if not row or row[0].startswith('#'):
+                    continue
+                try:
+                    geo.add_range(row[0], row[1], *row[2:5])
+                except (ValueError, IndexError):
+                    # 머리글이나 잘못된 줄은 건너뜀
+                    continue
+        geo.finish()
+        return geo
+
+    def add_range(self, start, end, country='', region='', city=''):
+        """범위 하나 추가 (주소 문자열 또는 정수). 다 추가한 뒤 finish() 호출."""
+        if isinstance(start, int):
+            version = end_version = 4 if end < 1 << 32 else 6
+        else:
+            version, start = parse_address(start)
+            end_version, end = parse_address(end)
+        if version != end_version or end < start:
+            raise ValueError('잘못된 범위: {} - {}'.format(start, end))
+        location = (country.strip(), region.strip(), city.strip())
+        location_id = self._location_ids.get(location)
+        if location_id is None:
+            location_id = self._location_ids[location] = len(self.locations)
+            self.locations.append(location)
+        self.tables[version].append(start, end, location_id)
+
+    def finish(self):
+        """적재 완료: 정렬하고 적재용 색인 해제."""
+        for table in self.tables.values():
+            table.sort()
+        self._location_ids = {}
+        self.lookup.cache_clear()
+
+    def __len__(self):
+        return sum(len(table) for table in self.tables.values())
+
+    def _lookup(self, ip):
+        """ip 문자열의 (국가, 지역, 도시). 범위에 없거나 잘못된 주소면 None."""
+        try:
+            version, value = parse_address(ip)
+        except ValueError:
+            return None
+        location_id = self.tables[version].find(value)
+        if location_id is None:
+            return None
+        return self.locations[location_id]
+
+    def nbytes(self):
+        """범위 표 메모리 (위치 문자열 제외)."""
+        return sum(table.nbytes() for table in self.tables.values())
+
@@ -3,71 +3,455 @@
 """
 HTTP 서버 과제
 - http.server 모듈 활용
-- 8080 포트에서 index.html 제공
+- 8080 포트에서 index.html 제공 (문서 루트 폴더의 파일 제공, '/'는 index.html)
+  문서 루트는 기본 static/ 폴더 (소스 파일과 접근 로그는 제공하지 않음)
 - 접속 시간, 클라이언트 IP 출력
 - 200 OK 헤더 전달
 - 보너스: IP 기반 위치 확인 (설명 주석 포함)
+- 동시 처리: 미리 만든 스레드 풀에서 연결을 처리 (느린 클라이언트 하나가 다른 요청을 막지 않음)
+  'python server.py --mode pool|threading|single'
+- 정적 파일 캐시 (static_cache.py): 인코딩된 본문 + ETag/Last-Modified를 메모리에 두고
+  If-None-Match / If-Modified-Since 요청에는 304로 응답
+- 큰 파일은 메모리에 올리지 않고 sendfile로 전송 (다운로드 크기와 관계없이 메모리 일정)
+- Range 요청 (이어받기, 동영상 탐색): 206 Partial Content / 416
+- 문서 루트 밖의 경로(../, 루트 밖을 가리키는 심볼릭 링크)는 404
+- 압축: 캐시에 미리 만들어 둔 gzip/brotli 변형 중 Accept-Encoding에 맞는 것을 전송 (Vary 포함)
+- HTTP/1.1 지속 연결(keep-alive): 한 연결에서 여러 요청(파이프라이닝 포함)을 차례로 처리.
+  모든 응답에 Content-Length, 유휴 시간 초과와
+  연결당 최대 요청 수를 넘으면 연결을 닫음. '--no-keep-alive'면 예전처럼 HTTP/1.0
+  pool 모드에서 스레드를 기다리는 연결이 있으면 유휴 연결을 바로 닫아 스레드를 돌려줌
+- 접근 로그 (access_log.py): 요청 스레드는 대기열에 넣기만 하고 백그라운드 스레드가
+  모아서 파일(JSON 줄, 크기별 교체)과 화면에 기록. 기본 stderr 요청 로그는 끔
+- 보너스 (IP 위치 확인): 외부 API 대신 로컬 'IP 범위 → 위치' CSV를 '--geoip'로 지정하면
+  요청마다 위치를 찾아 접근 로그에 남김 (geoip.py, 이진 탐색 + LRU 캐시)
 """
 
-from http.server import HTTPServer, BaseHTTPRequestHandler
-from datetime import datetime
+import argparse
+import os
+import select
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import HTTPServer, BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlsplit
+
+from access_log import AccessLog
+from geoip import GeoIP
+from static_cache import StaticCache
 
 
 HOST = '0.0.0.0'
 PORT = 8080
 ENCODING = 'utf-8'
 INDEX_FILE = 'index.html'
+HERE = os.path.dirname(os.path.abspath(__file__))
+# 제공할 문서 루트 폴더 (--root). 작업 폴더 전체(소스, 로그)가 노출되지 않도록 전용 폴더
+DOC_ROOT = os.path.join(HERE, 'static')
+# 스레드 풀 크기 (pool 모드). keep-alive 연결은 유휴 시간 동안 스레드 하나를 차지하므로
+# 스레드를 기다리는 연결이 생기면 유휴 연결은 KEEPALIVE_TIMEOUT을 기다리지 않고 닫음
+WORKERS = 32
+# 지속 연결: 이 시간(초) 동안 다음 요청이 없거나, 요청을 이만큼 처리하면 연결을 닫음
+KEEPALIVE_TIMEOUT = 5.0
+# 다음 요청을 기다리는 동안 풀이 꽉 찼는지 확인하는 간격(초)
+IDLE_POLL_INTERVAL = 0.1
+MAX_KEEPALIVE_REQUESTS = 1000
+# 접근 로그 파일 (빈 문자열이면 파일에 남기지 않음)과 화면 출력 여부
+# 문서 루트 밖에 두고, 문서 루트 안에 지정하더라도 제공하지 않음 (is_access_log)
+ACCESS_LOG_FILE = os.path.join(HERE, 'access.log')
+ACCESS_LOG_CONSOLE = True
+
+# 파일 경로 -> 응답 본문/검증 헤더 캐시 (모든 요청 스레드가 공유)
+CACHE = StaticCache()
+# 접근 로그 (run_server()에서 생성)
+ACCESS_LOG = None
+# IP 위치 조회기 ('--geoip'로 CSV를 지정했을 때만)
+GEOIP = None
+
+
+class RangeNotSatisfiable(Exception):
+    """요청한 범위가 파일 크기를 벗어남 (416)."""
+
+
+def parse_range(header, size):
+    """
+    'Range: bytes=시작-끝' 헤더를 (start, end) (end 포함)로 해석.
+    형식이 틀렸거나 범위가 여러 개면 None (전체를 200으로 응답),
+    파일 크기를 벗어나면 RangeNotSatisfiable.
+    """
+    unit, _, spec = header.partition('=')
+    if unit.strip().lower() != 'bytes' or ',' in spec:
+        return None
+    first, sep, last = spec.strip().partition('-')
+    if not sep:
+        return None
+    try:
+        if not first:
+            # 'bytes=-N': 마지막 N바이트
+            suffix = int(last)
+            if suffix == 0:
+                raise RangeNotSatisfiable()
+            return max(0, size - suffix), size - 1
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable()
+    if start < 0 or end < start:
+        return None
+    return start, min(end, size - 1)
+
+
+def is_access_log(full):
+    """접근 로그 파일이나 교체된 이전 로그(access.log.1 ...)인지 (클라이언트 IP가 있으므로 제공하지 않음)."""
+    if not ACCESS_LOG_FILE:
+        return False
+    log_path = os.path.realpath(ACCESS_LOG_FILE)
+    if full == log_path:
+        return True
+    suffix = full[len(log_path) + 1:]
+    return full.startswith(log_path + '.') and suffix.isdigit()
+
+
+def resolve_path(url_path):
+    """
+    요청 경로를 문서 루트 안의 실제 파일 경로로 변환. 루트 밖이거나 접근 로그면 None.
+    쿼리 문자열은 버리고, 심볼릭 링크까지 풀어서(realpath) 비교하므로 링크로 루트를 빠져나가는 것도 막음.
+    (결과를 캐시하지 않음: 링크나 폴더가 바뀐 뒤 예전 결과로 루트 밖 파일을 내보내지 않도록 요청마다 확인)
+    """
+    path = unquote(urlsplit(url_path).path)
+    if '\x00' in path:
+        return None
+    if path.endswith('/'):
+        path += INDEX_FILE
+    root = os.path.realpath(DOC_ROOT)
+    full = os.path.realpath(os.path.join(root, path.lstrip('/')))
+    if full != root and not full.startswith(root + os.sep):
+        return None
+    if is_access_log(full):
+        return None
+    return full
 
 
 class MyRequestHandler(BaseHTTPRequestHandler):
     """HTTP 요청을 처리하는 핸들러 클래스."""
+    # HTTP/1.1: 응답 후 연결을 유지하고 같은 연결의 다음 요청을 읽음 (configure()에서 변경)
+    protocol_version = 'HTTP/1.1'
+    # 다음 요청을 기다리는 최대 시간. 넘으면 handle_one_request가 연결을 닫음
+    timeout = KEEPALIVE_TIMEOUT
+    # 헤더와 본문을 따로 write해도 Nagle + 지연 ACK로 수십 ms씩 기다리지 않도록
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        self.requests_handled = 0
+
+    def handle_one_request(self):
+        """요청 하나 처리 후 접근 로그에 기록 (상태 코드, 본문 바이트, 처리 시간)."""
+        self.status_code = None
+        self.body_bytes = 0
+        self.request_start = None
+        if not self.wait_for_request():
+            self.close_connection = True
+            return
+        super().handle_one_request()
+        # 요청 줄과 헤더를 끝까지 해석한 요청만 기록 (request_start는 parse_request가 설정)
+        if self.request_start is not None and self.status_code is not None and ACCESS_LOG is not None:
+            client_ip = self.client_address[0]
+            location = GEOIP.lookup(client_ip) if GEOIP is not None else None
+            ACCESS_LOG.log(client_ip, self.command, self.path, self.status_code,
+                           self.body_bytes, time.perf_counter() - self.request_start, location)
+
+    def wait_for_request(self):
+        """
+        pool 모드에서 다음 요청을 기다림. 요청(또는 연결 끊김)이 오면 True,
+        유휴 시간이 지나거나 풀이 꽉 차 다른 연결이 스레드를 기다리면 False (연결을 닫음).
+        읽기 버퍼에 남은 요청(파이프라이닝)은 기다리지 않음.
+        """
+        busy = getattr(self.server, 'busy', None)
+        if busy is None:
+            # 다른 모드는 소켓 timeout으로 유휴 시간만 제한
+            return True
+        deadline = time.monotonic() + self.timeout if self.timeout else None
+        self.connection.settimeout(0)
+        try:
+            while True:
+                # 논블로킹 소켓이라 버퍼나 소켓에 데이터가 없으면 바로 b''
+                if self.rfile.peek(1):
+                    return True
+                wait = IDLE_POLL_INTERVAL
+                if deadline is not None:
+                    wait = min(wait, deadline - time.monotonic())
+                    if wait <= 0:
+                        return False
+                readable, _, _ = select.select([self.connection], [], [], wait)
+                if readable:
+                    return True
+                if busy():
+                    return False
+        finally:
+            self.connection.settimeout(self.timeout)
+
+    def parse_request(self):
+        """
+        요청 줄을 읽은 뒤에 호출됨. 처리 시간은 여기서부터 잼
+        (keep-alive 연결에서 다음 요청을 기다린 유휴 시간은 포함하지 않음).
+        """
+        start = time.perf_counter()
+        if not super().parse_request():
+            return False
+        self.request_start = start
+        return True
+
+    def log_request(self, code='-', size='-'):
+        # send_response()가 호출함. 출력 대신 상태 코드만 기억했다가 handle_one_request에서 기록
+        self.status_code = int(code)
+
+    def log_message(self, format, *args):
+        # 요청마다 stderr에 쓰지 않음 (접근 로그가 대신함)
+        pass
+
+    def end_headers(self):
+        """지속 연결이면 남은 요청 수를 알리고, 최대 요청 수에 도달하면 연결 닫기를 알림."""
+        if self.protocol_version == 'HTTP/1.1' and not self.close_connection:
+            self.requests_handled += 1
+            busy = getattr(self.server, 'busy', None)
+            if self.requests_handled >= MAX_KEEPALIVE_REQUESTS or (busy is not None and busy()):
+                # send_header('Connection', 'close')가 close_connection도 설정
+                self.send_header('Connection', 'close')
+            else:
+                params = 'max={}'.format(MAX_KEEPALIVE_REQUESTS - self.requests_handled)
+                if self.timeout:
+                    params = 'timeout={:g}, {}'.format(self.timeout, params)
+                self.send_header('Keep-Alive', params)
+        super().end_headers()
 
     def do_GET(self):
         """GET 요청을 처리한다."""
-        # 접속 시간과 클라이언트 IP 출력
-        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        client_ip = self.client_address[0]
-        print('접속 시간: {}, 접속 클라이언트 IP: {}'.format(now, client_ip))
+        self.send_page(head_only=False)
+
+    def do_HEAD(self):
+        """HEAD 요청: GET과 같은 헤더만 보낸다."""
+        self.send_page(head_only=True)
 
-        # index.html 파일 읽기
+    def send_page(self, head_only):
+        # 접속 시간과 클라이언트 IP는 handle_one_request에서 접근 로그로 기록
+
+        # 캐시 조회 (바뀌었을 때만 디스크에서 다시 읽음)
+        path = resolve_path(self.path)
         try:
-            with open(INDEX_FILE, 'r', encoding=ENCODING) as f:
-                content = f.read()
-            content_bytes = content.encode(ENCODING)
-
-            # 성공 응답 (200 OK)
-            self.send_response(200)
-            self.send_header('Content-type', 'text/html; charset={}'.format(ENCODING))
-            self.send_header('Content-Length', str(len(content_bytes)))
+            if path is None:
+                raise FileNotFoundError(self.path)
+            entry = CACHE.get(path)
+        except IsADirectoryError:
+            # 폴더는 '/'를 붙인 주소로 안내 (그 폴더의 index.html)
+            self.send_response(301)
+            self.send_header('Location', urlsplit(self.path).path + '/')
+            self.send_header('Content-Length', '0')
             self.end_headers()
-            self.wfile.write(content_bytes)
+            return
+        except (FileNotFoundError, NotADirectoryError, PermissionError):
+            # 파일이 없을 경우 404 반환
+            self.send_text(404, '404 Not Found: 요청한 파일이 없습니다.', head_only)
+            return
+
+        # 압축 변형 선택 (이미 압축해 둔 것 중에서 고르기만 함). 범위 요청은 원본 기준
+        range_header = self.headers.get('Range')
+        selected = entry
+        if entry.compressible and not range_header:
+            selected = entry.negotiate(self.headers.get('Accept-Encoding')) or entry
 
-        except FileNotFoundError:
-            # index.html 없을 경우 404 반환
-            self.send_response(404)
-            self.send_header('Content-type', 'text/plain; charset={}'.format(ENCODING))
+        # 클라이언트 사본이 최신이면 본문 없이 304
+        if entry.not_modified(self.headers, selected.etag):
+            self.send_response(304)
+            self.send_header('ETag', selected.etag)
+            self.send_header('Last-Modified', entry.last_modified)
+            if entry.compressible:
+                self.send_header('Vary', 'Accept-Encoding')
             self.end_headers()
-            self.wfile.write('404 Not Found: index.html 파일이 없습니다.'.encode(ENCODING))
+            return
+
+        # 범위 요청 (If-Range가 현재 파일과 다르면 전체 전송)
+        start, end = 0, selected.size - 1
+        status = 200
+        if_range = self.headers.get('If-Range')
+        if range_header and (if_range is None or entry.validator_matches(if_range)):
+            try:
+                requested = parse_range(range_header, entry.size)
+            except RangeNotSatisfiable:
+                self.send_response(416)
+                self.send_header('Content-Range', 'bytes */{}'.format(entry.size))
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            if requested is not None:
+                start, end = requested
+                status = 206
+
+        # 성공 응답 (200 OK / 206 Partial Content)
+        self.send_response(status)
+        self.send_header('Content-type', entry.content_type)
+        self.send_header('Content-Length', str(end - start + 1))
+        if status == 206:
+            self.send_header('Content-Range', 'bytes {}-{}/{}'.format(start, end, entry.size))
+        if selected is not entry:
+            self.send_header('Content-Encoding', selected.encoding)
+        if entry.compressible:
+            self.send_header('Vary', 'Accept-Encoding')
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('ETag', selected.etag)
+        self.send_header('Last-Modified', entry.last_modified)
+        self.end_headers()
+        if not head_only and end >= start:
+            self.send_body(selected, start, end)
 
         # --- 보너스 과제 (위치 확인) ---
-        # 여기서는 외부 API를 호출해야 하므로 실제 구현 불가.
-        # 실제라면 'ip-api.com' 같은 무료 API를 활용:
-        # 예: requests.get('http://ip-api.com/json/' + client_ip).json()
-        # 단, 본 과제에서는 외부 라이브러리 사용 금지 → 주석으로 가이드만 제공.
+        # 'ip-api.com' 같은 외부 API를 요청마다 호출하면 왕복 지연이 생기고
+        # 인터넷이 없는 환경에서는 쓸 수 없음 → 로컬 CSV 범위 표로 조회 (geoip.py).
+        # 위치는 handle_one_request에서 접근 로그와 함께 기록.
+
+    def send_body(self, entry, start, end):
+        """
+        본문 start~end(포함) 전송. 캐시된 본문은 복사 없이, 큰 파일은 sendfile로.
+        entry는 CacheEntry 또는 압축 변형(Variant) - 둘 다 body / path를 가짐.
+        """
+        self.body_bytes = end - start + 1
+        if entry.body is not None:
+            self.wfile.write(memoryview(entry.body)[start:end + 1])
+            return
+        # socket.sendfile: os.sendfile로 커널이 파일 → 소켓을 직접 복사 (사용자 공간 복사 없음).
+        # sendfile을 쓸 수 없는 환경에서는 일정 크기씩 읽어 send로 자동 대체
+        with open(entry.path, 'rb') as f:
+            self.connection.sendfile(f, start, end - start + 1)
+
+    def send_text(self, status, message, head_only=False):
+        """짧은 텍스트 응답 (오류 페이지 등)."""
+        body = message.encode(ENCODING)
+        self.send_response(status)
+        self.send_header('Content-type', 'text/plain; charset={}'.format(ENCODING))
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if not head_only:
+            self.body_bytes = len(body)
+            self.wfile.write(body)
+
+
+class ThreadPoolHTTPServer(HTTPServer):
+    """
+    연결을 스레드 풀에서 처리하는 HTTP 서버.
+    ThreadingHTTPServer처럼 요청마다 스레드를 만들지 않고, 동시 처리 수도 WORKERS로 제한.
+    스레드를 기다리는 연결이 있으면(busy) 핸들러가 유휴 keep-alive 연결을 닫아 스레드를 돌려줌.
+    """
+    request_queue_size = socket.SOMAXCONN
+
+    def __init__(self, server_address, handler_class, workers=WORKERS):
+        super().__init__(server_address, handler_class)
+        self.workers = workers
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='http')
+        self.connections = 0   # 처리 중이거나 스레드를 기다리는 연결 수
+        self.connections_lock = threading.Lock()
+
+    def busy(self):
+        """스레드를 기다리는 연결이 있으면 True."""
+        return self.connections > self.workers
 
+    def process_request(self, request, client_address):
+        with self.connections_lock:
+            self.connections += 1
+        self.pool.submit(self.process_request_thread, request, client_address)
 
-def run_server():
+    def process_request_thread(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            with self.connections_lock:
+                self.connections -= 1
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+def make_server(mode='pool', workers=WORKERS):
+    """실행 모드에 맞는 HTTP 서버 생성."""
+    if mode == 'pool':
+        return ThreadPoolHTTPServer((HOST, PORT), MyRequestHandler, workers)
+    if mode == 'threading':
+        return ThreadingHTTPServer((HOST, PORT), MyRequestHandler)
+    return HTTPServer((HOST, PORT), MyRequestHandler)
+
+
+def run_server(mode='pool', workers=WORKERS):
     """HTTP 서버 실행."""
-    httpd = HTTPServer((HOST, PORT), MyRequestHandler)
-    print('HTTP 서버 시작: {}:{}'.format(HOST, PORT))
+    global ACCESS_LOG
+    ACCESS_LOG = AccessLog(ACCESS_LOG_FILE, console=ACCESS_LOG_CONSOLE)
+    httpd = make_server(mode, workers)
+    print('HTTP 서버 시작 ({}): {}:{}'.format(mode, HOST, PORT))
     try:
         httpd.serve_forever()
     except KeyboardInterrupt:
         print('\n서버 종료 중...')
     finally:
         httpd.server_close()
+        ACCESS_LOG.close()
         print('서버 종료 완료.')
 
 
+def configure(root=None, keep_alive=None, keepalive_timeout=None, max_requests=None,
+              access_log=None, console_log=None, geoip_file=None, port=None):
+    """실행 옵션을 모듈 설정값에 반영."""
+    global PORT, DOC_ROOT, KEEPALIVE_TIMEOUT, MAX_KEEPALIVE_REQUESTS
+    global ACCESS_LOG_FILE, ACCESS_LOG_CONSOLE, GEOIP
+    if port is not None:
+        PORT = port
+    if root is not None:
+        DOC_ROOT = root
+    if keep_alive is not None:
+        MyRequestHandler.protocol_version = 'HTTP/1.1' if keep_alive else 'HTTP/1.0'
+    if keepalive_timeout is not None:
+        KEEPALIVE_TIMEOUT = keepalive_timeout
+        MyRequestHandler.timeout = keepalive_timeout or None
+    if max_requests is not None:
+        MAX_KEEPALIVE_REQUESTS = max_requests
+    if access_log is not None:
+        ACCESS_LOG_FILE = access_log
+    if console_log is not None:
+        ACCESS_LOG_CONSOLE = console_log
+    if geoip_file:
+        GEOIP = GeoIP.from_csv(geoip_file)
+        print('IP 위치 범위 {:,}개 적재: {}'.format(len(GEOIP), geoip_file))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='HTTP 서버')
+    parser.add_argument('--mode', choices=('pool', 'threading', 'single'), default='pool',
+                        help='pool: 스레드 풀 (기본), threading: 요청마다 스레드, '
+                             'single: 한 번에 하나씩')
+    parser.add_argument('--workers', type=int, default=WORKERS, help='pool 모드의 스레드 수')
+    parser.add_argument('--port', type=int, default=PORT, help='리스닝 포트')
+    parser.add_argument('--root', default=DOC_ROOT, help='제공할 문서 루트 폴더')
+    parser.add_argument('--no-keep-alive', action='store_true',
+                        help='HTTP/1.0처럼 응답마다 연결 닫기')
+    parser.add_argument('--keepalive-timeout', type=float, default=KEEPALIVE_TIMEOUT,
+                        help='다음 요청을 기다리는 최대 시간(초, 0이면 제한 없음)')
+    parser.add_argument('--max-requests', type=int, default=MAX_KEEPALIVE_REQUESTS,
+                        help='연결 하나에서 처리할 최대 요청 수')
+    parser.add_argument('--access-log', default=ACCESS_LOG_FILE,
+                        help='접근 로그 파일 (빈 문자열이면 파일에 남기지 않음)')
+    parser.add_argument('--quiet', action='store_true', help='요청마다 화면에 출력하지 않음')
+    parser.add_argument('--geoip', default=None,
+                        help="IP 범위 → 위치 CSV (형식: 시작,끝,국가[,지역[,도시]])")
+    args = parser.parse_args()
+    configure(root=args.root, keep_alive=not args.no_keep_alive,
+              keepalive_timeout=args.keepalive_timeout, max_requests=args.max_requests,
+              access_log=args.access_log, console_log=not args.quiet,
+              geoip_file=args.geoip, port=args.port)
+    run_server(args.mode, args.workers)
+
+
 if __name__ == '__main__':
-    run_server()
+    main()
@@ -0,0 +1,306 @@
+# coding: utf-8
+"""
+정적 파일 캐시
+- 파일 경로마다 응답 본문(바이트), ETag, Last-Modified, Content-Type을 메모리에 보관
+  → 자주 요청되는 페이지는 디스크 읽기와 인코딩 없이 바로 전송
+- 파일이 바뀌었는지는 check_interval(초)마다 한 번만 stat으로 확인 (mtime, 크기 비교).
+  그 사이 요청은 stat도 하지 않음 (inotify는 표준 라이브러리에 없어 주기 확인으로 대신)
+- 조건부 요청: If-None-Match(ETag) / If-Modified-Since → 바뀌지 않았으면 304
+- 큰 파일(max_entry_bytes 초과)이나 캐시 총량(max_total_bytes)을 넘는 파일은 본문 없이
+  메타데이터만 보관하고, 본문은 요청 때 디스크에서 sendfile로 전송
+- 압축 변형: 텍스트 계열 파일은 캐시에 올릴 때 백그라운드 스레드 하나가 한 번만
+  gzip(가능하면 brotli도) 압축해 둠 (경로마다 진행 중인 작업은 하나).
+  압축이 끝나기 전에는 원본을 보냄.
+  디스크에 미리 만든 .gz / .br 파일(원본보다 새것)이 있으면 그것을 바로 사용.
+  요청 처리 중에는 압축하지 않고 Accept-Encoding에 맞는 변형을 고르기만 함
+- brotli는 선택 사항 (설치되어 있지 않으면 gzip만 사용)
+"""
+
+import gzip
+import mimetypes
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import formatdate, parsedate_to_datetime
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+ENCODING = 'utf-8'
+# 이보다 작은 파일은 압축해도 헤더 비용 때문에 이득이 거의 없음
+MIN_COMPRESS_SIZE = 256
+# 압축 결과가 원본의 이 비율보다 크면 변형을 만들지 않음
+MAX_COMPRESS_RATIO = 0.9
+# 압축할 Content-Type (이미지/동영상/zip 등 이미 압축된 형식은 제외)
+COMPRESSIBLE_TYPES = ('text/', 'application/javascript', 'application/json',
+                      'application/xml', 'image/svg+xml')
+# 서버가 선호하는 순서 (클라이언트 q값이 같을 때)
+ENCODINGS = ('br', 'gzip')
+SIBLING_SUFFIX = {'br': '.br', 'gzip': '.gz'}
+
+
+def compress(encoding, data):
+    """encoding으로 압축한 바이트. 압축기를 쓸 수 없으면 None."""
+    if encoding == 'gzip':
+        # mtime=0: 같은 내용이면 항상 같은 결과
+        return gzip.compress(data, compresslevel=9, mtime=0)
+    if encoding == 'br' and brotli is not None:
+        return brotli.compress(data, quality=11)
+    return None
+
+
+def parse_accept_encoding(header):
+    """Accept-Encoding 헤더를 {인코딩: q값} dict로 변환."""
+    accepted = {}
+    for part in header.split(','):
+        name, _, params = part.partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name] = q
+    return accepted
+
+
+def guess_content_type(path):
+    """확장자로 Content-Type 추정. 텍스트 형식은 charset을 붙임."""
+    content_type, _ = mimetypes.guess_type(path)
+    if content_type is None:
+        return 'application/octet-stream'
+    if content_type.startswith('text/') or content_type in ('application/javascript',
+                                                            'application/json'):
+        return '{}; charset={}'.format(content_type, ENCODING)
+    return content_type
+
+
+class Variant:
+    """압축된 표현 하나. 본문이 메모리에 있거나(body) 디스크의 .gz/.br 파일(path)."""
+    __slots__ = ('encoding', 'body', 'path', 'size', 'etag')
+
+    def __init__(self, encoding, body, path, size, etag):
+        self.encoding = encoding
+        self.body = body
+        self.path = path
+        self.size = size
+        # 표현마다 ETag가 달라야 캐시가 섞이지 않음
+        self.etag = '{}-{}"'.format(etag[:-1], encoding)
+
+
+class CacheEntry:
+    """캐시 항목 하나 (파일 하나의 응답에 필요한 값)."""
+    __slots__ = ('path', 'body', 'size', 'mtime_ns', 'etag', 'last_modified',
+                 'content_type', 'checked', 'compressible', 'variants')
+
+    def __init__(self, path, body, stat):
+        self.path = path
+        self.body = body  # None이면 디스크에서 스트리밍
+        self.size = stat.st_size
+        self.mtime_ns = stat.st_mtime_ns
+        # nginx와 같은 방식: 크기-수정시각 (내용 해시를 계산하지 않아도 됨)
+        self.etag = '"{:x}-{:x}"'.format(stat.st_size, stat.st_mtime_ns)
+        self.last_modified = formatdate(stat.st_mtime, usegmt=True)
+        self.content_type = guess_content_type(path)
+        self.checked = time.monotonic()
+        self.compressible = (stat.st_size >= MIN_COMPRESS_SIZE
+                             and self.content_type.startswith(COMPRESSIBLE_TYPES))
+        self.variants = {}  # 인코딩 -> Variant
+
+    def negotiate(self, accept_encoding):
+        """Accept-Encoding에 맞는 압축 변형. 없거나 원본이 낫으면 None (원본 전송)."""
+        if not self.variants or not accept_encoding:
+            return None
+        accepted = parse_accept_encoding(accept_encoding)
+        wildcard = accepted.get('*', 0.0)
+        best, best_q = None, 0.0
+        for encoding in ENCODINGS:
+            variant = self.variants.get(encoding)
+            if variant is None:
+                continue
+            q = accepted.get(encoding, wildcard)
+            if q > best_q:
+                best, best_q = variant, q
+        return best
+
+    def matches(self, stat):
+        return stat.st_mtime_ns == self.mtime_ns and stat.st_size == self.size
+
+    def validator_matches(self, value):
+        """If-Range 값(ETag 또는 날짜)이 현재 파일과 같으면 True."""
+        value = value.strip()
+        if value.startswith('"') or value.startswith('W/'):
+            # If-Range에는 강한 ETag만 허용
+            return value == self.etag
+        return value == self.last_modified
+
+    def not_modified(self, headers, etag=None):
+        """
+        조건부 요청 헤더로 보아 클라이언트 사본이 최신이면 True (304 응답 대상).
+        etag는 보낼 표현(압축 변형)의 ETag (기본: 원본).
+        """
+        etag = etag or self.etag
+        if_none_match = headers.get('If-None-Match')
+        if if_none_match is not None:
+            # If-None-Match가 있으면 If-Modified-Since는 무시 (RFC 9110)
+            if if_none_match.strip() == '*':
+                return True
+            tags = [tag.strip() for tag in if_none_match.split(',')]
+            return etag in tags or 'W/' + etag in tags
+        if_modified_since = headers.get('If-Modified-Since')
+        if if_modified_since is not None:
+            try:
+                since = parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError, IndexError, OverflowError):
+                return False
+            # HTTP 날짜는 초 단위
+            return self.mtime_ns // 1_000_000_000 <= since
+        return False
+
+
+class StaticCache:
+    """경로 → CacheEntry. 여러 스레드에서 동시에 사용 가능."""
+    def __init__(self, check_interval=1.0, max_entry_bytes=1024 * 1024,
+                 max_total_bytes=64 * 1024 * 1024):
+        self.check_interval = check_interval
+        self.max_entry_bytes = max_entry_bytes
+        self.max_total_bytes = max_total_bytes
+        self.total_bytes = 0  # 캐시에 올린 본문 크기 합계
+        self.entries = {}
+        self.lock = threading.Lock()
+        # 압축 작업 (요청 스레드 밖에서 하나씩). 경로 -> 압축 중인 CacheEntry
+        self._compressor = None
+        self._compressing = {}
+
+    def get(self, path):
+        """경로의 캐시 항목. 없거나 파일이 바뀌었으면 다시 읽음. 파일이 없으면 FileNotFoundError."""
+        entry = self.entries.get(path)
+        now = time.monotonic()
+        if entry is not None and now - entry.checked < self.check_interval:
+            return entry
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            self.invalidate(path)
+            raise
+        if entry is not None and entry.matches(stat):
+            entry.checked = now
+            return entry
+        return self._load(path)
+
+    def _load(self, path):
+        with open(path, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            body = None
+            if (stat.st_size <= self.max_entry_bytes
+                    and self.total_bytes + stat.st_size <= self.max_total_bytes):
+                body = f.read()
+        entry = CacheEntry(path, body, stat)
+        missing = self._load_variants(entry) if entry.compressible else []
+        with self.lock:
+            self._drop(path)
+            self.entries[path] = entry
+            self.total_bytes += self._cached_bytes(entry)
+        if missing:
+            # 캐시에 넣은 뒤 예약 (압축이 끝났을 때 이 항목이 최신인지 확인하므로)
+            self._schedule_compress(entry)
+        return entry
+
+    def _load_variants(self, entry):
+        """
+        압축 변형 준비: 미리 만든 .br/.gz 파일은 바로 사용.
+        나머지 중 백그라운드에서 압축할 인코딩 목록을 반환.
+        """
+        missing = []
+        for encoding in ENCODINGS:
+            sibling = entry.path + SIBLING_SUFFIX[encoding]
+            try:
+                stat = os.stat(sibling)
+            except OSError:
+                stat = None
+            if stat is not None and stat.st_mtime_ns >= entry.mtime_ns:
+                data = None
+                if entry.body is not None and stat.st_size <= self.max_entry_bytes:
+                    with open(sibling, 'rb') as f:
+                        data = f.read()
+                entry.variants[encoding] = Variant(encoding, data, sibling, stat.st_size,
+                                                   entry.etag)
+                continue
+            if entry.body is None:
+                # 큰 파일은 압축해 두지 않음 (미리 만든 파일이 있을 때만)
+                continue
+            missing.append(encoding)
+        return missing
+
+    def _schedule_compress(self, entry):
+        """압축 작업 예약. 같은 경로의 작업이 진행 중이면 새로 만들지 않음 (끝난 뒤 최신 항목을 확인)."""
+        with self.lock:
+            if entry.path in self._compressing:
+                self._compressing[entry.path] = entry
+                return
+            self._compressing[entry.path] = entry
+            if self._compressor is None:
+                self._compressor = ThreadPoolExecutor(max_workers=1,
+                                                      thread_name_prefix='static-compress')
+        self._compressor.submit(self._compress_loop, entry.path)
+
+    def _compress_loop(self, path):
+        """
+        경로의 최신 항목을 압축해 변형을 붙임 (압축 스레드).
+        압축하는 동안 파일이 바뀌어 새 항목이 예약되면 그 항목으로 다시 압축.
+        """
+        while True:
+            with self.lock:
+                entry = self._compressing.get(path)
+            variants = {}
+            for encoding in ENCODINGS:
+                if encoding in entry.variants:
+                    # 미리 만든 .br/.gz 파일이 있음
+                    continue
+                try:
+                    data = compress(encoding, entry.body)
+                except Exception:
+                    data = None
+                if data is not None and len(data) <= len(entry.body) * MAX_COMPRESS_RATIO:
+                    variants[encoding] = Variant(encoding, data, None, len(data), entry.etag)
+            with self.lock:
+                if self.entries.get(path) is entry and variants:
+                    # 새 dict로 바꿔 끼움 (요청 스레드는 잠금 없이 negotiate에서 읽음)
+                    merged = dict(entry.variants)
+                    merged.update(variants)
+                    entry.variants = merged
+                    self.total_bytes += sum(len(variant.body) for variant in variants.values())
+                if self._compressing.get(path) is entry:
+                    del self._compressing[path]
+                    return
+
+    @staticmethod
+    def _cached_bytes(entry):
+        total = len(entry.body) if entry.body is not None else 0
+        for variant in entry.variants.values():
+            if variant.body is not None:
+                total += len(variant.body)
+        return total
+
+    def _drop(self, path):
+        """항목 제거. lock을 잡은 상태에서 호출."""
+        old = self.entries.pop(path, None)
+        if old is not None:
+            self.total_bytes -= self._cached_bytes(old)
+
+    def invalidate(self, path=None):
+        """캐시 항목 제거 (path가 없으면 전부)."""
+        with self.lock:
+            if path is None:
+                self.entries.clear()
+                self.total_bytes = 0
+            else:
+                self._drop(path)
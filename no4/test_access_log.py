@@ -0,0 +1,61 @@
+# coding: utf-8
+"""
+access_log.py 테스트: python -m pytest no4
+"""
+
+import json
+import os
+
+import access_log
+from access_log import AccessLog
+
+
+def open_log(path, **options):
+    # 백그라운드 flush는 테스트가 직접 부르므로 길게
+    options.setdefault('flush_interval', 60)
+    return AccessLog(str(path), console=False, **options)
+
+
+def read_lines(path):
+    with open(str(path), encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def test_rotation_keeps_backups(tmp_path):
+    path = tmp_path / 'access.log'
+    log = open_log(path, max_bytes=200, backups=2)
+    for i in range(12):
+        log.log('127.0.0.1', 'GET', '/{}'.format(i), 200, 10, 0.001)
+        log.flush()
+    log.close()
+    names = sorted(os.listdir(str(tmp_path)))
+    assert names == ['access.log', 'access.log.1', 'access.log.2']
+    paths = [record['path'] for name in reversed(names) for record in read_lines(tmp_path / name)]
+    # 가장 오래된 것은 지워지고, 남은 기록은 순서대로
+    assert paths == ['/{}'.format(i) for i in range(12 - len(paths), 12)]
+
+
+def test_rotation_failure_keeps_writing(tmp_path, monkeypatch, capsys):
+    path = tmp_path / 'access.log'
+    # 기록 한 줄이 100바이트 남짓: 세 번째 flush에서 교체 시도
+    log = open_log(path, max_bytes=300, backups=2)
+
+    def failing_replace(source, target):
+        raise PermissionError('교체 불가')
+
+    monkeypatch.setattr(access_log.os, 'replace', failing_replace)
+    for i in range(3):
+        log.log('127.0.0.1', 'GET', '/{}'.format(i), 200, 10, 0.001)
+        log.flush()
+    assert '접근 로그 교체 실패' in capsys.readouterr().err
+    monkeypatch.undo()
+
+    # 지금 파일에 계속 쓰고, 더 쓴 뒤에는 교체를 다시 시도
+    for i in range(3, 6):
+        log.log('127.0.0.1', 'GET', '/{}'.format(i), 200, 10, 0.001)
+        log.flush()
+    log.close()
+    paths = [record['path'] for name in ('access.log.2', 'access.log.1', 'access.log')
+             if os.path.exists(str(tmp_path / name)) for record in read_lines(tmp_path / name)]
+    assert paths == ['/{}'.format(i) for i in range(6)]
+    assert os.path.exists(str(tmp_path / 'access.log.1'))
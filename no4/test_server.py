@@ -0,0 +1,82 @@
+# coding: utf-8
+"""
+server.py 테스트 (Range 해석, 요청 경로 → 파일 경로): python -m pytest no4
+"""
+
+import os
+
+import pytest
+
+import server
+from server import RangeNotSatisfiable, parse_range
+
+
+@pytest.mark.parametrize('header, expected', [
+    ('bytes=0-99', (0, 99)),
+    ('bytes=100-', (100, 999)),
+    ('bytes=-100', (900, 999)),
+    ('bytes=-5000', (0, 999)),
+    ('bytes=990-5000', (990, 999)),
+    ('Bytes = 0-0', (0, 0)),
+])
+def test_parse_range(header, expected):
+    assert parse_range(header, 1000) == expected
+
+
+@pytest.mark.parametrize('header', [
+    'bytes=0-10,20-30',   # 여러 범위는 지원하지 않음 → 전체
+    'items=0-10',
+    'bytes=10',
+    'bytes=a-b',
+    'bytes=20-10',
+])
+def test_parse_range_ignored(header):
+    assert parse_range(header, 1000) is None
+
+
+@pytest.mark.parametrize('header', ['bytes=1000-', 'bytes=5000-6000', 'bytes=-0'])
+def test_parse_range_not_satisfiable(header):
+    with pytest.raises(RangeNotSatisfiable):
+        parse_range(header, 1000)
+
+
+@pytest.fixture
+def doc_root(tmp_path, monkeypatch):
+    root = tmp_path / 'static'
+    root.mkdir()
+    (root / 'index.html').write_text('<h1>hi</h1>')
+    (root / 'sub').mkdir()
+    (root / 'sub' / 'a b.txt').write_text('a')
+    (tmp_path / 'secret.txt').write_text('secret')
+    monkeypatch.setattr(server, 'DOC_ROOT', str(root))
+    monkeypatch.setattr(server, 'ACCESS_LOG_FILE', str(root / 'access.log'))
+    return root
+
+
+def test_resolve_path(doc_root):
+    root = os.path.realpath(str(doc_root))
+    assert server.resolve_path('/') == os.path.join(root, 'index.html')
+    assert server.resolve_path('/index.html?v=1') == os.path.join(root, 'index.html')
+    assert server.resolve_path('/sub/a%20b.txt') == os.path.join(root, 'sub', 'a b.txt')
+
+
+@pytest.mark.parametrize('url_path', [
+    '/../secret.txt',
+    '/%2e%2e/secret.txt',
+    '/sub/../../secret.txt',
+    '/index.html%00.txt',
+    '/access.log',
+    '/access.log.1',
+])
+def test_resolve_path_rejects(doc_root, url_path):
+    assert server.resolve_path(url_path) is None
+
+
+def test_resolve_path_follows_symlink_changes(doc_root):
+    """링크가 루트 밖을 가리키도록 바뀌면 바로 거부 (이전 결과를 캐시하지 않음)."""
+    link = doc_root / 'link.txt'
+    link.symlink_to(doc_root / 'index.html')
+    assert server.resolve_path('/link.txt') is not None
+    link.unlink()
+    link.symlink_to(doc_root.parent / 'secret.txt')
+    assert server.resolve_path('/link.txt') is None
@@ -0,0 +1,119 @@
+# coding: utf-8
+"""
+static_cache.py 테스트: python -m pytest no4
+"""
+
+import gzip
+import os
+import time
+
+import pytest
+
+from static_cache import StaticCache, parse_accept_encoding
+
+
+def wait_for_variant(entry, encoding, timeout=5.0):
+    """백그라운드 압축이 끝날 때까지 기다림."""
+    deadline = time.monotonic() + timeout
+    while encoding not in entry.variants:
+        assert time.monotonic() < deadline, '압축 변형이 만들어지지 않음'
+        time.sleep(0.01)
+    return entry.variants[encoding]
+
+
+@pytest.fixture
+def page(tmp_path):
+    path = tmp_path / 'page.html'
+    path.write_text('<p>안녕하세요</p>\n' * 200, encoding='utf-8')
+    return str(path)
+
+
+def test_cache_hit_and_reload_on_change(page):
+    cache = StaticCache(check_interval=0)
+    entry = cache.get(page)
+    assert entry.body == open(page, 'rb').read()
+    assert entry.content_type == 'text/html; charset=utf-8'
+    assert cache.get(page) is entry
+    assert cache.total_bytes >= entry.size
+
+    with open(page, 'a', encoding='utf-8') as f:
+        f.write('추가')
+    stat = os.stat(page)
+    os.utime(page, ns=(stat.st_atime_ns, entry.mtime_ns + 1_000_000_000))
+    reloaded = cache.get(page)
+    assert reloaded is not entry
+    assert reloaded.body.endswith('추가'.encode('utf-8'))
+    assert reloaded.etag != entry.etag
+
+
+def test_check_interval_skips_stat(page):
+    cache = StaticCache(check_interval=60)
+    entry = cache.get(page)
+    os.remove(page)
+    # 확인 간격 안에서는 stat 없이 캐시된 항목
+    assert cache.get(page) is entry
+    cache.check_interval = 0
+    with pytest.raises(FileNotFoundError):
+        cache.get(page)
+    assert page not in cache.entries
+
+
+def test_large_file_is_not_kept_in_memory(tmp_path):
+    path = tmp_path / 'big.bin'
+    path.write_bytes(b'x' * 4096)
+    cache = StaticCache(max_entry_bytes=1024)
+    entry = cache.get(str(path))
+    assert entry.body is None
+    assert entry.size == 4096
+    assert cache.total_bytes == 0
+
+
+def test_conditional_requests(page):
+    entry = StaticCache().get(page)
+    assert entry.not_modified({'If-None-Match': entry.etag})
+    assert entry.not_modified({'If-None-Match': '"other", W/' + entry.etag})
+    assert not entry.not_modified({'If-None-Match': '"other"'})
+    assert entry.not_modified({'If-Modified-Since': entry.last_modified})
+    assert not entry.not_modified({'If-Modified-Since': 'Thu, 01 Jan 1970 00:00:00 GMT'})
+    assert not entry.not_modified({'If-Modified-Since': '날짜 아님'})
+    # If-None-Match가 있으면 If-Modified-Since는 보지 않음
+    assert not entry.not_modified({'If-None-Match': '"other"',
+                                   'If-Modified-Since': entry.last_modified})
+
+
+def test_gzip_variant_is_built_in_background(page):
+    cache = StaticCache()
+    entry = cache.get(page)
+    variant = wait_for_variant(entry, 'gzip')
+    assert gzip.decompress(variant.body) == entry.body
+    assert variant.etag != entry.etag
+    assert entry.negotiate('gzip, deflate') is variant
+    assert entry.negotiate('gzip;q=0, identity') is None
+    assert entry.negotiate('') is None
+    assert entry.negotiate('*') is not None
+
+
+def test_precompressed_sibling_is_used(page):
+    with open(page, 'rb') as f:
+        data = gzip.compress(f.read())
+    with open(page + '.gz', 'wb') as f:
+        f.write(data)
+    entry = StaticCache().get(page)
+    variant = entry.variants['gzip']
+    assert variant.path == page + '.gz'
+    assert variant.body == data
+
+
+def test_small_or_binary_files_are_not_compressed(tmp_path):
+    small = tmp_path / 'small.txt'
+    small.write_text('짧음')
+    image = tmp_path / 'image.png'
+    image.write_bytes(b'\x89PNG' + b'\0' * 4096)
+    cache = StaticCache()
+    assert not cache.get(str(small)).compressible
+    assert not cache.get(str(image)).compressible
+
+
+def test_parse_accept_encoding():
+    assert parse_accept_encoding('gzip, br;q=0.5, *;q=0, zstd;q=x') == {
+        'gzip': 1.0, 'br': 0.5, '*': 0.0, 'zstd': 0.0}
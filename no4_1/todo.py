@@ -7,9 +7,13 @@ from typing import Dict, List
 from fastapi import APIRouter, FastAPI, HTTPException
 from pydantic import BaseModel
 
+from todo_record import TodoRecord
+
 # === 설정 ===
 # 데이터 저장을 위한 CSV 파일 이름
 CSV_FILE_NAME = 'todo_data.csv'
+# CSV 열 순서 (TodoItem의 필드)
+FIELDNAMES = ['id', 'task', 'is_completed']
 
 # FastAPI의 입출력 Dict 타입을 위한 Pydantic 모델 정의
 # 클래스 이름은 CapWord 방식 준수
@@ -24,45 +28,55 @@ class TodoItem(BaseModel):
 
 # === 데이터 관리 함수 (CSV 파일 관련) ===
 
-def load_todo_list() -> List[Dict]:
+def load_todo_list() -> List[TodoRecord]:
     """
-    CSV 파일에서 할 일 목록을 불러와 리스트[Dict] 형태로 반환합니다.
+    CSV 파일에서 할 일 목록을 불러와 리스트[TodoRecord] 형태로 반환합니다.
     파일이 없으면 빈 리스트를 반환합니다.
     """
     todo_list = []
     if not os.path.exists(CSV_FILE_NAME):
         return todo_list
 
+    # 기록 도중 멈춰서 줄바꿈 없이 끝난 마지막 줄은 잘라냄 (다음 항목이 그 줄에 이어 붙지 않게)
+    with open(CSV_FILE_NAME, mode = 'r+b') as file:
+        data = file.read()
+        if data and not data.endswith(b'\n'):
+            file.truncate(data.rfind(b'\n') + 1)
+
     # '을 기본으로 사용
     with open(CSV_FILE_NAME, mode = 'r', newline = '', encoding = 'utf-8') as file:
-        reader = csv.DictReader(file)
+        reader = csv.reader(file)
+        header = next(reader, None)
+        if header is None:
+            return todo_list
+        # 열 순서는 머리글을 따름 (줄마다 Dict를 만들지 않음)
+        id_index = header.index('id')
+        task_index = header.index('task')
+        completed_index = header.index('is_completed')
         for row in reader:
             # CSV에서 읽은 값은 문자열이므로 타입 변환
-            row['id'] = int(row['id'])
-            row['is_completed'] = row['is_completed'].lower() == 'true'
-            todo_list.append(row)
+            todo_list.append(TodoRecord(int(row[id_index]), row[task_index],
+                                        row[completed_index].lower() == 'true'))
 
     return todo_list
 
 
-def save_todo_list(todo_list: List[Dict]):
+def append_todo(item: TodoRecord):
     """
-    현재 할 일 목록을 CSV 파일에 저장합니다.
+    할 일 항목 하나를 CSV 파일 끝에 한 줄로 덧붙입니다.
+    목록 전체를 다시 쓰지 않으므로 목록 크기와 무관하게 한 줄만 기록하고,
+    fsync 후 반환하므로 비정상 종료 시에도 이미 추가된 항목은 남습니다.
     """
-    if not todo_list:
-        # todo_list가 비어있으면 파일 삭제 (혹은 빈 파일로 저장)
-        if os.path.exists(CSV_FILE_NAME):
-            os.remove(CSV_FILE_NAME)
-        return
-
-    # 첫 번째 항목의 키를 헤더로 사용
-    fieldnames = list(todo_list[0].keys())
+    # 파일이 없거나 비어 있으면 헤더부터 씀
+    write_header = not os.path.exists(CSV_FILE_NAME) or os.path.getsize(CSV_FILE_NAME) == 0
 
-    # '을 기본으로 사용, 부득이한 경우 " "
-    with open(CSV_FILE_NAME, mode = 'w', newline = '', encoding = 'utf-8') as file:
-        writer = csv.DictWriter(file, fieldnames = fieldnames)
-        writer.writeheader()
-        writer.writerows(todo_list)
+    with open(CSV_FILE_NAME, mode = 'a', newline = '', encoding = 'utf-8') as file:
+        writer = csv.writer(file)
+        if write_header:
+            writer.writerow(FIELDNAMES)
+        writer.writerow((item.id, item.task, item.is_completed))
+        file.flush()
+        os.fsync(file.fileno())
 
 
 # === 라우터 정의 ===
@@ -71,6 +85,7 @@ def save_todo_list(todo_list: List[Dict]):
 router = APIRouter()
 
 # 리스트 객체를 todo_list라는 이름으로 추가 (초기 데이터는 파일에서 로드)
+# 항목은 __slots__를 쓰는 TodoRecord (항목마다 dict를 두지 않음, 응답할 때만 Dict로 바꿈)
 todo_list = load_todo_list()
 
 
@@ -89,8 +104,9 @@ def add_todo(item: TodoItem) -> Dict:
         raise HTTPException(status_code = 400, detail = "입력된 할 일 항목이 비어있습니다.")
 
     # 새로운 항목 추가
-    todo_list.append(item_dict)
-    save_todo_list(todo_list)
+    record = TodoRecord.from_dict(item_dict)
+    append_todo(record)
+    todo_list.append(record)
 
     # 입출력은 Dict 타입으로 한다.
     return {'message': '할 일 항목이 성공적으로 추가되었습니다.', 'new_item': item_dict}
@@ -105,7 +121,7 @@ def retrieve_todo() -> Dict:
     # todo_list = load_todo_list() # 메모리 상태를 유지하므로 이 부분은 생략
     
     # 입출력은 Dict 타입으로 한다.
-    return {'todo_list': todo_list, 'count': len(todo_list)}
+    return {'todo_list': [item.to_dict() for item in todo_list], 'count': len(todo_list)}
 
 
 # === FastAPI 애플리케이션 생성 및 라우터 포함 ===
@@ -0,0 +1,32 @@
+# todo_record.py
+
+from typing import Dict
+
+
+# === 메모리용 할 일 항목 ===
+
+class TodoRecord:
+    """
+    메모리에 보관하는 할 일 항목 하나.
+    - __slots__를 써서 항목마다 dict를 만들지 않음 (키 문자열/해시 표가 없어 항목당 수십 바이트)
+    - 응답으로 보낼 때만 to_dict()로 TodoItem 모양의 Dict로 바꿈
+    """
+    __slots__ = ('id', 'task', 'is_completed')
+
+    def __init__(self, id: int, task: str, is_completed: bool = False):
+        self.id = id
+        self.task = task
+        self.is_completed = is_completed
+
+    @classmethod
+    def from_dict(cls, item: Dict) -> 'TodoRecord':
+        """
+        TodoItem 모양의 Dict에서 만듭니다.
+        """
+        return cls(item['id'], item['task'], item.get('is_completed', False))
+
+    def to_dict(self) -> Dict:
+        """
+        TodoItem 모양의 Dict로 바꿉니다. (응답용)
+        """
+        return {'id': self.id, 'task': self.task, 'is_completed': self.is_completed}
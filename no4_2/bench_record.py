@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# coding: utf-8
+"""
+할 일 항목 메모리 표현 벤치마크 (todo_record.py)
+- 항목 N개(기본 100만 개)짜리 스냅숏 CSV를 임시로 만든 뒤
+  - Dict 리스트 (이전 load_todo_list: csv.DictReader 한 줄 = Dict 하나)
+  - TodoRecord 리스트 (read_snapshot, __slots__)
+  - TodoRecord + TodoStore (id 색인과 순번 목록 포함, 서버가 실제로 들고 있는 모양)
+  의 적재 시간과 항목당 메모리(바이트)를 비교
+- 메모리는 tracemalloc으로 따로 한 번 더 적재해서 잼 (적재 시간에는 포함하지 않음)
+
+실행: python bench_record.py [--items 1000000]
+"""
+
+import argparse
+import csv
+import gc
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+
+from todo_log import read_snapshot, write_snapshot
+from todo_record import TodoRecord
+from todo_store import TodoStore
+
+
+def load_dicts(path):
+    """이전 todo.py의 load_todo_list와 같은 방식."""
+    todo_list = []
+    with open(path, mode='r', newline='', encoding='utf-8') as file:
+        for row in csv.DictReader(file):
+            row['id'] = int(row['id'])
+            row['is_completed'] = row['is_completed'].lower() == 'true'
+            todo_list.append(row)
+    return todo_list
+
+
+def load_store(path):
+    return TodoStore(read_snapshot(path))
+
+
+def measure(loader, path, count):
+    """(적재 시간 초, 항목당 바이트)."""
+    gc.collect()
+    start = time.perf_counter()
+    result = loader(path)
+    elapsed = time.perf_counter() - start
+    del result
+    gc.collect()
+
+    tracemalloc.start()
+    result = loader(path)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return elapsed, size / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description='할 일 항목 메모리 표현 벤치마크')
+    parser.add_argument('--items', type=int, default=1000000, help='항목 수')
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix='bench_record_')
+    try:
+        path = os.path.join(directory, 'todo_data.csv')
+        write_snapshot(path, (TodoRecord(i, '할 일 {}번: 장보기'.format(i), i % 3 == 0)
+                              for i in range(args.items)))
+        print('항목 {:,}개, 스냅숏 {:.1f} MB'.format(args.items, os.path.getsize(path) / 1e6))
+
+        rows = [
+            ('Dict 리스트', load_dicts),
+            ('TodoRecord 리스트', read_snapshot),
+            ('TodoRecord + TodoStore', load_store),
+        ]
+        print('{:<24} {:>10} {:>14}'.format('표현', '적재(초)', '항목당 바이트'))
+        for name, loader in rows:
+            elapsed, per_item = measure(loader, path, args.items)
+            print('{:<24} {:>10.2f} {:>14,.0f}'.format(name, elapsed, per_item))
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
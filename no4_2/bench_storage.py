@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# coding: utf-8
+"""
+할 일 저장소 비교 벤치마크 (todo_storage.py)
+- 저장소마다 임시 디렉터리에 항목 N개를 미리 넣어 두고
+  - 시작 적재 시간 (load + TodoStore 생성)
+  - 추가/수정/삭제 1회 지연 (평균, p50, p99; 모두 디스크 기록 후 반환)
+  - 연산 1회당 쓴 바이트 (write() 바이트 + mmap의 msync 바이트, /proc/self/io 기준)
+  - 디스크 사용량
+  을 같은 조건으로 측정
+- sqlite는 sqlalchemy가 있어야 측정 (없으면 건너뜀)
+
+실행: python bench_storage.py [--items 100000] [--ops 200] [--backends csv,log,sqlite,mmap]
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from todo_record import TodoRecord
+from todo_storage import BACKENDS, open_storage
+from todo_store import TodoStore
+
+
+def written_bytes():
+    """이 프로세스가 write()로 넘긴 바이트 수. /proc가 없으면 None."""
+    try:
+        with open('/proc/self/io') as f:
+            for line in f:
+                if line.startswith('wchar:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def disk_usage(directory):
+    total = 0
+    for name in os.listdir(directory):
+        total += os.path.getsize(os.path.join(directory, name))
+    return total
+
+
+def open_store(backend, directory):
+    storage = open_storage(backend, directory)
+    store = TodoStore(storage.load(), storage)
+    storage.start(store)
+    return storage, store
+
+
+def latency_summary(latencies):
+    latencies = sorted(latencies)
+    return {
+        'mean_us': sum(latencies) / len(latencies) * 1e6,
+        'p50_us': latencies[len(latencies) // 2] * 1e6,
+        'p99_us': latencies[min(len(latencies) - 1, len(latencies) * 99 // 100)] * 1e6,
+    }
+
+
+def bench_backend(backend, items, ops, seed=1):
+    rng = random.Random(seed)
+    directory = tempfile.mkdtemp(prefix='bench_storage_{}_'.format(backend))
+    try:
+        # 미리 넣기 (일괄 추가로 빠르게)
+        storage, store = open_store(backend, directory)
+        chunk = 10000
+        for start in range(0, items, chunk):
+            store.add_many([TodoRecord(i, '할 일 {}번'.format(i), i % 3 == 0)
+                            for i in range(start, min(items, start + chunk))])
+        storage.close()
+
+        # 시작 적재
+        start = time.perf_counter()
+        storage, store = open_store(backend, directory)
+        load_time = time.perf_counter() - start
+
+        result = {'load_sec': load_time, 'items': len(store)}
+        before = written_bytes()
+        msync_before = getattr(storage, 'msync_bytes', 0)
+
+        latencies = []
+        for i in range(items, items + ops):
+            start = time.perf_counter()
+            store.add(TodoRecord(i, '새 할 일 {}번'.format(i)))
+            latencies.append(time.perf_counter() - start)
+        result['add'] = latency_summary(latencies)
+
+        latencies = []
+        for _ in range(ops):
+            todo_id = rng.randrange(items)
+            start = time.perf_counter()
+            store.update(todo_id, {'is_completed': True, 'task': '수정한 할 일'})
+            latencies.append(time.perf_counter() - start)
+        result['update'] = latency_summary(latencies)
+
+        latencies = []
+        for todo_id in rng.sample(range(items), ops):
+            start = time.perf_counter()
+            store.delete(todo_id)
+            latencies.append(time.perf_counter() - start)
+        result['delete'] = latency_summary(latencies)
+
+        after = written_bytes()
+        if before is not None and after is not None:
+            written = after - before + getattr(storage, 'msync_bytes', 0) - msync_before
+            result['bytes_per_op'] = written / (ops * 3)
+        else:
+            result['bytes_per_op'] = None
+        storage.close()
+        result['disk_bytes'] = disk_usage(directory)
+        return result
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='할 일 저장소 비교 벤치마크')
+    parser.add_argument('--items', type=int, default=100000, help='미리 넣을 항목 수')
+    parser.add_argument('--ops', type=int, default=200, help='연산 종류별 측정 횟수')
+    parser.add_argument('--backends', default=','.join(BACKENDS),
+                        help='측정할 저장소 (쉼표로 구분: {})'.format(','.join(BACKENDS)))
+    parser.add_argument('--json', help='결과를 저장할 JSON 파일 경로')
+    args = parser.parse_args()
+
+    results = {}
+    print('항목 {:,}개, 연산 종류별 {:,}회'.format(args.items, args.ops))
+    print('{:<8} {:>9} {:>12} {:>12} {:>12} {:>12} {:>12}'.format(
+        '저장소', '적재(초)', '추가 p50µs', '수정 p50µs', '삭제 p50µs', '연산당 바이트', '디스크(MB)'))
+    for backend in [name for name in args.backends.split(',') if name]:
+        try:
+            result = bench_backend(backend, args.items, args.ops)
+        except ImportError as exc:
+            print('{:<8} 건너뜀 ({})'.format(backend, exc))
+            continue
+        results[backend] = result
+        print('{:<8} {:>9.2f} {:>12,.0f} {:>12,.0f} {:>12,.0f} {:>12} {:>12.1f}'.format(
+            backend, result['load_sec'], result['add']['p50_us'], result['update']['p50_us'],
+            result['delete']['p50_us'],
+            '-' if result['bytes_per_op'] is None else '{:,.0f}'.format(result['bytes_per_op']),
+            result['disk_bytes'] / 1e6))
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'items': args.items, 'ops': args.ops, 'results': results}, f,
+                      ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# coding: utf-8
+"""
+할 일 저장소 벤치마크 (todo_store.py)
+- 항목 N개(기본 100만 개)로
+  - 리스트 방식 (이전 todo.py: 리스트를 훑어 조회/수정, 새 리스트로 삭제)
+  - TodoStore (id -> TodoRecord 색인)
+  의 개별 조회/수정/삭제 1회 평균 시간과 중복 id 검사 시간을 비교
+- 리스트 방식은 1회가 오래 걸리므로 --list-ops 횟수만 측정
+- 그룹 커밋: 동시 스레드 수별로 TodoLog에 기록하는 초당 추가 수와 fsync 1회당 기록 수
+  (임시 디렉터리에 기록, 모든 추가는 fsync 후 반환)
+
+실행: python bench_store.py [--items 1000000] [--ops 100000] [--list-ops 20]
+                            [--writers 1,4,16,64] [--writes 2000]
+"""
+
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+
+from todo_log import TodoLog
+from todo_record import TodoRecord
+from todo_store import TodoStore
+
+
+def make_items(count):
+    return [{'id': i, 'task': 'task {}'.format(i), 'is_completed': i % 3 == 0}
+            for i in range(count)]
+
+
+# --- 이전 방식 (리스트) ---
+
+def list_get(todo_list, todo_id):
+    for item in todo_list:
+        if item['id'] == todo_id:
+            return item
+    return None
+
+
+def list_update(todo_list, todo_id, fields):
+    for item in todo_list:
+        if item['id'] == todo_id:
+            item.update(fields)
+            return item
+    return None
+
+
+def list_delete(todo_list, todo_id):
+    return [item for item in todo_list if item['id'] != todo_id]
+
+
+def per_op(func, ids):
+    """1회 평균 µs."""
+    start = time.perf_counter()
+    for todo_id in ids:
+        func(todo_id)
+    return (time.perf_counter() - start) / len(ids) * 1e6
+
+
+def bench_group_commit(writers, writes):
+    """
+    writers개 스레드가 합쳐서 writes번 추가 → (초당 추가 수, fsync 1회당 기록 수).
+    """
+    directory = tempfile.mkdtemp(prefix='bench_store_')
+    try:
+        log = TodoLog(os.path.join(directory, 'todo_data.csv'))
+        store = TodoStore(log.load(), log)
+        per_thread = writes // writers
+
+        # fsync 횟수를 세기 위해 커밋 스레드의 os.fsync 호출을 감쌈
+        fsyncs = [0]
+        real_fsync = os.fsync
+
+        def counting_fsync(fd):
+            fsyncs[0] += 1
+            real_fsync(fd)
+
+        def worker(base):
+            for i in range(per_thread):
+                store.add(TodoRecord(base + i, 'task'))
+
+        threads = [threading.Thread(target=worker, args=(n * per_thread,))
+                   for n in range(writers)]
+        os.fsync = counting_fsync
+        try:
+            start = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - start
+        finally:
+            os.fsync = real_fsync
+        log.close()
+        total = per_thread * writers
+        return total / elapsed, total / max(1, fsyncs[0])
+    finally:
+        shutil.rmtree(directory, ignore_errors = True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='할 일 저장소 벤치마크')
+    parser.add_argument('--items', type=int, default=1000000, help='항목 수')
+    parser.add_argument('--ops', type=int, default=100000, help='TodoStore 측정 횟수')
+    parser.add_argument('--list-ops', type=int, default=20, help='리스트 방식 측정 횟수')
+    parser.add_argument('--writers', default='1,4,16,64', help='그룹 커밋 측정 스레드 수 (쉼표로 구분)')
+    parser.add_argument('--writes', type=int, default=2000, help='그룹 커밋 측정 추가 횟수')
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    fields = {'is_completed': True}
+
+    start = time.perf_counter()
+    todo_list = make_items(args.items)
+    print('항목 {:,}개 생성: {:.2f}초'.format(args.items, time.perf_counter() - start))
+
+    start = time.perf_counter()
+    store = TodoStore(TodoRecord.from_dict(item) for item in todo_list)
+    print('색인 생성: {:.2f}초'.format(time.perf_counter() - start))
+
+    list_ids = [rng.randrange(args.items) for _ in range(args.list_ops)]
+    store_ids = [rng.randrange(args.items) for _ in range(args.ops)]
+
+    rows = [
+        ('조회', per_op(lambda i: list_get(todo_list, i), list_ids),
+         per_op(store.get, store_ids)),
+        ('수정', per_op(lambda i: list_update(todo_list, i, fields), list_ids),
+         per_op(lambda i: store.update(i, fields), store_ids)),
+        # 중복 id 검사: 리스트는 훑어야 하고 색인은 in 한 번
+        ('중복 검사', per_op(lambda i: any(item['id'] == i for item in todo_list), list_ids),
+         per_op(store.__contains__, store_ids)),
+        ('삭제', per_op(lambda i: list_delete(todo_list, i), list_ids),
+         per_op(store.delete, store_ids)),
+    ]
+
+    print('{:<8} {:>14} {:>14} {:>10}'.format('연산', '리스트(µs)', 'TodoStore(µs)', '배'))
+    for name, list_time, store_time in rows:
+        print('{:<8} {:>14,.1f} {:>14,.3f} {:>10,.0f}'.format(
+            name, list_time, store_time, list_time / store_time))
+
+    print()
+    print('{:>8} {:>14} {:>16}'.format('스레드', '추가/초', 'fsync당 기록'))
+    for writers in [int(n) for n in args.writers.split(',') if n]:
+        per_sec, per_fsync = bench_group_commit(writers, args.writes)
+        print('{:>8} {:>14,.0f} {:>16.1f}'.format(writers, per_sec, per_fsync))
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -1,21 +1,138 @@
-# client.py
+# bonus_client.py
 
+import argparse
 import http.client
 import json
-from typing import Dict, Any
+import math
+import os
+import platform
+import queue
+import random
+import subprocess
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 # === 설정 ===
 HOST = '127.0.0.1'
 PORT = 8000
-HEADERS = {'Content-Type': 'application/json'}
+HEADERS = {'Content-Type': 'application/json', 'Connection': 'keep-alive'}
+TIMEOUT = 10.0
 
+# 부하 모드: 연산 이름 -> (메서드, 경로 모양)
+OPERATIONS = {
+    'add': ('POST', '/add_todo'),
+    'get': ('GET', '/retrieve_todo/{id}'),
+    'update': ('PUT', '/update_todo/{id}'),
+    'delete': ('DELETE', '/delete_single_todo/{id}'),
+    'list': ('GET', '/retrieve_todo?limit={limit}'),
+}
+DEFAULT_MIX = 'add=30,get=40,update=20,delete=10'
+# 일괄 추가/삭제 한 번에 보낼 항목 수 (서버의 MAX_BULK_ITEMS 이하)
+BULK_CHUNK = 1000
+# 스레드마다 쓰는 id 구간의 크기 (스레드끼리 id가 겹치지 않게)
+ID_STRIDE = 10 ** 9
 
-def print_response(response: http.client.HTTPResponse, title: str):
+
+# === 응답 ===
+
+class Response:
+    """
+    본문까지 모두 읽은 HTTP 응답. (연결을 풀에 돌려준 뒤에도 사용 가능)
+    """
+    __slots__ = ('status', 'reason', 'body')
+
+    def __init__(self, status: int, reason: str, body: bytes):
+        self.status = status
+        self.reason = reason
+        self.body = body
+
+    def json(self) -> Any:
+        return json.loads(self.body.decode('utf-8'))
+
+
+# === keep-alive 연결 풀 ===
+
+class ConnectionPool:
+    """
+    서버 하나에 대한 keep-alive 연결 풀입니다.
+    - 요청마다 연결을 새로 만들지 않고 쉬고 있는 연결을 재사용 (TCP 연결/해제 비용 제거)
+    - 동시에 빌려 줄 수 있는 연결은 최대 size개 (넘으면 반납될 때까지 대기)
+    - 응답 본문을 끝까지 읽은 뒤에 반납 (읽지 않은 본문이 남으면 다음 요청이 깨짐)
+    - 서버가 닫겠다고 한 응답(Connection: close)이나 오류가 난 연결은 버림
     """
-    HTTP 응답을 읽고 JSON 형식으로 출력합니다.
+    def __init__(self, host: str = HOST, port: int = PORT, size: int = 8, timeout: float = TIMEOUT):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.created = 0   # 새로 만든 연결 수 (재사용 확인용)
+        self._idle: 'queue.LifoQueue[http.client.HTTPConnection]' = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+
+    def _acquire(self) -> http.client.HTTPConnection:
+        self._slots.acquire()
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                self.created += 1
+            return http.client.HTTPConnection(self.host, self.port, timeout = self.timeout)
+
+    def _release(self, conn: http.client.HTTPConnection, reuse: bool):
+        if reuse:
+            self._idle.put(conn)
+        else:
+            conn.close()
+        self._slots.release()
+
+    def request(self, method: str, path: str, body: Optional[Any] = None) -> Response:
+        """
+        요청을 보내고 본문까지 읽은 응답을 반환합니다.
+        """
+        encoded_body = json.dumps(body, ensure_ascii = False).encode('utf-8') if body is not None else None
+        for attempt in range(2):
+            conn = self._acquire()
+            # 재사용한 연결인지 (아직 연결하지 않은 새 연결은 sock이 None)
+            reused = conn.sock is not None
+            try:
+                conn.request(method, path, body = encoded_body, headers = HEADERS)
+                response = conn.getresponse()
+                data = response.read()
+            except ConnectionError:
+                self._release(conn, False)
+                # 쉬는 동안 서버가 닫은 연결이면 새 연결로 한 번만 다시 시도
+                if reused and attempt == 0:
+                    continue
+                raise
+            except BaseException:
+                self._release(conn, False)
+                raise
+            self._release(conn, not response.will_close)
+            return Response(response.status, response.reason, data)
+        raise ConnectionError('요청을 보내지 못했습니다.')
+
+    def close(self):
+        """
+        쉬고 있는 연결을 모두 닫습니다.
+        """
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+# 예제 실행(run_client_app)에서 쓰는 기본 풀
+POOL = ConnectionPool()
+
+
+def print_response(response: Response, title: str):
+    """
+    HTTP 응답을 JSON 형식으로 출력합니다.
     """
     print(f"\n--- {title} ---")
-    data = response.read().decode('utf-8')
+    data = response.body.decode('utf-8')
     try:
         print(json.dumps(json.loads(data), indent = 4, ensure_ascii = False))
     except json.JSONDecodeError:
@@ -24,56 +141,394 @@ def print_response(response: http.client.HTTPResponse, title: str):
     print("-" * (len(title) + 8))
 
 
-def make_request(method: str, path: str, body: Optional[Dict[str, Any]] = None) -> http.client.HTTPResponse:
+def make_request(method: str, path: str, body: Optional[Dict[str, Any]] = None,
+                 pool: Optional[ConnectionPool] = None) -> Response:
     """
-    FastAPI 서버로 요청을 보내고 응답 객체를 반환합니다.
+    FastAPI 서버로 요청을 보내고 (본문까지 읽은) 응답을 반환합니다.
+    연결은 풀에서 빌려 쓰고 돌려줌 (keep-alive)
     """
-    conn = http.client.HTTPConnection(HOST, PORT)
-    
-    encoded_body = json.dumps(body, ensure_ascii = False).encode('utf-8') if body else None
-    
-    conn.request(method, path, body = encoded_body, headers = HEADERS)
-    response = conn.getresponse()
-    conn.close()
-    return response
+    return (pool or POOL).request(method, path, body)
 
 
-def run_client_app():
+def run_client_app(pool: Optional[ConnectionPool] = None):
     """
     구현된 CRUD 기능을 순서대로 호출하여 동작을 확인합니다.
     """
     print("FastAPI Todo List 클라이언트 앱 시작")
-    
+
     # 1. POST: 항목 2개 추가
     add_item_1 = {"id": 10, "task": "클라이언트 앱 개발", "is_completed": False}
-    response_1 = make_request('POST', '/add_todo', add_item_1)
+    response_1 = make_request('POST', '/add_todo', add_item_1, pool)
     print_response(response_1, '1. 항목 10 추가 (POST)')
-    
+
     add_item_2 = {"id": 11, "task": "클라이언트 테스트", "is_completed": False}
-    response_2 = make_request('POST', '/add_todo', add_item_2)
+    response_2 = make_request('POST', '/add_todo', add_item_2, pool)
     print_response(response_2, '2. 항목 11 추가 (POST)')
-    
+
     # 2. GET: 개별 조회
-    response_3 = make_request('GET', '/retrieve_todo/10')
+    response_3 = make_request('GET', '/retrieve_todo/10', pool = pool)
     print_response(response_3, '3. ID 10 개별 조회 (GET)')
-    
+
     # 3. PUT: 항목 수정
     update_data = {"is_completed": True, "task": "클라이언트 앱 개발 완료"}
-    response_4 = make_request('PUT', '/update_todo/10', update_data)
+    response_4 = make_request('PUT', '/update_todo/10', update_data, pool)
     print_response(response_4, '4. ID 10 수정 (PUT)')
-    
+
     # 4. GET: 전체 조회 (수정 확인)
-    response_5 = make_request('GET', '/retrieve_todo')
+    response_5 = make_request('GET', '/retrieve_todo', pool = pool)
     print_response(response_5, '5. 전체 항목 조회 (GET)')
-    
+
     # 5. DELETE: 항목 삭제
-    response_6 = make_request('DELETE', '/delete_single_todo/11')
+    response_6 = make_request('DELETE', '/delete_single_todo/11', pool = pool)
     print_response(response_6, '6. ID 11 삭제 (DELETE)')
-    
+
     # 6. GET: 전체 조회 (삭제 확인)
-    response_7 = make_request('GET', '/retrieve_todo')
+    response_7 = make_request('GET', '/retrieve_todo', pool = pool)
     print_response(response_7, '7. 최종 전체 항목 조회 (GET)')
 
 
+# === 지연 히스토그램 ===
+
+class LatencyHistogram:
+    """
+    로그 눈금 지연 히스토그램입니다. (HdrHistogram과 같은 방식)
+    - 버킷 i = [BASE**i, BASE**(i+1)) 마이크로초, 백분위 상대 오차 약 4%
+    - 측정값을 모두 저장하지 않아 오래 돌려도 메모리가 일정
+    - 스레드마다 따로 모은 뒤 merge()로 합침 (기록할 때 잠금 없음)
+    """
+    BASE = 2 ** (1 / 16)
+    # 출력용 굵은 구간 경계 (밀리초)
+    DISPLAY_BOUNDS_MS = (0.1, 0.2, 0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+    def __init__(self):
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float):
+        index = int(math.log(max(seconds * 1e6, 1.0), self.BASE))
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def merge(self, other: 'LatencyHistogram'):
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, p: float) -> float:
+        """
+        p 백분위 지연(초). 버킷 상한으로 보고하며 최댓값을 넘지 않음
+        """
+        if not self.count:
+            return 0.0
+        target = max(1, math.ceil(self.count * p / 100))
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= target:
+                return min(self.BASE ** (index + 1) / 1e6, self.max)
+        return self.max
+
+    def display_buckets(self) -> List[Tuple[float, int]]:
+        """
+        출력용 굵은 구간별 개수 [(구간 상한 밀리초, 개수), ...]. 마지막 상한은 inf
+        """
+        bounds = self.DISPLAY_BOUNDS_MS + (math.inf,)
+        counts = [0] * len(bounds)
+        for index, count in self.buckets.items():
+            # 버킷 하한이 속한 구간
+            lower_ms = self.BASE ** index / 1e3
+            position = next(i for i, bound in enumerate(bounds) if lower_ms < bound)
+            counts[position] += count
+        return list(zip(bounds, counts))
+
+    def summary(self) -> Dict:
+        return {
+            'count': self.count,
+            'mean_ms': self.total / self.count * 1000 if self.count else 0.0,
+            'p50_ms': self.percentile(50) * 1000,
+            'p90_ms': self.percentile(90) * 1000,
+            'p99_ms': self.percentile(99) * 1000,
+            'max_ms': self.max * 1000,
+        }
+
+
+# === 부하 모드 ===
+
+class EndpointStats:
+    """
+    연산(엔드포인트) 하나의 측정값: 지연 히스토그램, 상태 코드별 개수, 연결 오류 수
+    """
+    def __init__(self):
+        self.latency = LatencyHistogram()
+        self.statuses: Dict[int, int] = {}
+        self.errors = 0
+
+    def merge(self, other: 'EndpointStats'):
+        self.latency.merge(other.latency)
+        for status, count in other.statuses.items():
+            self.statuses[status] = self.statuses.get(status, 0) + count
+        self.errors += other.errors
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    """
+    'add=30,get=40,update=20,delete=10' 모양의 연산 비율을 읽습니다.
+    """
+    mix = {}
+    for part in text.split(','):
+        if not part.strip():
+            continue
+        name, sep, weight = part.partition('=')
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise ValueError(f'알 수 없는 연산입니다: {name} (가능한 값: {", ".join(OPERATIONS)})')
+        mix[name] = float(weight) if sep else 1.0
+        if mix[name] < 0:
+            raise ValueError(f'연산 비율은 0 이상이어야 합니다: {part}')
+    if not mix or sum(mix.values()) <= 0:
+        raise ValueError('연산 비율이 비어 있습니다.')
+    return mix
+
+
+class LoadWorker:
+    """
+    부하 스레드 하나. 자기 id 구간에서 만든 항목만 조회/수정/삭제해서
+    다른 스레드와 겹치지 않고, 조회/수정/삭제가 있는 항목을 대상으로 함
+    (가진 항목이 없으면 그 차례는 추가로 바꿈)
+    """
+    def __init__(self, pool: ConnectionPool, mix: Dict[str, float], first_id: int,
+                 ids: List[int], seed: int, task_size: int, list_limit: int):
+        self.pool = pool
+        self.names = list(mix)
+        self.weights = [mix[name] for name in self.names]
+        self.next_id = first_id
+        self.ids = ids
+        self.rng = random.Random(seed)
+        self.task = ('할 일 ' * task_size)[:task_size]
+        self.list_limit = list_limit
+        self.stats: Dict[str, EndpointStats] = {name: EndpointStats() for name in mix}
+
+    def _take_id(self) -> int:
+        # 가운데서 빼고 마지막 것으로 메움 (O(1))
+        position = self.rng.randrange(len(self.ids))
+        todo_id = self.ids[position]
+        self.ids[position] = self.ids[-1]
+        self.ids.pop()
+        return todo_id
+
+    def run_one(self):
+        name = self.rng.choices(self.names, self.weights)[0]
+        if name in ('get', 'update', 'delete') and not self.ids:
+            if 'add' not in self.stats:
+                self.stats['add'] = EndpointStats()
+            name = 'add'
+        method, path = OPERATIONS[name]
+        body = None
+        todo_id = None
+        if name == 'add':
+            todo_id = self.next_id
+            self.next_id += 1
+            body = {'id': todo_id, 'task': self.task, 'is_completed': False}
+        elif name == 'list':
+            path = path.format(limit = self.list_limit)
+        else:
+            todo_id = self._take_id() if name == 'delete' else self.ids[self.rng.randrange(len(self.ids))]
+            path = path.format(id = todo_id)
+            if name == 'update':
+                body = {'is_completed': self.rng.random() < 0.5}
+
+        stats = self.stats[name]
+        start = time.perf_counter()
+        try:
+            response = self.pool.request(method, path, body)
+        except (OSError, http.client.HTTPException):
+            stats.errors += 1
+            # 추가가 반영됐는지 알 수 없으므로 그 id는 대상에서 뺌
+            return
+        stats.latency.record(time.perf_counter() - start)
+        stats.statuses[response.status] = stats.statuses.get(response.status, 0) + 1
+        if name == 'add' and response.status == 200:
+            self.ids.append(todo_id)
+
+    def run(self, stop: threading.Event, tickets: Optional[Iterator[int]]):
+        while not stop.is_set():
+            # 요청 수로 끝내는 경우 공유 번호표를 하나씩 가져감 (range 반복자의 next는 원자적)
+            if tickets is not None and next(tickets, None) is None:
+                break
+            self.run_one()
+
+
+def bulk_request(pool: ConnectionPool, path: str, ids: List[int], make_body) -> int:
+    """
+    id 목록을 BULK_CHUNK개씩 나눠 일괄 엔드포인트로 보내고, 성공한 id 수를 반환합니다.
+    """
+    done = 0
+    for start in range(0, len(ids), BULK_CHUNK):
+        chunk = ids[start:start + BULK_CHUNK]
+        response = pool.request('POST', path, make_body(chunk))
+        if response.status == 200:
+            done += len(chunk)
+        else:
+            print(f'{path} 실패 ({response.status}): {response.body[:200].decode("utf-8", "replace")}')
+    return done
+
+
+def run_load(pool: ConnectionPool, mix: Dict[str, float], threads: int, duration: float,
+             requests: Optional[int], preload: int, id_base: int, task_size: int,
+             list_limit: int, cleanup: bool, seed: int = 1) -> Dict:
+    """
+    threads개 스레드로 mix 비율의 요청을 duration초 동안 (또는 requests번) 보내고 결과를 반환합니다.
+    """
+    # 미리 넣기: 조회/수정/삭제 대상이 처음부터 있도록 일괄 추가 (측정에는 포함하지 않음)
+    task = ('할 일 ' * task_size)[:task_size]
+    preloaded = list(range(id_base, id_base + preload))
+    if preloaded:
+        bulk_request(pool, '/bulk_add_todo', preloaded,
+                     lambda chunk: [{'id': todo_id, 'task': task, 'is_completed': False} for todo_id in chunk])
+
+    workers = [
+        LoadWorker(pool, mix, id_base + (index + 1) * ID_STRIDE, preloaded[index::threads],
+                   seed + index, task_size, list_limit)
+        for index in range(threads)
+    ]
+    stop = threading.Event()
+    tickets = iter(range(requests)) if requests else None
+    runners = [threading.Thread(target = worker.run, args = (stop, tickets), daemon = True) for worker in workers]
+
+    start = time.perf_counter()
+    for runner in runners:
+        runner.start()
+    if requests is None:
+        stop.wait(duration)
+        stop.set()
+    for runner in runners:
+        runner.join()
+    elapsed = time.perf_counter() - start
+
+    # 스레드별 측정값 합치기
+    stats: Dict[str, EndpointStats] = {}
+    for worker in workers:
+        for name, worker_stats in worker.stats.items():
+            stats.setdefault(name, EndpointStats()).merge(worker_stats)
+
+    if cleanup:
+        remaining = [todo_id for worker in workers for todo_id in worker.ids]
+        bulk_request(pool, '/bulk_delete_todo', remaining, lambda chunk: chunk)
+
+    total = LatencyHistogram()
+    errors = 0
+    results = {}
+    for name, endpoint in stats.items():
+        total.merge(endpoint.latency)
+        errors += endpoint.errors
+        method, path = OPERATIONS[name]
+        results[name] = dict(
+            endpoint = f'{method} {path}',
+            rps = endpoint.latency.count / elapsed if elapsed else 0.0,
+            errors = endpoint.errors,
+            statuses = {str(status): count for status, count in sorted(endpoint.statuses.items())},
+            histogram = [['inf' if bound == math.inf else bound, count]
+                         for bound, count in endpoint.latency.display_buckets()],
+            **endpoint.latency.summary(),
+        )
+    return {
+        'elapsed_sec': elapsed,
+        'connections_created': pool.created,
+        'total': dict(rps = total.count / elapsed if elapsed else 0.0, errors = errors, **total.summary()),
+        'endpoints': results,
+    }
+
+
+def print_report(report: Dict, show_histogram: bool):
+    print(f"\n{'연산':<8} {'요청 수':>9} {'초당':>9} {'오류':>6} {'평균ms':>8} {'p50ms':>8} "
+          f"{'p90ms':>8} {'p99ms':>8} {'최대ms':>8}  상태 코드")
+    rows = list(report['endpoints'].items()) + [('전체', report['total'])]
+    for name, result in rows:
+        statuses = ', '.join(f'{status}:{count}' for status, count in result.get('statuses', {}).items())
+        print(f"{name:<8} {result['count']:>9,} {result['rps']:>9,.0f} {result['errors']:>6} "
+              f"{result['mean_ms']:>8.2f} {result['p50_ms']:>8.2f} {result['p90_ms']:>8.2f} "
+              f"{result['p99_ms']:>8.2f} {result['max_ms']:>8.2f}  {statuses}")
+    print(f"측정 {report['elapsed_sec']:.1f}초, 새로 만든 연결 {report['connections_created']}개")
+
+    if not show_histogram:
+        return
+    for name, result in report['endpoints'].items():
+        print(f"\n{name} ({result['endpoint']}) 지연 분포")
+        count = result['count'] or 1
+        lower = 0
+        for bound, bucket_count in result['histogram']:
+            if bucket_count:
+                bar = '#' * max(1, round(bucket_count / count * 50))
+                print(f"  {lower:>6} ~ {bound:<6} ms {bucket_count:>9,} {bar}")
+            lower = bound
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'],
+                              cwd = os.path.dirname(os.path.abspath(__file__)),
+                              capture_output = True, text = True, check = True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description = 'Todo API 클라이언트 (예제 실행 / 부하 측정)')
+    parser.add_argument('mode', nargs = '?', choices = ('demo', 'load'), default = 'demo',
+                        help = 'demo: CRUD 예제를 순서대로 실행, load: 동시 부하 측정')
+    parser.add_argument('--host', default = HOST)
+    parser.add_argument('--port', type = int, default = PORT)
+    parser.add_argument('--threads', type = int, default = 16, help = '동시 스레드 수 (= 연결 수)')
+    parser.add_argument('--duration', type = float, default = 10.0, help = '측정 시간(초)')
+    parser.add_argument('--requests', type = int, help = '전체 요청 수 (지정하면 --duration 대신 사용)')
+    parser.add_argument('--mix', default = DEFAULT_MIX,
+                        help = f'연산 비율 (연산: {", ".join(OPERATIONS)}, 기본: {DEFAULT_MIX})')
+    parser.add_argument('--preload', type = int, default = 1000, help = '측정 전에 일괄 추가할 항목 수')
+    parser.add_argument('--id-base', type = int, help = '이번 실행에서 쓸 첫 id (기본: 현재 시각에서 만듦)')
+    parser.add_argument('--task-size', type = int, default = 32, help = '추가하는 task 길이(글자)')
+    parser.add_argument('--list-limit', type = int, default = 100, help = 'list 연산의 limit')
+    parser.add_argument('--keep', action = 'store_true', help = '끝난 뒤 만든 항목을 지우지 않음')
+    parser.add_argument('--histogram', action = 'store_true', help = '연산별 지연 분포 출력')
+    parser.add_argument('--json', help = '결과를 저장할 JSON 파일 경로 (커밋 간 비교용)')
+    args = parser.parse_args()
+
+    pool = ConnectionPool(args.host, args.port, size = max(1, args.threads))
+    try:
+        if args.mode == 'demo':
+            run_client_app(pool)
+            return
+
+        try:
+            mix = parse_mix(args.mix)
+        except ValueError as exc:
+            parser.error(str(exc))
+        # 이전 실행에서 남은 항목과 겹치지 않도록 기본 id는 현재 시각(밀리초)에서 만듦
+        id_base = args.id_base if args.id_base is not None else int(time.time() * 1000) * 1000
+        print(f'대상: http://{args.host}:{args.port}, 스레드 {args.threads}개, 비율 {args.mix}')
+        report = run_load(pool, mix, args.threads, args.duration, args.requests, args.preload,
+                          id_base, args.task_size, args.list_limit, not args.keep)
+        print_report(report, args.histogram)
+
+        if args.json:
+            report = {
+                'commit': git_commit(),
+                'python': platform.python_version(),
+                'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'config': {k: v for k, v in vars(args).items() if k != 'json'},
+                **report,
+            }
+            with open(args.json, mode = 'w', encoding = 'utf-8') as f:
+                json.dump(report, f, ensure_ascii = False, indent = 2)
+    finally:
+        pool.close()
+
+
 if __name__ == '__main__':
-    run_client_app()
+    main()
@@ -1,15 +1,19 @@
 # model.py
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional
 
+# id는 64비트 정수 범위만 받음 (SQLite INTEGER, mmap 슬롯의 int64와 같은 범위)
+ID_MIN = -2 ** 63
+ID_MAX = 2 ** 63 - 1
+
 # 클래스의 이름은 CapWord 방식으로 정의
 class TodoItem(BaseModel):
     """
     할 일 항목의 구조를 정의하는 Pydantic 모델.
     전체 항목을 받음.
     """
-    id: int
+    id: int = Field(..., ge = ID_MIN, le = ID_MAX)
     task: str
     is_completed: bool = False
 
@@ -22,3 +26,11 @@ class UpdateTodoItem(BaseModel):
     # Optional을 사용하면 request body에 해당 필드가 없어도 오류가 발생하지 않음
     task: Optional[str] = None
     is_completed: Optional[bool] = None
+
+
+class BulkUpdateTodoItem(UpdateTodoItem):
+    """
+    일괄 수정에서 항목 하나의 수정 내용.
+    어느 항목을 수정할지 id를 함께 받음.
+    """
+    id: int = Field(..., ge = ID_MIN, le = ID_MAX)
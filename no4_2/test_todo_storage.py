@@ -0,0 +1,177 @@
+# test_todo_storage.py
+# 할 일 저장소 테스트: python -m pytest no4_2
+
+import pytest
+
+import todo_log
+from todo_record import TodoRecord
+from todo_storage import BACKENDS, open_storage
+from todo_store import TodoStore
+
+
+def open_store(backend, directory):
+    """
+    저장소를 열고 적재한 목록으로 TodoStore를 만듭니다. (todo.py와 같은 순서)
+    """
+    if backend == 'sqlite':
+        pytest.importorskip('sqlalchemy')
+    storage = open_storage(backend, str(directory))
+    store = TodoStore(storage.load(), storage)
+    storage.start(store)
+    return storage, store
+
+
+def snapshot(store):
+    """
+    (순번, 항목 Dict) 목록. 순서와 순번까지 비교하기 위함
+    """
+    return [(seq, item.to_dict()) for seq, item in store.iterate()]
+
+
+def fill(store):
+    store.add(TodoRecord(1, '장보기'))
+    store.add_many([TodoRecord(i, f'할 일 {i}', i % 2 == 0) for i in range(2, 8)])
+    store.update(3, {'task': '수정한 할 일', 'is_completed': True})
+    store.delete(4)
+    store.delete_many([6, 7])
+    store.add(TodoRecord(4, '다시 추가'))
+
+
+# === 추가 전용 로그 ===
+
+def test_log_replay_after_restart(tmp_path):
+    storage, store = open_store('log', tmp_path)
+    fill(store)
+    expected = snapshot(store)
+    storage.close()
+
+    # 응답하기 전에 죽어서 마지막 줄이 잘린 경우: 그 줄만 버리고 다시 반영
+    with open(tmp_path / 'todo_data.log', mode = 'a', encoding = 'utf-8') as file:
+        file.write('{"op": "add", "item": {"id": 99')
+
+    storage, store = open_store('log', tmp_path)
+    assert snapshot(store) == expected
+    store.add(TodoRecord(100, '잘린 줄 다음'))
+    storage.close()
+
+    storage, store = open_store('log', tmp_path)
+    assert snapshot(store)[:-1] == expected
+    assert store.get(100).task == '잘린 줄 다음'
+    assert store.get(99) is None
+    storage.close()
+
+
+def test_log_replay_after_compaction(tmp_path):
+    storage, store = open_store('log', tmp_path)
+    fill(store)
+    storage.compact()
+    store.update(2, {'task': 'compaction 뒤 수정'})
+    expected = snapshot(store)
+    storage.close()
+
+    storage, store = open_store('log', tmp_path)
+    assert snapshot(store) == expected
+    storage.close()
+
+
+def test_rollback_when_fsync_fails(tmp_path, monkeypatch):
+    storage, store = open_store('log', tmp_path)
+    fill(store)
+    expected = snapshot(store)
+
+    def failing_fsync(fd):
+        raise OSError('디스크 가득 참')
+
+    monkeypatch.setattr(todo_log.os, 'fsync', failing_fsync)
+    with pytest.raises(OSError):
+        store.add(TodoRecord(50, '기록 못 함'))
+    with pytest.raises(OSError):
+        store.update(1, {'task': '기록 못 함'})
+    with pytest.raises(OSError):
+        store.delete(2)
+    with pytest.raises(OSError):
+        store.add_many([TodoRecord(51, '기록 못 함'), TodoRecord(52, '기록 못 함')])
+    # 메모리도 기록 전으로 되돌아감
+    assert snapshot(store) == expected
+    monkeypatch.undo()
+
+    # 실패한 기록은 로그에 남지 않고, 이후 기록은 정상
+    store.add(TodoRecord(53, '기록함'))
+    expected = snapshot(store)
+    storage.close()
+    storage, store = open_store('log', tmp_path)
+    assert snapshot(store) == expected
+    storage.close()
+
+
+# === 페이지 커서 ===
+
+def test_page_cursor_stable_across_changes():
+    store = TodoStore([TodoRecord(i, f'할 일 {i}') for i in range(10)])
+    page, cursor = store.page(3)
+    assert [item.id for item in page] == [0, 1, 2]
+
+    # 받은 페이지 앞뒤가 바뀌어도 다음 페이지는 커서 다음부터 (건너뛰거나 겹치지 않음)
+    store.delete(1)
+    store.delete(4)
+    store.add(TodoRecord(10, '새 할 일'))
+    store.delete(3)
+    store.add(TodoRecord(3, '다시 추가'))
+    page, cursor = store.page(3, cursor)
+    assert [item.id for item in page] == [5, 6, 7]
+    page, cursor = store.page(3, cursor)
+    assert [item.id for item in page] == [8, 9, 10]
+    page, cursor = store.page(3, cursor)
+    assert [item.id for item in page] == [3]
+    assert cursor is None
+
+
+def test_page_filter_by_completion():
+    store = TodoStore([TodoRecord(i, f'할 일 {i}', i % 3 == 0) for i in range(10)])
+    page, cursor = store.page(2, None, True)
+    assert [item.id for item in page] == [0, 3]
+    page, cursor = store.page(2, cursor, True)
+    assert [item.id for item in page] == [6, 9]
+    assert cursor is None
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_page_cursor_survives_restart(tmp_path, backend):
+    storage, store = open_store(backend, tmp_path)
+    store.add_many([TodoRecord(i, f'할 일 {i}') for i in range(6)])
+    store.delete(1)
+    page, cursor = store.page(2)
+    storage.close()
+
+    storage, store = open_store(backend, tmp_path)
+    page, cursor = store.page(2, cursor)
+    assert [item.id for item in page] == [3, 4]
+    storage.close()
+
+
+# === 저장소별 왕복 ===
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_backend_round_trip(tmp_path, backend):
+    storage, store = open_store(backend, tmp_path)
+    fill(store)
+    expected = snapshot(store)
+    assert [item['id'] for _seq, item in expected] == [1, 2, 3, 5, 4]
+    storage.close()
+
+    storage, store = open_store(backend, tmp_path)
+    assert snapshot(store) == expected
+    # 다시 연 뒤의 순번은 이어서 매김
+    store.add(TodoRecord(8, '마지막'))
+    assert snapshot(store)[-1][0] > expected[-1][0]
+    storage.close()
+
+
+def test_mmap_rejects_task_too_long(tmp_path):
+    storage, store = open_store('mmap', tmp_path)
+    with pytest.raises(ValueError):
+        store.add(TodoRecord(1, '가' * storage.max_task_bytes))
+    with pytest.raises(ValueError):
+        store.add(TodoRecord(1, None))
+    assert len(store) == 0
+    storage.close()
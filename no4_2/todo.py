@@ -1,63 +1,60 @@
 # todo.py
 
-import csv
+import json
 import os
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 
-from fastapi import APIRouter, FastAPI, HTTPException
-from pydantic import BaseModel
+from fastapi import APIRouter, FastAPI, HTTPException, Query
+from fastapi.responses import StreamingResponse
 
 # model.py에서 정의한 모델들을 import
-from model import TodoItem, UpdateTodoItem # <-- model.py 파일에서 import
+from model import BulkUpdateTodoItem, TodoItem, UpdateTodoItem # <-- model.py 파일에서 import
+from todo_record import TodoRecord
+from todo_storage import open_storage
+from todo_store import TodoStore
 
 
 # === 설정 ===
-CSV_FILE_NAME = 'todo_data.csv'
-
-# === 데이터 관리 함수 (CSV 파일 관련) ===
-# 이전 과제에서 작성한 함수와 동일
-def load_todo_list() -> List[Dict]:
+# 저장소 종류: csv, log, sqlite, mmap (todo_storage.py, 환경 변수 TODO_STORAGE로 변경)
+STORAGE_BACKEND = os.environ.get('TODO_STORAGE', 'log')
+# 저장 파일을 둘 디렉터리
+STORAGE_DIR = os.environ.get('TODO_STORAGE_DIR', '.')
+# 전체 조회의 한 페이지 최대 개수
+MAX_PAGE_SIZE = 1000
+# 스트리밍 응답에서 한 조각에 담는 항목 수
+STREAM_CHUNK_ITEMS = 500
+# 일괄 변경 한 번에 받을 최대 항목 수
+MAX_BULK_ITEMS = 10000
+
+# === 데이터 관리 ===
+# 기본(log): 변경마다 CSV 전체를 다시 쓰지 않고 로그에 한 줄만 덧붙임
+# 로그가 커지면 백그라운드에서 CSV 스냅숏으로 합침 (todo_log.py)
+STORAGE = open_storage(STORAGE_BACKEND, STORAGE_DIR)
+
+
+def load_todo_list() -> List[TodoRecord]:
     """
-    CSV 파일에서 할 일 목록을 불러와 리스트[Dict] 형태로 반환합니다.
+    설정한 저장소에서 할 일 목록을 불러옵니다.
     """
-    # 함수 이름은 소문자, 언더라인(_) 사용
-    todo_list = []
-    if not os.path.exists(CSV_FILE_NAME):
-        return todo_list
-
-    with open(CSV_FILE_NAME, mode = 'r', newline = '', encoding = 'utf-8') as file:
-        reader = csv.DictReader(file)
-        for row in reader:
-            # CSV에서 읽은 값은 문자열이므로 타입 변환
-            row['id'] = int(row['id'])
-            row['is_completed'] = row['is_completed'].lower() == 'true'
-            todo_list.append(row)
-
-    return todo_list
+    return STORAGE.load()
 
 
-def save_todo_list(todo_list: List[Dict]):
+def check_task_size(task: Optional[str]):
     """
-    현재 할 일 목록을 CSV 파일에 저장합니다.
+    저장소에 task 길이 제한이 있으면(mmap) 넘는지 확인합니다.
     """
-    if not todo_list:
-        if os.path.exists(CSV_FILE_NAME):
-            os.remove(CSV_FILE_NAME)
-        return
-
-    # 첫 번째 항목의 키를 헤더로 사용
-    fieldnames = list(todo_list[0].keys())
-
-    with open(CSV_FILE_NAME, mode = 'w', newline = '', encoding = 'utf-8') as file:
-        writer = csv.DictWriter(file, fieldnames = fieldnames)
-        writer.writeheader()
-        writer.writerows(todo_list)
+    max_bytes = STORAGE.max_task_bytes
+    if task is not None and max_bytes is not None and len(task.encode('utf-8')) > max_bytes:
+        raise HTTPException(status_code = 400, detail = f'할 일 내용은 {max_bytes}바이트를 넘을 수 없습니다.')
 
 
 # === 라우터 정의 ===
 
 router = APIRouter()
-todo_list = load_todo_list()
+# id -> 항목 색인 (추가 순서 유지): 개별 조회/수정/삭제가 목록 크기와 무관
+# 변경은 todo_store가 잠금 안에서 하고, 디스크 기록은 STORAGE가 함
+todo_store = TodoStore(load_todo_list(), STORAGE)
+STORAGE.start(todo_store)
 
 
 # 이전 과제 함수: 항목 추가
@@ -68,17 +65,83 @@ def add_todo(item: TodoItem) -> Dict:
     item_dict = item.dict()
     if not item_dict or not any(item_dict.values()):
         raise HTTPException(status_code = 400, detail = "입력된 할 일 항목이 비어있습니다.")
+    check_task_size(item_dict['task'])
 
-    todo_list.append(item_dict)
-    save_todo_list(todo_list)
+    # 같은 id가 이미 있으면 추가하지 않음
+    # 메모리에는 Dict 대신 TodoRecord로 보관
+    if not todo_store.add(TodoRecord.from_dict(item_dict)):
+        raise HTTPException(status_code = 409, detail = f"ID {item_dict['id']}인 할 일 항목이 이미 있습니다.")
 
     return {'message': '할 일 항목이 성공적으로 추가되었습니다.', 'new_item': item_dict}
 
 
+def stream_todo(items: Iterator[Tuple[int, TodoRecord]], output_format: str,
+                limit: Optional[int] = None) -> Iterator[bytes]:
+    """
+    항목을 하나씩 JSON으로 바꿔 조각(chunk)으로 내보냅니다. 전체 목록을 메모리에 만들지 않습니다.
+    ndjson: 한 줄에 항목 하나, array: '[항목,항목,...]' JSON 배열
+    limit이 있으면 (ndjson만) 항목 최대 limit개 뒤에 마지막 줄로 {"next_cursor": 커서 또는 null}
+    """
+    if output_format == 'array':
+        yield b'['
+    lines = []
+    first = True
+    count = 0
+    last_seq = None
+    next_cursor = None
+    for seq, item in items:
+        if limit is not None and count >= limit:
+            # 한 개가 더 있으므로 다음 페이지가 있음
+            next_cursor = last_seq
+            break
+        count += 1
+        last_seq = seq
+        text = json.dumps(item.to_dict(), ensure_ascii = False)
+        if output_format == 'array':
+            lines.append(text if first else ',' + text)
+        else:
+            lines.append(text + '\n')
+        first = False
+        # 항목 하나마다 보내면 느리므로 STREAM_CHUNK_ITEMS개씩 모아서 보냄
+        if len(lines) >= STREAM_CHUNK_ITEMS:
+            yield ''.join(lines).encode('utf-8')
+            lines = []
+    if limit is not None:
+        lines.append(json.dumps({'next_cursor': next_cursor}) + '\n')
+    if lines:
+        yield ''.join(lines).encode('utf-8')
+    if output_format == 'array':
+        yield b']'
+
+
 # 이전 과제 함수: 전체 조회
 @router.get('/retrieve_todo')
-def retrieve_todo() -> Dict:
-    return {'todo_list': todo_list, 'count': len(todo_list)}
+def retrieve_todo(limit: Optional[int] = Query(None, ge = 1, le = MAX_PAGE_SIZE),
+                  cursor: Optional[int] = None,
+                  is_completed: Optional[bool] = None,
+                  format: str = 'json') -> Dict:
+    """
+    todo_list를 가져옵니다. (GET 방식)
+    - limit: 한 번에 받을 개수. 응답의 next_cursor를 다음 요청의 cursor로 넘기면 이어서 받음
+      (next_cursor가 None이면 마지막 페이지)
+    - is_completed: 완료 여부로 거르기
+    - format: json (기본, 한 번에 응답) / ndjson, array (항목을 만드는 대로 나눠 보냄)
+      ndjson에 limit을 주면 마지막 줄이 {"next_cursor": 커서 또는 null} (항목 줄에는 next_cursor 키가 없음)
+      array는 커서를 넣을 자리가 없으므로 limit과 함께 쓸 수 없음 (422)
+    """
+    if format not in ('json', 'ndjson', 'array'):
+        raise HTTPException(status_code = 400, detail = "format은 json, ndjson, array 중 하나여야 합니다.")
+    if format == 'array' and limit is not None:
+        raise HTTPException(status_code = 422, detail = "format=array는 limit과 함께 쓸 수 없습니다. (다음 커서는 ndjson의 마지막 줄로 받음)")
+
+    if format != 'json':
+        items = todo_store.iterate(cursor, is_completed)
+        media_type = 'application/x-ndjson' if format == 'ndjson' else 'application/json'
+        return StreamingResponse(stream_todo(items, format, limit), media_type = media_type)
+
+    page, next_cursor = todo_store.page(limit, cursor, is_completed)
+    # 응답으로 보낼 때만 TodoItem 모양의 Dict로 바꿈
+    return {'todo_list': [item.to_dict() for item in page], 'count': len(page), 'next_cursor': next_cursor}
 
 
 # --- 📌 개별 조회 기능 추가 ---
@@ -87,13 +150,13 @@ def get_single_todo(todo_id: int) -> Dict:
     """
     경로 매개변수(todo_id)를 이용해 개별 항목을 조회합니다. (GET 방식)
     """
-    for item in todo_list:
-        if item['id'] == todo_id:
-            # 입출력은 Dict 타입으로 한다.
-            return {'message': f'ID {todo_id} 항목을 성공적으로 조회했습니다.', 'item': item}
+    item = todo_store.get(todo_id)
+    if item is None:
+        # 항목을 찾지 못한 경우
+        raise HTTPException(status_code = 404, detail = f"ID {todo_id}인 할 일 항목을 찾을 수 없습니다.")
 
-    # 항목을 찾지 못한 경우
-    raise HTTPException(status_code = 404, detail = f"ID {todo_id}인 할 일 항목을 찾을 수 없습니다.")
+    # 입출력은 Dict 타입으로 한다.
+    return {'message': f'ID {todo_id} 항목을 성공적으로 조회했습니다.', 'item': item.to_dict()}
 
 
 # --- 📌 수정 기능 추가 ---
@@ -102,32 +165,22 @@ def update_todo(todo_id: int, updated_item: UpdateTodoItem) -> Dict:
     """
     경로 매개변수(todo_id)를 이용해 할 일 항목을 수정합니다. (PUT 방식)
     """
-    item_found = False
-    
     # updated_data = updated_item.model_dump(exclude_unset = True) 
     updated_data = updated_item.dict(exclude_unset = True) # 필수가 아닌 필드만 업데이트
     
     if not updated_data:
         raise HTTPException(status_code = 400, detail = '수정할 내용이 제공되지 않았습니다.')
+    check_task_size(updated_data.get('task'))
 
-    for item in todo_list:
-        if item['id'] == todo_id:
-            item_found = True
-            
-            # 업데이트할 필드만 수정
-            for key, value in updated_data.items():
-                # 'is_completed'는 bool 타입으로 명시적으로 변환 (Pydantic이 이미 처리)
-                item[key] = value
-
-            save_todo_list(todo_list)
-            
-            # 입출력은 Dict 타입으로 한다.
-            return {'message': f'ID {todo_id} 항목이 성공적으로 수정되었습니다.', 'updated_item': item}
-
-    # 항목을 찾지 못한 경우
-    if not item_found:
+    # 업데이트할 필드만 수정
+    item = todo_store.update(todo_id, updated_data)
+    if item is None:
+        # 항목을 찾지 못한 경우
         raise HTTPException(status_code = 404, detail = f"ID {todo_id}인 할 일 항목을 찾을 수 없습니다.")
 
+    # 입출력은 Dict 타입으로 한다.
+    return {'message': f'ID {todo_id} 항목이 성공적으로 수정되었습니다.', 'updated_item': item}
+
 
 # --- 📌 삭제 기능 추가 ---
 @router.delete('/delete_single_todo/{todo_id}')
@@ -135,19 +188,83 @@ def delete_single_todo(todo_id: int) -> Dict:
     """
     경로 매개변수(todo_id)를 이용해 개별 항목을 삭제합니다. (DELETE 방식)
     """
-    global todo_list
-    
-    # 삭제할 항목을 찾아서 인덱스를 저장
-    initial_len = len(todo_list)
-    todo_list = [item for item in todo_list if item['id'] != todo_id]
-    
-    if len(todo_list) < initial_len:
-        save_todo_list(todo_list)
-        # 입출력은 Dict 타입으로 한다.
-        return {'message': f'ID {todo_id} 항목이 성공적으로 삭제되었습니다.', 'deleted_id': todo_id}
-    else:
+    if not todo_store.delete(todo_id):
         # 항목을 찾지 못한 경우
         raise HTTPException(status_code = 404, detail = f"ID {todo_id}인 할 일 항목을 찾을 수 없습니다.")
+    # 입출력은 Dict 타입으로 한다.
+    return {'message': f'ID {todo_id} 항목이 성공적으로 삭제되었습니다.', 'deleted_id': todo_id}
+
+
+# --- 📌 일괄 변경 기능 추가 ---
+# 항목 N개를 요청 N번이 아닌 요청 한 번으로 처리 (검사 → 한 번에 적용 → 한 번 저장)
+# 하나라도 실패하면 아무것도 바꾸지 않고 항목별 결과를 돌려줌
+
+def check_bulk_size(count: int):
+    """
+    일괄 변경 항목 수를 확인합니다.
+    """
+    if count == 0:
+        raise HTTPException(status_code = 400, detail = '일괄 처리할 항목이 없습니다.')
+    if count > MAX_BULK_ITEMS:
+        raise HTTPException(status_code = 400, detail = f'한 번에 최대 {MAX_BULK_ITEMS}개까지 처리할 수 있습니다.')
+
+
+@router.post('/bulk_add_todo')
+def bulk_add_todo(items: List[TodoItem]) -> Dict:
+    """
+    여러 할 일 항목을 한 번에 추가합니다. (POST 방식)
+    이미 있거나 요청 안에서 겹치는 id가 있으면 아무것도 추가하지 않습니다. (409)
+    """
+    check_bulk_size(len(items))
+    item_dicts = [item.dict() for item in items]
+    if any(not any(item_dict.values()) for item_dict in item_dicts):
+        raise HTTPException(status_code = 400, detail = "입력된 할 일 항목 중 비어있는 항목이 있습니다.")
+    for item_dict in item_dicts:
+        check_task_size(item_dict['task'])
+
+    applied, results = todo_store.add_many([TodoRecord.from_dict(item_dict) for item_dict in item_dicts])
+    if not applied:
+        raise HTTPException(status_code = 409, detail = {'message': '추가하지 못한 항목이 있어 아무것도 추가하지 않았습니다.', 'results': results})
+
+    return {'message': f'{len(results)}개 항목이 성공적으로 추가되었습니다.', 'results': results}
+
+
+@router.put('/bulk_update_todo')
+def bulk_update_todo(updated_items: List[BulkUpdateTodoItem]) -> Dict:
+    """
+    여러 할 일 항목을 한 번에 수정합니다. (PUT 방식)
+    없는 id나 요청 안에서 겹치는 id가 있으면 아무것도 수정하지 않습니다. (404)
+    """
+    check_bulk_size(len(updated_items))
+    updates = []
+    for updated_item in updated_items:
+        updated_data = updated_item.dict(exclude_unset = True)
+        todo_id = updated_data.pop('id')
+        if not updated_data:
+            raise HTTPException(status_code = 400, detail = f'ID {todo_id} 항목의 수정할 내용이 제공되지 않았습니다.')
+        check_task_size(updated_data.get('task'))
+        updates.append((todo_id, updated_data))
+
+    applied, results = todo_store.update_many(updates)
+    if not applied:
+        raise HTTPException(status_code = 404, detail = {'message': '수정하지 못한 항목이 있어 아무것도 수정하지 않았습니다.', 'results': results})
+
+    return {'message': f'{len(results)}개 항목이 성공적으로 수정되었습니다.', 'results': results}
+
+
+# DELETE 요청에 본문을 보내지 못하는 클라이언트가 있어 POST 사용
+@router.post('/bulk_delete_todo')
+def bulk_delete_todo(todo_ids: List[int]) -> Dict:
+    """
+    여러 할 일 항목을 id 목록으로 한 번에 삭제합니다. (POST 방식)
+    없는 id나 요청 안에서 겹치는 id가 있으면 아무것도 삭제하지 않습니다. (404)
+    """
+    check_bulk_size(len(todo_ids))
+    applied, results = todo_store.delete_many(todo_ids)
+    if not applied:
+        raise HTTPException(status_code = 404, detail = {'message': '삭제하지 못한 항목이 있어 아무것도 삭제하지 않았습니다.', 'results': results})
+
+    return {'message': f'{len(results)}개 항목이 성공적으로 삭제되었습니다.', 'results': results}
 
 
 # === FastAPI 애플리케이션 생성 및 라우터 포함 ===
@@ -0,0 +1,49 @@
+# todo_database.py
+# no4_3/database.py와 같은 방식의 SQLAlchemy 설정 (SQLite 저장소용)
+
+from sqlalchemy import Boolean, Column, Integer, String, create_engine
+from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import sessionmaker
+
+# SQLite 데이터베이스 파일 이름 (프로젝트 루트에 저장)
+SQLALCHEMY_DATABASE_URL = 'sqlite:///./todo_data.db'
+
+# Base 클래스 정의: 모델들이 상속받아 사용
+Base = declarative_base()
+
+
+# 클래스의 이름은 CapWord 방식 준수
+class TodoRow(Base):
+    """
+    할 일 항목 테이블
+    """
+    __tablename__ = 'todo'
+
+    # 할 일 항목의 고유번호 (primary key)
+    id = Column(Integer, primary_key = True, autoincrement = False)
+
+    # 할 일 내용
+    task = Column(String, nullable = False)
+
+    # 완료 여부
+    is_completed = Column(Boolean, nullable = False, default = False)
+
+    # 추가 순번 (적재할 때 이 순서로 정렬 → 다시 시작해도 추가 순서 유지)
+    seq = Column(Integer, nullable = False, default = 0, index = True)
+
+
+def create_session_factory(database_url: str = SQLALCHEMY_DATABASE_URL):
+    """
+    엔진을 만들고 테이블이 없으면 생성한 뒤 (engine, SessionLocal)을 반환합니다.
+    """
+    # connect_args는 SQLite를 사용할 때만 필요하며,
+    # 요청 스레드가 아닌 커밋 스레드에서도 연결을 쓰므로 같은 스레드 검사를 끔
+    engine = create_engine(
+        database_url, connect_args = {'check_same_thread': False}
+    )
+    Base.metadata.create_all(bind = engine)
+
+    # SessionLocal 클래스 정의: 데이터베이스 세션을 생성하는 클래스
+    # autocommit은 False 로 설정 (제약조건 준수)
+    SessionLocal = sessionmaker(autocommit = False, autoflush = False, bind = engine)
+    return engine, SessionLocal
@@ -0,0 +1,420 @@
+# todo_log.py
+
+import csv
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+from todo_record import TodoRecord
+
+# === 설정 ===
+# 스냅숏(CSV)의 열 순서 (seq: 추가 순번, 다시 시작해도 목록 순서와 페이지 커서가 같도록 보관)
+FIELDNAMES = ['id', 'task', 'is_completed', 'seq']
+
+
+# === 스냅숏 (CSV 파일) ===
+
+def read_snapshot(path: str) -> List[TodoRecord]:
+    """
+    스냅숏 CSV 파일에서 할 일 목록을 불러옵니다.
+    파일이 없으면 빈 리스트를 반환합니다. (seq 열이 없는 이전 스냅숏이면 seq는 0)
+    """
+    todo_list = []
+    if not os.path.exists(path):
+        return todo_list
+
+    with open(path, mode = 'r', newline = '', encoding = 'utf-8') as file:
+        reader = csv.reader(file)
+        header = next(reader, None)
+        if header is None:
+            return todo_list
+        # 열 순서는 머리글을 따름 (줄마다 Dict를 만들지 않음)
+        id_index = header.index('id')
+        task_index = header.index('task')
+        completed_index = header.index('is_completed')
+        seq_index = header.index('seq') if 'seq' in header else None
+        for row in reader:
+            # CSV에서 읽은 값은 문자열이므로 타입 변환
+            record = TodoRecord(int(row[id_index]), row[task_index],
+                                row[completed_index].lower() == 'true')
+            if seq_index is not None:
+                record.seq = int(row[seq_index])
+            todo_list.append(record)
+
+    return todo_list
+
+
+def write_snapshot(path: str, todo_list: Iterable[TodoRecord]):
+    """
+    할 일 목록 전체를 스냅숏 CSV 파일로 저장합니다.
+    임시 파일에 쓰고 fsync한 뒤 교체하므로, 도중에 멈춰도 이전 스냅숏이 남습니다.
+    """
+    temp_path = path + '.tmp'
+    with open(temp_path, mode = 'w', newline = '', encoding = 'utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerow(FIELDNAMES)
+        writer.writerows((record.id, record.task, record.is_completed, record.seq)
+                         for record in todo_list)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp_path, path)
+
+
+def apply_record(items: Dict[int, TodoRecord], record: Dict):
+    """
+    로그 기록 하나를 id -> 항목에 반영합니다.
+    같은 기록을 다시 반영해도 결과가 같도록(멱등) 추가는 같은 id를 덮어씁니다.
+    """
+    op = record.get('op')
+    if op == 'add':
+        item = record['item']
+        items[item['id']] = TodoRecord.from_dict(item)
+        items[item['id']].seq = record.get('seq', 0)
+    elif op == 'update':
+        item = items.get(record['id'])
+        if item is not None:
+            item.update(record['fields'])
+    elif op == 'delete':
+        items.pop(record['id'], None)
+    elif op == 'batch':
+        # 일괄 변경은 한 줄로 기록되므로 전부 반영되거나 (잘린 줄이면) 전부 빠짐
+        for sub_record in record['records']:
+            apply_record(items, sub_record)
+
+
+def replay_log(path: str, items: Dict[int, TodoRecord], repair: bool = False) -> int:
+    """
+    로그 파일의 기록을 순서대로 반영하고 반영한 기록 수를 반환합니다.
+    기록 도중 멈춰서 줄바꿈 없이 끝난 마지막 줄은 버립니다. (repair면 파일에서도 잘라냄)
+    """
+    if not os.path.exists(path):
+        return 0
+
+    count = 0
+    valid_size = 0
+    with open(path, mode = 'rb') as file:
+        for line in file:
+            if not line.endswith(b'\n'):
+                break
+            valid_size += len(line)
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            apply_record(items, record)
+            count += 1
+
+    if repair and valid_size < os.path.getsize(path):
+        with open(path, mode = 'r+b') as file:
+            file.truncate(valid_size)
+    return count
+
+
+# === 그룹 커밋 ===
+
+class _Batch:
+    """
+    한 번에 쓰고 fsync할 기록 묶음.
+    undos: 기록하지 못했을 때 메모리 변경을 되돌리는 함수 (기록 순서대로)
+    """
+    __slots__ = ('entries', 'undos', 'done', 'error')
+
+    def __init__(self):
+        self.entries: List = []
+        self.undos: List[Callable[[], None]] = []
+        self.done = False
+        self.error: Optional[OSError] = None
+
+
+class GroupCommitter:
+    """
+    그룹 커밋: 변경 기록은 대기열에 넣고, 커밋 스레드 하나가 그동안 쌓인 기록을
+    한 번에 쓰고 fsync 한 번으로 디스크에 남긴 뒤 기다리던 요청들을 함께 깨움
+    (동시 요청이 많을수록 fsync 한 번에 담기는 기록이 늘어남)
+    묶음을 기록하지 못하면 그 묶음의 undo를 거꾸로 호출해 메모리 변경을 되돌린 뒤 깨움
+    (실패한 묶음은 디스크에 남지 않아야 함: 하위 클래스의 _write는 전부 쓰거나 하나도 쓰지 않음)
+    하위 클래스는 _write(entries)를 구현하고, 필요하면 _encode(record), _committed_hook(), check(item)을 바꿈.
+    """
+    def __init__(self, commit_window: float = 0.001):
+        # 동시 요청이 있을 때 기록을 더 모으려고 기다리는 시간(초)
+        self.commit_window = commit_window
+        self._queue_lock = threading.Lock()  # 기록 대기열
+        self._has_records = threading.Condition(self._queue_lock)
+        self._committed = threading.Condition(self._queue_lock)
+        self._batch = _Batch()
+        self._writing: Optional[_Batch] = None  # 커밋 스레드가 쓰고 있는 묶음
+        self._closed = False
+        self._committer = None
+        self.failures = 0  # 기록하지 못한 묶음 수 (undo를 모두 마친 뒤 늘어남)
+
+    def _start_committer(self):
+        self._committer = threading.Thread(target = self._commit_loop, daemon = True)
+        self._committer.start()
+
+    def _stop_committer(self):
+        """
+        남은 기록을 쓰고 커밋 스레드를 멈춥니다.
+        """
+        with self._queue_lock:
+            self._closed = True
+            self._has_records.notify()
+        if self._committer is not None:
+            self._committer.join()
+
+    def _encode(self, record: Dict):
+        """
+        대기열에 넣을 모양으로 바꿈 (submit을 부른 스레드에서 실행).
+        """
+        return record
+
+    def _write(self, entries: List):
+        """
+        묶음 하나를 디스크에 기록 (커밋 스레드에서 실행). 실패하면 예외 (wait()에서 OSError로 전달).
+        """
+        raise NotImplementedError
+
+    def _committed_hook(self):
+        """
+        묶음 하나를 기록한 뒤 커밋 스레드에서 호출.
+        """
+
+    def check(self, item: TodoRecord):
+        """
+        이 저장소에 기록할 수 없는 항목이면 ValueError. (메모리를 바꾸기 전에 TodoStore가 호출)
+        """
+
+    def submit(self, record: Dict, undo: Optional[Callable[[], None]] = None) -> _Batch:
+        """
+        변경 기록 하나를 대기열에 넣고 바로 반환합니다. (디스크 기록은 wait()로 기다림)
+        메모리의 목록을 바꾼 것과 같은 잠금 안에서 호출해야 기록 순서가 변경 순서와 같습니다.
+        undo: 기록하지 못했을 때 커밋 스레드가 호출할 함수 (메모리 변경 되돌리기)
+        """
+        entry = self._encode(record)
+        with self._queue_lock:
+            batch = self._batch
+            batch.entries.append(entry)
+            if undo is not None:
+                batch.undos.append(undo)
+            self._has_records.notify()
+        return batch
+
+    def wait(self, batch: _Batch):
+        """
+        기록이 담긴 묶음이 디스크에 기록될 때까지 기다립니다. 쓰기에 실패했으면 OSError.
+        """
+        with self._queue_lock:
+            while not batch.done:
+                self._committed.wait()
+        if batch.error is not None:
+            raise batch.error
+
+    def wait_submitted(self):
+        """
+        지금까지 submit한 기록이 모두 처리(기록 또는 실패 후 되돌리기)될 때까지 기다립니다.
+        묶음은 순서대로 쓰므로 마지막 묶음만 기다리면 됨
+        """
+        with self._queue_lock:
+            batch = self._batch if self._batch.entries else self._writing
+            while batch is not None and not batch.done:
+                self._committed.wait()
+
+    def append(self, record: Dict):
+        """
+        변경 기록 하나를 기록합니다. 반환되면 디스크에 기록된 상태입니다.
+        """
+        self.wait(self.submit(record))
+
+    def _commit_loop(self):
+        last_size = 0
+        while True:
+            with self._queue_lock:
+                while not self._batch.entries and not self._closed:
+                    self._has_records.wait()
+                if not self._batch.entries:
+                    return
+            # 직전 묶음에 기록이 여러 개였으면(동시 요청 중) 조금 더 모아서 씀
+            if self.commit_window and last_size > 1:
+                time.sleep(self.commit_window)
+            with self._queue_lock:
+                batch, self._batch = self._batch, _Batch()
+                self._writing = batch
+            last_size = len(batch.entries)
+
+            try:
+                self._write(batch.entries)
+            except Exception as exc:
+                # 어떤 오류든 기다리는 요청에 넘김 (커밋 스레드가 죽으면 이후 쓰기가 모두 멈춤)
+                if isinstance(exc, OSError):
+                    batch.error = exc
+                else:
+                    batch.error = OSError(f'{type(exc).__name__}: {exc}')
+                    batch.error.__cause__ = exc
+                # 기다리는 요청을 깨우기 전에 메모리를 디스크와 같게 되돌림 (나중 변경부터)
+                for undo in reversed(batch.undos):
+                    try:
+                        undo()
+                    except Exception:
+                        pass
+            finally:
+                with self._queue_lock:
+                    if batch.error is not None:
+                        self.failures += 1
+                    batch.done = True
+                    self._writing = None
+                    self._committed.notify_all()
+
+            if batch.error is None:
+                self._committed_hook()
+
+
+# === 스냅숏 + 추가 전용 로그 ===
+
+class TodoLog(GroupCommitter):
+    """
+    할 일 목록 저장소: 스냅숏(CSV) + 추가 전용 로그(JSON 한 줄씩).
+    - 변경(추가/수정/삭제)마다 로그에 한 줄만 덧붙임 → 목록 크기와 무관한 시간,
+      비정상 종료 시에도 잃는 것은 아직 응답하지 않은 기록뿐
+    - 로그 쓰기는 그룹 커밋 (GroupCommitter)
+    - 로그가 max_log_bytes를 넘거나 항목 수 대비 compact_ratio배를 넘으면
+      백그라운드 스레드가 현재 목록으로 스냅숏을 새로 쓰고 로그를 비움 (compaction)
+    - 시작할 때 스냅숏 + (compaction 중이던 로그) + 로그 순서로 다시 반영
+    """
+    max_task_bytes = None  # task 길이 제한 없음
+
+    def __init__(self, snapshot_path: str, log_path: Optional[str] = None,
+                 max_log_bytes: int = 4 * 1024 * 1024, compact_ratio: float = 1.0,
+                 min_compact_records: int = 1000, sync: bool = True,
+                 commit_window: float = 0.001):
+        super().__init__(commit_window)
+        self.snapshot_path = snapshot_path
+        self.log_path = log_path or os.path.splitext(snapshot_path)[0] + '.log'
+        # compaction 동안 이전 로그를 옮겨 두는 파일
+        self.pending_path = self.log_path + '.compacting'
+        self.max_log_bytes = max_log_bytes
+        self.compact_ratio = compact_ratio
+        self.min_compact_records = min_compact_records
+        self.sync = sync
+        self.records = 0   # 현재 로그의 기록 수
+        self.size = 0      # 현재 로그의 크기
+        self.file = None
+        self._store = None  # 현재 목록 (len()과 list()를 지원하는 저장소, compaction용)
+        self._file_lock = threading.Lock()  # 로그 파일 쓰기/교체
+        self._wake = threading.Event()
+        self._compactor = None
+
+    def load(self) -> List[TodoRecord]:
+        """
+        스냅숏과 로그를 다시 반영해 할 일 목록을 만들고, 로그를 추가 모드로 열어 커밋 스레드를 시작합니다.
+        """
+        items = {item.id: item for item in read_snapshot(self.snapshot_path)}
+        pending = replay_log(self.pending_path, items)
+        self.records = replay_log(self.log_path, items, repair = True)
+        # 추가 순번 순서로 (seq가 없는 이전 스냅숏 항목은 0이라 앞에 두고 원래 순서 유지)
+        todo_list = sorted(items.values(), key = lambda record: record.seq)
+
+        if pending or os.path.exists(self.pending_path):
+            # 이전 compaction이 끝나지 못했음 → 지금 마무리
+            write_snapshot(self.snapshot_path, todo_list)
+            open(self.log_path, mode = 'w').close()
+            os.remove(self.pending_path)
+            self.records = 0
+
+        self.file = open(self.log_path, mode = 'a', encoding = 'utf-8')
+        self.size = self.file.tell()
+        self._start_committer()
+        return todo_list
+
+    def start(self, store):
+        """
+        백그라운드 compaction 시작. store는 현재 할 일 목록 (len(), list() 지원).
+        """
+        self._store = store
+        self._compactor = threading.Thread(target = self._compact_loop, daemon = True)
+        self._compactor.start()
+
+    def _encode(self, record: Dict) -> str:
+        return json.dumps(record, ensure_ascii = False) + '\n'
+
+    def _write(self, lines: List[str]):
+        with self._file_lock:
+            start = self.file.tell()
+            try:
+                self.file.write(''.join(lines))
+                self.file.flush()
+                if self.sync:
+                    os.fsync(self.file.fileno())
+            except OSError:
+                # 일부만 쓴 묶음을 잘라내서 실패한 묶음이 로그에 남지 않게 함 (할 수 있는 만큼)
+                try:
+                    self.file.seek(start)
+                    self.file.truncate()
+                except (OSError, ValueError):
+                    pass
+                raise
+            self.records += len(lines)
+            self.size = self.file.tell()
+
+    def _committed_hook(self):
+        if self._store is not None and self._should_compact():
+            self._wake.set()
+
+    def _should_compact(self) -> bool:
+        if self.size >= self.max_log_bytes:
+            return True
+        return (self.records >= self.min_compact_records
+                and self.records > self.compact_ratio * max(1, len(self._store)))
+
+    def compact(self):
+        """
+        현재 목록으로 스냅숏을 새로 쓰고 이전 로그를 지웁니다.
+        로그를 옮기는 순간에만 잠그므로 그동안에도 변경 기록은 새 로그에 계속 쌓입니다.
+        """
+        with self._file_lock:
+            # 지난번 compaction이 실패해 옮겨 둔 로그가 남아 있으면 그대로 두고 스냅숏만 다시 씀
+            if not os.path.exists(self.pending_path):
+                self.file.close()
+                os.replace(self.log_path, self.pending_path)
+                self.file = open(self.log_path, mode = 'a', encoding = 'utf-8')
+                self.records = 0
+                self.size = 0
+
+        # 옮긴 로그의 변경은 모두 메모리에 반영된 뒤 기록됐으므로 지금 목록에 포함됨
+        # (이후 변경이 섞여 들어가도 새 로그를 다시 반영하면 같은 결과)
+        # (항목을 쓰는 도중 수정돼도 마찬가지)
+        # 스냅숏에는 아직 기록 중인 변경도 담길 수 있으므로, 다 쓴 뒤 그때까지 넘긴 기록이
+        # 모두 처리되기를 기다렸다가 그동안 기록하지 못한 묶음이 있었으면
+        # (되돌리기 전의 목록을 썼을 수 있으므로) 다시 씀
+        while True:
+            failures = self.failures
+            write_snapshot(self.snapshot_path, self._store.list())
+            self.wait_submitted()
+            if self.failures == failures:
+                break
+        os.remove(self.pending_path)
+
+    def _compact_loop(self):
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            if self._closed:
+                return
+            try:
+                self.compact()
+            except OSError:
+                # 디스크 오류가 나도 로그는 계속 쌓이므로 다음 기회에 다시 시도
+                pass
+
+    def close(self):
+        """
+        남은 기록을 쓰고 커밋/compaction 스레드를 멈춘 뒤 로그 파일을 닫습니다.
+        """
+        self._stop_committer()
+        self._wake.set()
+        if self._compactor is not None:
+            self._compactor.join()
+        with self._file_lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
@@ -0,0 +1,389 @@
+# todo_storage.py
+
+import mmap
+import os
+import struct
+from typing import Dict, List, Optional
+
+from todo_log import GroupCommitter, TodoLog, read_snapshot, write_snapshot
+from todo_record import TodoRecord
+
+# === 설정 ===
+# 설정으로 고를 수 있는 저장소 종류
+BACKENDS = ('csv', 'log', 'sqlite', 'mmap')
+
+# id 범위: SQLite INTEGER와 mmap 슬롯의 id(int64)가 담을 수 있는 범위 (model.py의 ID_MIN/ID_MAX와 같음)
+ID_MIN = -2 ** 63
+ID_MAX = 2 ** 63 - 1
+
+# 모든 저장소는 같은 방식으로 사용 (TodoStore가 호출)
+#   load() -> List[TodoRecord]  : 시작할 때 전체 목록 적재 (추가 순서대로. 순번을 보관하면 record.seq도)
+#   start(store)                : 적재한 목록으로 TodoStore를 만든 뒤 호출 (백그라운드 작업 시작)
+#   check(item)                 : 기록할 수 없는 항목이면 ValueError (메모리를 바꾸기 전에 호출)
+#   submit(record, undo) -> 묶음: 변경 기록 하나를 넘김 (TodoStore의 잠금 안에서 호출)
+#                                 기록하지 못하면 undo()로 메모리 변경을 되돌리고 wait()에서 OSError
+#                                 (실패한 묶음은 디스크에 남기지 않음: 전부 쓰거나 하나도 쓰지 않음)
+#   wait(묶음)                  : 그 기록이 디스크에 남을 때까지 대기
+#   close()                     : 남은 기록을 쓰고 닫기
+#   max_task_bytes              : task(UTF-8) 최대 바이트 수 (제한이 없으면 None)
+
+
+def check_id(todo_id: int):
+    """
+    64비트 정수로 기록할 수 없는 id면 ValueError.
+    """
+    if not ID_MIN <= todo_id <= ID_MAX:
+        raise ValueError(f'id는 {ID_MIN}부터 {ID_MAX}까지만 저장할 수 있습니다: {todo_id}')
+
+
+# === CSV 전체 다시 쓰기 (이전 방식) ===
+
+class CsvStorage:
+    """
+    변경마다 CSV 파일 전체를 다시 씁니다. (이전 save_todo_list 방식, 비교 기준)
+    변경 한 번에 O(전체 항목 수)만큼 씀.
+    """
+    max_task_bytes = None
+
+    def __init__(self, path: str):
+        self.path = path
+        self._store = None
+
+    def load(self) -> List[TodoRecord]:
+        return sorted(read_snapshot(self.path), key = lambda record: record.seq)
+
+    def start(self, store):
+        self._store = store
+
+    def check(self, item: TodoRecord):
+        pass
+
+    def submit(self, record: Dict, undo = None):
+        # TodoStore의 잠금 안에서 호출되므로 store.list() 대신 items를 바로 읽음
+        # 바로 기록하므로 실패하면 예외가 그대로 TodoStore로 감 (TodoStore가 되돌림, 이전 파일은 그대로)
+        write_snapshot(self.path, list(self._store.items.values()))
+        return None
+
+    def wait(self, batch):
+        pass
+
+    def close(self):
+        pass
+
+
+# === SQLite (SQLAlchemy) ===
+
+class SqliteStorage(GroupCommitter):
+    """
+    SQLite 데이터베이스에 저장합니다. (no4_3/database.py와 같은 SQLAlchemy 설정, todo_database.py)
+    - 그룹 커밋: 묶음 하나를 트랜잭션 하나로 반영 (commit 한 번 = fsync)
+    - WAL 저널 모드: commit마다 데이터베이스 파일 전체가 아니라 바뀐 페이지만 덧붙임
+    - 추가 순번(seq)을 함께 저장하고 적재할 때 그 순서로 정렬
+    """
+    max_task_bytes = None
+
+    def __init__(self, database_url: Optional[str] = None, commit_window: float = 0.001):
+        super().__init__(commit_window)
+        # sqlalchemy는 이 저장소를 고를 때만 필요
+        import todo_database
+        from sqlalchemy import text
+
+        self.engine, self.SessionLocal = todo_database.create_session_factory(
+            database_url or todo_database.SQLALCHEMY_DATABASE_URL)
+        self.table = todo_database.TodoRow.__table__
+        with self.engine.connect() as connection:
+            connection.execute(text('PRAGMA journal_mode=WAL'))
+
+    def load(self) -> List[TodoRecord]:
+        table = self.table
+        session = self.SessionLocal()
+        try:
+            rows = session.execute(table.select().order_by(table.c.seq, table.c.id))
+            todo_list = []
+            for row in rows:
+                record = TodoRecord(row.id, row.task, row.is_completed)
+                record.seq = row.seq
+                todo_list.append(record)
+        finally:
+            session.close()
+        self._start_committer()
+        return todo_list
+
+    def start(self, store):
+        pass
+
+    def check(self, item: TodoRecord):
+        check_id(item.id)
+
+    def _apply(self, session, record: Dict):
+        table = self.table
+        op = record['op']
+        if op == 'add':
+            session.execute(table.insert().values(**record['item'], seq = record.get('seq', 0)))
+        elif op == 'update':
+            session.execute(table.update().where(table.c.id == record['id']).values(**record['fields']))
+        elif op == 'delete':
+            session.execute(table.delete().where(table.c.id == record['id']))
+        elif op == 'batch':
+            for sub_record in record['records']:
+                self._apply(session, sub_record)
+
+    def _write(self, records: List[Dict]):
+        from sqlalchemy.exc import SQLAlchemyError
+
+        session = self.SessionLocal()
+        try:
+            for record in records:
+                self._apply(session, record)
+            session.commit()
+        except SQLAlchemyError as exc:
+            session.rollback()
+            raise OSError(str(exc)) from exc
+        finally:
+            session.close()
+
+    def close(self):
+        self._stop_committer()
+        self.engine.dispose()
+
+
+# === 메모리 맵 고정 크기 슬롯 파일 ===
+
+# 슬롯 머리: id(int64), 추가 순번(int64), 사용 중(1바이트), 완료 여부(1바이트), task 길이(2바이트)
+_SLOT_HEAD = struct.Struct('<qqBBH')
+# 파일 머리 (첫 슬롯 자리): 표시, 버전, 슬롯 크기
+_FILE_HEAD = struct.Struct('<4sII')
+_MAGIC = b'TDMM'
+_VERSION = 2
+
+
+class MmapStorage(GroupCommitter):
+    """
+    고정 크기 슬롯의 이진 파일을 메모리 맵(mmap)으로 열어 제자리에서 수정합니다.
+    - 항목 하나 = 슬롯 하나 (slot_size 바이트, 첫 슬롯은 파일 머리)
+      슬롯 크기가 페이지 크기의 약수라 슬롯이 페이지 경계에 걸치지 않음
+    - 추가는 빈 슬롯(삭제된 자리 먼저)에, 수정은 그 슬롯에 덮어쓰기, 삭제는 사용 중 표시만 지움
+      → 로그처럼 커지지 않아 compaction이 필요 없음
+    - 그룹 커밋: 묶음 하나를 반영한 뒤 바뀐 페이지 범위만 msync
+    - task는 slot_size - 20 바이트까지 (max_task_bytes)
+    - 일괄 변경이 여러 페이지에 걸치면 비정상 종료 시 일부만 남을 수 있음
+    - 슬롯에 추가 순번(seq)을 함께 두고 적재할 때 그 순서로 정렬 (슬롯 순서와 무관)
+    """
+    def __init__(self, path: str, slot_size: int = 256, initial_slots: int = 1024,
+                 sync: bool = True, commit_window: float = 0.001):
+        super().__init__(commit_window)
+        self.path = path
+        self.slot_size = slot_size
+        self.initial_slots = initial_slots
+        self.sync = sync
+        self.max_task_bytes = slot_size - _SLOT_HEAD.size
+        self.msync_bytes = 0   # msync로 내보낸 바이트 수 (벤치마크용)
+        self.file = None
+        self.map = None
+        self.capacity = 0      # 항목 슬롯 수 (파일 머리 제외)
+        self._slots: Dict[int, int] = {}   # id -> 슬롯 번호
+        self._free: List[int] = []         # 삭제된 슬롯 번호
+        self._next = 0                     # 한 번도 쓰지 않은 첫 슬롯 번호
+
+    def _offset(self, slot: int) -> int:
+        return (slot + 1) * self.slot_size
+
+    def load(self) -> List[TodoRecord]:
+        if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+            with open(self.path, mode = 'wb') as file:
+                file.write(_FILE_HEAD.pack(_MAGIC, _VERSION, self.slot_size).ljust(self.slot_size, b'\0'))
+                file.truncate((self.initial_slots + 1) * self.slot_size)
+                file.flush()
+                os.fsync(file.fileno())
+
+        self.file = open(self.path, mode = 'r+b')
+        self.map = mmap.mmap(self.file.fileno(), 0)
+        magic, version, slot_size = _FILE_HEAD.unpack_from(self.map, 0)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError(f'할 일 저장 파일 형식이 아닙니다: {self.path}')
+        self.slot_size = slot_size
+        self.max_task_bytes = slot_size - _SLOT_HEAD.size
+        self.capacity = len(self.map) // slot_size - 1
+
+        todo_list = []
+        unpack_from = _SLOT_HEAD.unpack_from
+        head_size = _SLOT_HEAD.size
+        for slot in range(self.capacity):
+            offset = self._offset(slot)
+            todo_id, seq, used, is_completed, length = unpack_from(self.map, offset)
+            if used:
+                task = self.map[offset + head_size:offset + head_size + length].decode('utf-8')
+                record = TodoRecord(todo_id, task, bool(is_completed))
+                record.seq = seq
+                todo_list.append(record)
+                self._slots[todo_id] = slot
+                self._next = slot + 1
+        # 빈 슬롯을 재사용하므로 슬롯 순서는 추가 순서가 아님
+        todo_list.sort(key = lambda record: record.seq)
+        # 마지막으로 쓴 슬롯 앞의 빈 슬롯은 재사용
+        used_slots = set(self._slots.values())
+        self._free = [slot for slot in range(self._next - 1, -1, -1) if slot not in used_slots]
+
+        self._start_committer()
+        return todo_list
+
+    def start(self, store):
+        pass
+
+    def check(self, item: TodoRecord):
+        check_id(item.id)
+        self._check_task(item.task)
+
+    def _check_task(self, task: Optional[str]):
+        if task is None:
+            raise ValueError('task가 없습니다. (슬롯에는 문자열만 쓸 수 있음)')
+        if len(task.encode('utf-8')) > self.max_task_bytes:
+            raise ValueError(f'task가 {self.max_task_bytes}바이트를 넘습니다.')
+
+    def _validate(self, record: Dict):
+        """
+        슬롯에 쓸 수 있는 기록인지 미리 검사합니다. (묶음의 일부만 파일에 반영되지 않도록)
+        """
+        op = record['op']
+        if op == 'add':
+            self.check(TodoRecord.from_dict(record['item']))
+        elif op == 'update' and 'task' in record['fields']:
+            self._check_task(record['fields']['task'])
+        elif op == 'batch':
+            for sub_record in record['records']:
+                self._validate(sub_record)
+
+    def _grow(self):
+        """
+        슬롯 수를 두 배로 늘립니다. (커밋 스레드에서만 호출)
+        """
+        capacity = max(self.capacity * 2, self.initial_slots)
+        # 파일을 늘리고 새로 맵을 연 뒤에 기존 맵을 닫음 (중간에 실패해도 기존 맵은 그대로)
+        self.file.truncate((capacity + 1) * self.slot_size)
+        os.fsync(self.file.fileno())
+        new_map = mmap.mmap(self.file.fileno(), 0)
+        self.map.flush()
+        self.map.close()
+        self.map = new_map
+        self.capacity = capacity
+
+    def _write_slot(self, slot: int, record: TodoRecord) -> int:
+        data = record.task.encode('utf-8')
+        offset = self._offset(slot)
+        _SLOT_HEAD.pack_into(self.map, offset, record.id, record.seq, 1, int(record.is_completed), len(data))
+        self.map[offset + _SLOT_HEAD.size:offset + _SLOT_HEAD.size + len(data)] = data
+        return offset
+
+    def _read_slot(self, slot: int) -> TodoRecord:
+        offset = self._offset(slot)
+        todo_id, seq, _used, is_completed, length = _SLOT_HEAD.unpack_from(self.map, offset)
+        start = offset + _SLOT_HEAD.size
+        record = TodoRecord(todo_id, self.map[start:start + length].decode('utf-8'), bool(is_completed))
+        record.seq = seq
+        return record
+
+    def _save_slot(self, slot: int, saved: Dict[int, bytes]) -> int:
+        """
+        슬롯을 바꾸기 전 내용을 saved에 (처음 한 번만) 보관하고 슬롯 위치를 돌려줍니다.
+        """
+        offset = self._offset(slot)
+        if offset not in saved:
+            saved[offset] = self.map[offset:offset + self.slot_size]
+        return offset
+
+    def _apply(self, record: Dict, saved: Dict[int, bytes], old_slots: Dict[int, Optional[int]]):
+        """
+        기록 하나를 슬롯에 반영합니다.
+        바꾼 슬롯의 이전 내용은 saved(위치 -> 바이트)에, 바꾼 id의 이전 슬롯 번호는 old_slots에 보관
+        """
+        op = record['op']
+        if op == 'add':
+            item = TodoRecord.from_dict(record['item'])
+            item.seq = record.get('seq', 0)
+            if self._free:
+                slot = self._free.pop()
+            else:
+                if self._next >= self.capacity:
+                    self._grow()
+                slot = self._next
+                self._next += 1
+            old_slots.setdefault(item.id, self._slots.get(item.id))
+            self._save_slot(slot, saved)
+            self._slots[item.id] = slot
+            self._write_slot(slot, item)
+        elif op == 'update':
+            slot = self._slots.get(record['id'])
+            if slot is not None:
+                item = self._read_slot(slot)
+                item.update(record['fields'])
+                self._save_slot(slot, saved)
+                self._write_slot(slot, item)
+        elif op == 'delete':
+            slot = self._slots.get(record['id'])
+            if slot is not None:
+                old_slots.setdefault(record['id'], slot)
+                offset = self._save_slot(slot, saved)
+                del self._slots[record['id']]
+                _SLOT_HEAD.pack_into(self.map, offset, 0, 0, 0, 0, 0)
+                self._free.append(slot)
+        elif op == 'batch':
+            for sub_record in record['records']:
+                self._apply(sub_record, saved, old_slots)
+
+    def _write(self, records: List[Dict]):
+        # 먼저 전부 검사해서 실패하면 아무 슬롯도 바꾸지 않음
+        for record in records:
+            self._validate(record)
+        saved: Dict[int, bytes] = {}
+        old_slots: Dict[int, Optional[int]] = {}
+        free, next_slot = list(self._free), self._next
+        try:
+            for record in records:
+                self._apply(record, saved, old_slots)
+        except BaseException:
+            # 반영하다 실패하면 바꾼 슬롯 내용과 슬롯 배정을 묶음 이전으로 되돌림
+            # (새로 쓴 슬롯은 비어 있던 내용으로 돌아가 사용 중 표시가 지워짐)
+            for offset, data in saved.items():
+                self.map[offset:offset + len(data)] = data
+            for todo_id, slot in old_slots.items():
+                if slot is None:
+                    self._slots.pop(todo_id, None)
+                else:
+                    self._slots[todo_id] = slot
+            self._free, self._next = free, next_slot
+            raise
+        finally:
+            if saved and self.sync:
+                # 바뀐 슬롯이 있는 페이지 범위만 내보냄 (시작 위치는 페이지 경계로 맞춤)
+                start = min(saved) // mmap.PAGESIZE * mmap.PAGESIZE
+                end = max(saved) + self.slot_size
+                self.map.flush(start, end - start)
+                # msync는 범위 안의 바뀐 페이지만 씀
+                self.msync_bytes += len({offset // mmap.PAGESIZE for offset in saved}) * mmap.PAGESIZE
+
+    def close(self):
+        self._stop_committer()
+        if self.map is not None:
+            self.map.flush()
+            self.map.close()
+            self.map = None
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+# === 설정으로 저장소 고르기 ===
+
+def open_storage(backend: str, directory: str = '.'):
+    """
+    저장소 종류(BACKENDS)에 맞는 저장소를 만듭니다. 파일은 directory 아래에 둡니다.
+    """
+    if backend == 'csv':
+        return CsvStorage(os.path.join(directory, 'todo_data.csv'))
+    if backend == 'log':
+        return TodoLog(os.path.join(directory, 'todo_data.csv'), os.path.join(directory, 'todo_data.log'))
+    if backend == 'sqlite':
+        return SqliteStorage('sqlite:///' + os.path.join(directory, 'todo_data.db'))
+    if backend == 'mmap':
+        return MmapStorage(os.path.join(directory, 'todo_data.bin'))
+    raise ValueError(f'알 수 없는 저장소입니다: {backend} (가능한 값: {", ".join(BACKENDS)})')
@@ -0,0 +1,329 @@
+# todo_store.py
+
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from functools import partial
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from todo_record import TodoRecord
+
+
+# === 메모리 저장소 ===
+
+class TodoStore:
+    """
+    할 일 항목을 id -> 항목(TodoRecord)으로 보관하는 메모리 저장소.
+    - dict는 넣은 순서를 유지하므로 색인(id로 찾기)과 목록(추가 순서) 역할을 함께 함
+    - 조회/수정/삭제는 리스트를 훑지 않고 O(1)
+    - 같은 id는 한 번만 추가할 수 있음
+    - 페이지 나누기: 항목마다 추가 순번(seq)을 매기고, 커서는 '마지막으로 받은 항목의 순번'
+      순번 목록은 오름차순이라 커서 다음 위치를 이진 탐색으로 바로 찾음 (앞부분을 다시 훑지 않음)
+      순번은 항목(record.seq)과 array('q')에 보관 (id별 dict나 int 객체 리스트를 따로 두지 않음)
+      삭제된 항목은 순번 목록에 표시만 남겼다가 절반을 넘으면 한 번에 정리
+      추가 기록에 순번을 함께 넘기고, 저장소(스냅숏의 seq 열, 로그의 추가 기록, sqlite, mmap)에서 적재한 항목은
+      그 순번을 그대로 씀 → 다시 시작해도 목록 순서와 커서가 같음
+    - 여러 스레드(FastAPI 스레드 풀)에서 호출해도 안전: 변경은 lock 안에서 하고,
+      storage(todo_storage.py의 저장소)가 있으면 같은 lock 안에서 변경 기록을 넘긴 뒤
+      lock 밖에서 디스크 기록(그룹 커밋)을 기다림 → 기록 순서 = 변경 순서
+    - 기록에 실패하면 메모리 변경을 되돌림 (변경마다 undo를 함께 넘김)
+      저장소가 기록할 수 없는 항목(storage.check)은 메모리를 바꾸기 전에 ValueError
+    """
+    def __init__(self, todo_list: Iterable[TodoRecord] = (), storage = None):
+        self.items: Dict[int, TodoRecord] = {}
+        self._order_seq = array('q')     # 추가 순번 (오름차순, 삭제된 것 포함)
+        self._order_id: List[int] = []   # 같은 위치의 id (항목의 id 객체를 함께 가리킴)
+        # lock 없이 읽는 iterate()가 두 목록을 한 번에 가져가도록 짝으로도 보관
+        self._order = (self._order_seq, self._order_id)
+        self._next_seq = 1
+        self._dead = 0                   # 순번 목록에 남은 삭제된 항목 수
+        self.lock = threading.Lock()
+        self.storage = storage
+        for item in todo_list:
+            if item.id not in self.items:
+                self._insert(item, keep_seq = True)
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def __contains__(self, todo_id: int) -> bool:
+        return todo_id in self.items
+
+    def list(self) -> List[TodoRecord]:
+        """
+        전체 항목을 추가한 순서대로 반환합니다.
+        (순번 목록을 따름: 삭제를 되돌린 항목도 원래 자리)
+        """
+        with self.lock:
+            return [item for _seq, item in self.iterate()]
+
+    def get(self, todo_id: int) -> Optional[TodoRecord]:
+        """
+        id로 항목을 찾습니다. 없으면 None.
+        """
+        return self.items.get(todo_id)
+
+    def _submit(self, record: Dict, undo: Callable[[], None]):
+        """
+        변경 기록을 저장소에 넘깁니다. (lock 안에서 호출)
+        기록하지 못하면 저장소(커밋 스레드)가 undo를 lock 안에서 호출해 메모리 변경을 되돌림
+        """
+        if self.storage is None:
+            return None
+        try:
+            return self.storage.submit(record, partial(self._rollback, undo))
+        except Exception:
+            # 바로 기록하는 저장소(CsvStorage)가 실패한 경우: 이미 lock 안이므로 그대로 되돌림
+            undo()
+            raise
+
+    def _rollback(self, undo: Callable[[], None]):
+        with self.lock:
+            undo()
+
+    def _check(self, item: TodoRecord):
+        if self.storage is not None:
+            self.storage.check(item)
+
+    def _wait(self, batch):
+        if batch is not None:
+            self.storage.wait(batch)
+
+    def add(self, item: TodoRecord) -> bool:
+        """
+        항목을 추가합니다. 같은 id가 이미 있으면 추가하지 않고 False.
+        storage가 있으면 디스크에 기록된 뒤 반환합니다.
+        """
+        with self.lock:
+            if item.id in self.items:
+                return False
+            self._check(item)
+            self._insert(item)
+            batch = self._submit({'op': 'add', 'item': item.to_dict(), 'seq': item.seq},
+                                 partial(self._undo_add, item))
+        self._wait(batch)
+        return True
+
+    def _insert(self, item: TodoRecord, keep_seq: bool = False):
+        # 적재한 항목의 순번은 오름차순일 때만 그대로 씀 (순번이 없으면 0)
+        if not (keep_seq and item.seq >= self._next_seq):
+            item.seq = self._next_seq
+        self._next_seq = item.seq + 1
+        self.items[item.id] = item
+        # lock 없이 읽는 iterate()는 order_seq 길이까지만 order_id를 읽으므로 id를 먼저 붙임
+        self._order_id.append(item.id)
+        self._order_seq.append(item.seq)
+
+    # --- 기록 실패 시 되돌리기 (lock 안에서 호출) ---
+    # 그 뒤의 변경이 같은 항목을 이미 바꿨으면 그 변경을 덮어쓰지 않음
+
+    def _undo_add(self, item: TodoRecord):
+        if self.items.get(item.id) is item:
+            del self.items[item.id]
+            self._dead += 1
+
+    def _undo_update(self, item: TodoRecord, old: Dict, fields: Dict):
+        if self.items.get(item.id) is item:
+            for key, value in old.items():
+                if getattr(item, key) == fields[key]:
+                    setattr(item, key, value)
+
+    def _undo_delete(self, item: TodoRecord):
+        if item.id in self.items:
+            return
+        index = bisect_left(self._order_seq, item.seq)
+        if index < len(self._order_seq) and self._order_seq[index] == item.seq:
+            # 순번 목록에 자리가 남아 있으면 원래 자리로
+            self.items[item.id] = item
+            self._dead -= 1
+        else:
+            self._insert(item)
+
+    @staticmethod
+    def _undo_all(undos: List[Callable[[], None]]):
+        for undo in reversed(undos):
+            undo()
+
+    def _updated(self, item: TodoRecord, fields: Dict) -> TodoRecord:
+        """
+        수정한 결과를 새 항목으로 만듭니다. (저장소 검사용, item은 바꾸지 않음)
+        """
+        updated = TodoRecord(item.id, item.task, item.is_completed)
+        updated.update(fields)
+        return updated
+
+    def _apply_update(self, item: TodoRecord, fields: Dict) -> Callable[[], None]:
+        old = {key: getattr(item, key) for key in fields if key in TodoRecord.FIELDS}
+        item.update(fields)
+        return partial(self._undo_update, item, old, fields)
+
+    def update(self, todo_id: int, fields: Dict) -> Optional[Dict]:
+        """
+        항목의 일부 필드를 수정하고 수정된 항목을 Dict로 반환합니다. 없으면 None.
+        """
+        with self.lock:
+            item = self.items.get(todo_id)
+            if item is None:
+                return None
+            self._check(self._updated(item, fields))
+            undo = self._apply_update(item, fields)
+            result = item.to_dict()
+            batch = self._submit({'op': 'update', 'id': todo_id, 'fields': fields}, undo)
+        self._wait(batch)
+        return result
+
+    def delete(self, todo_id: int) -> bool:
+        """
+        항목을 삭제합니다. 없으면 False.
+        """
+        with self.lock:
+            item = self.items.pop(todo_id, None)
+            if item is None:
+                return False
+            self._dead += 1
+            if self._dead > 1024 and self._dead * 2 > len(self._order_seq):
+                self._compact_order()
+            batch = self._submit({'op': 'delete', 'id': todo_id}, partial(self._undo_delete, item))
+        self._wait(batch)
+        return True
+
+    # --- 일괄 변경 ---
+    # 먼저 전부 검사하고, 하나라도 실패하면 아무것도 바꾸지 않음 (항목별 결과만 반환)
+    # 모두 통과하면 lock 안에서 한 번에 바꾸고 로그에는 'batch' 기록 한 줄 (fsync 한 번)
+
+    @staticmethod
+    def _results(ids: List[int], errors: Dict[int, str], status: str) -> List[Dict]:
+        """
+        항목별 결과. 실패한 항목은 이유, 나머지는 실패가 있으면 'not_applied', 없으면 status.
+        """
+        default = 'not_applied' if errors else status
+        return [{'id': todo_id, 'status': errors.get(index, default)}
+                for index, todo_id in enumerate(ids)]
+
+    def _commit_batch(self, records: List[Dict], undos: List[Callable[[], None]]):
+        return self._submit({'op': 'batch', 'records': records}, partial(self._undo_all, undos))
+
+    def add_many(self, items: List[TodoRecord]) -> Tuple[bool, List[Dict]]:
+        """
+        여러 항목을 한 번에 추가합니다. (적용 여부, 항목별 결과)
+        이미 있거나 목록 안에서 겹치는 id가 하나라도 있으면 아무것도 추가하지 않습니다.
+        """
+        ids = [item.id for item in items]
+        with self.lock:
+            errors = {}
+            seen = set()
+            for index, todo_id in enumerate(ids):
+                if todo_id in self.items or todo_id in seen:
+                    errors[index] = 'duplicate'
+                seen.add(todo_id)
+            if errors:
+                return False, self._results(ids, errors, 'added')
+            for item in items:
+                self._check(item)
+            for item in items:
+                self._insert(item)
+            batch = self._commit_batch([{'op': 'add', 'item': item.to_dict(), 'seq': item.seq}
+                                        for item in items],
+                                       [partial(self._undo_add, item) for item in items])
+        self._wait(batch)
+        return True, self._results(ids, {}, 'added')
+
+    def update_many(self, updates: List[Tuple[int, Dict]]) -> Tuple[bool, List[Dict]]:
+        """
+        여러 항목을 한 번에 수정합니다. updates는 (id, 수정할 필드) 목록. (적용 여부, 항목별 결과)
+        없는 id나 목록 안에서 겹치는 id가 하나라도 있으면 아무것도 수정하지 않습니다.
+        """
+        ids = [todo_id for todo_id, _fields in updates]
+        with self.lock:
+            errors = {}
+            seen = set()
+            for index, todo_id in enumerate(ids):
+                if todo_id in seen:
+                    errors[index] = 'duplicate'
+                elif todo_id not in self.items:
+                    errors[index] = 'not_found'
+                seen.add(todo_id)
+            if errors:
+                return False, self._results(ids, errors, 'updated')
+            for todo_id, fields in updates:
+                self._check(self._updated(self.items[todo_id], fields))
+            undos = [self._apply_update(self.items[todo_id], fields) for todo_id, fields in updates]
+            batch = self._commit_batch([{'op': 'update', 'id': todo_id, 'fields': fields}
+                                        for todo_id, fields in updates], undos)
+        self._wait(batch)
+        return True, self._results(ids, {}, 'updated')
+
+    def delete_many(self, ids: List[int]) -> Tuple[bool, List[Dict]]:
+        """
+        여러 항목을 한 번에 삭제합니다. (적용 여부, 항목별 결과)
+        없는 id나 목록 안에서 겹치는 id가 하나라도 있으면 아무것도 삭제하지 않습니다.
+        """
+        with self.lock:
+            errors = {}
+            seen = set()
+            for index, todo_id in enumerate(ids):
+                if todo_id in seen:
+                    errors[index] = 'duplicate'
+                elif todo_id not in self.items:
+                    errors[index] = 'not_found'
+                seen.add(todo_id)
+            if errors:
+                return False, self._results(ids, errors, 'deleted')
+            undos = [partial(self._undo_delete, self.items.pop(todo_id)) for todo_id in ids]
+            self._dead += len(ids)
+            if self._dead > 1024 and self._dead * 2 > len(self._order_seq):
+                self._compact_order()
+            batch = self._commit_batch([{'op': 'delete', 'id': todo_id} for todo_id in ids], undos)
+        self._wait(batch)
+        return True, self._results(ids, {}, 'deleted')
+
+    def _compact_order(self):
+        """
+        순번 목록에서 삭제된 항목을 정리합니다. (새 리스트로 바꾸므로 진행 중인 순회는 영향 없음)
+        """
+        order_seq = array('q')
+        order_id = []
+        for seq, todo_id in zip(self._order_seq, self._order_id):
+            item = self.items.get(todo_id)
+            if item is not None and item.seq == seq:
+                order_seq.append(seq)
+                order_id.append(todo_id)
+        self._order_seq, self._order_id = order_seq, order_id
+        self._order = (order_seq, order_id)
+        self._dead = 0
+
+    def iterate(self, after: Optional[int] = None,
+                is_completed: Optional[bool] = None) -> Iterator[Tuple[int, TodoRecord]]:
+        """
+        (순번, 항목)을 추가 순서대로 하나씩 돌려줍니다. 전체 목록을 복사하지 않습니다.
+        after: 이 순번 다음부터 (커서), is_completed: 완료 여부로 거르기
+        """
+        # lock 없이 읽음: 짝을 한 번에 가져가고, _insert가 id를 먼저 붙이므로
+        # order_seq 길이 안의 위치는 order_id에도 항상 있음
+        order_seq, order_id = self._order
+        index = bisect_right(order_seq, after) if after is not None else 0
+        while index < len(order_seq):
+            seq, todo_id = order_seq[index], order_id[index]
+            index += 1
+            # 삭제됐거나 삭제 후 다시 추가된 항목의 이전 자리는 건너뜀
+            item = self.items.get(todo_id)
+            if item is None or item.seq != seq:
+                continue
+            if is_completed is not None and item.is_completed != is_completed:
+                continue
+            yield seq, item
+
+    def page(self, limit: Optional[int] = None, after: Optional[int] = None,
+             is_completed: Optional[bool] = None) -> Tuple[List[TodoRecord], Optional[int]]:
+        """
+        항목 최대 limit개와 다음 페이지 커서를 반환합니다. 마지막 페이지면 커서는 None.
+        """
+        page = []
+        last_seq = None
+        for seq, item in self.iterate(after, is_completed):
+            if limit is not None and len(page) >= limit:
+                # 한 개가 더 있으므로 다음 페이지가 있음
+                return page, last_seq
+            page.append(item)
+            last_seq = seq
+        return page, None